@@ -10,10 +10,10 @@ from app.models.user import User
 from app.seed import seed_defaults
 
 
-def create_app():
+def create_app(config_class=Config):
     """Factory principale de l'application Flask."""
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
 
     # -----------------------
     # Initialisation extensions (DB, migrations, login)
@@ -26,7 +26,27 @@ def create_app():
     # -----------------------
     # Import des modeles (IMPORTANT pour SQLAlchemy)
     # -----------------------
-    from app.models import user, filiere, classe, matiere, note, demande
+    from app.models import (
+        user, filiere, classe, matiere, note, note_change, demande, resultat,
+        statistique, bilan_annuel, job, version_cache
+    )
+
+    # -----------------------
+    # Suivi des ecritures de notes (journal, resultats, statistiques, caches)
+    # -----------------------
+    from app.utils import (
+        cache_resultats, ecritures, journal_notes, resultats_materialises, statistiques
+    )
+
+    ecritures.installer()
+    resultats_materialises.enregistrer()
+    statistiques.enregistrer()
+    cache_resultats.enregistrer(app)
+    # En dernier : son verrou (PostgreSQL) n'est tenu que du journal au commit
+    journal_notes.enregistrer(app)
+
+    # Taches de fond connues du worker (bulletins, exports)
+    from app.utils import taches  # noqa: F401
 
     # -----------------------
     # Import & enregistrement des blueprints (routes)
@@ -35,11 +55,29 @@ def create_app():
     from app.admin.routes import admin_bp
     from app.enseignant.routes import enseignant_bp
     from app.etudiant.routes import etudiant_bp
+    from app.jobs.routes import jobs_bp
+    from app.api.routes import api_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp, url_prefix="/admin")
     app.register_blueprint(enseignant_bp, url_prefix="/enseignant")
     app.register_blueprint(etudiant_bp, url_prefix="/etudiant")
+    app.register_blueprint(jobs_bp, url_prefix="/jobs")
+    app.register_blueprint(api_bp, url_prefix="/api/v1")
+
+    # -----------------------
+    # Commandes CLI (flask resultats / statistiques ...)
+    # -----------------------
+    from app.cli import (
+        annees_cli, bulletins_cli, jobs_cli, resultats_cli, statistiques_cli, worker
+    )
+
+    app.cli.add_command(resultats_cli)
+    app.cli.add_command(statistiques_cli)
+    app.cli.add_command(annees_cli)
+    app.cli.add_command(bulletins_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(worker)
 
     # -----------------------
     # Route d'accueil (redirection selon role)
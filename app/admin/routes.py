@@ -1,7 +1,10 @@
 """Routes admin: gestion filieres, classes, matieres, enseignants, etudiants."""
 import os
 import uuid
-from flask import render_template, redirect, url_for, request, flash, abort, current_app
+from flask import (
+    render_template, redirect, url_for, request, flash, abort, current_app,
+    Response, stream_with_context
+)
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
@@ -11,6 +14,15 @@ from app.models.classe import Classe
 from app.models.filiere import Filiere
 from app.models.matiere import Matiere
 from app.models.user import User
+from app.utils.bulletins_lot import (
+    journaliser_mesures,
+    preparer_bulletins,
+    processus_bulletins,
+    rendre_en_parallele,
+    zip_en_flux,
+)
+from app.utils.jobs import enfiler
+from app.utils.statistiques import statistiques_par_matiere
 from . import admin_bp
 
 # Niveaux autorises pour les filieres
@@ -93,6 +105,90 @@ def dashboard():
     )
 
 
+# -------------------------------
+# STATISTIQUES DES NOTES
+# -------------------------------
+@admin_bp.route("/statistiques")
+@login_required
+def statistiques():
+    _require_admin()
+
+    # Lecture de la table agregee (aucun parcours des notes)
+    classe_id = request.args.get("classe_id", type=int)
+
+    return render_template(
+        "admin/statistiques.html",
+        statistiques=statistiques_par_matiere(classe_id),
+        classes=Classe.query.all(),
+        classe_id=classe_id
+    )
+
+
+# -------------------------------
+# BULLETINS D'UNE CLASSE / FILIERE (ZIP)
+# -------------------------------
+@admin_bp.route("/bulletins")
+@login_required
+def bulletins():
+    _require_admin()
+
+    classe_id = request.args.get("classe_id", type=int)
+    filiere_id = request.args.get("filiere_id", type=int)
+    if classe_id is not None:
+        libelle = f"classe_{Classe.query.get_or_404(classe_id).nom}"
+    elif filiere_id is not None:
+        libelle = f"filiere_{Filiere.query.get_or_404(filiere_id).nom}"
+    else:
+        abort(400)
+
+    # Donnees lues maintenant, rendu PDF en parallele pendant l'envoi
+    bulletins = preparer_bulletins(classe_id=classe_id, filiere_id=filiere_id)
+    if not bulletins:
+        flash("Aucun etudiant pour ce bulletin")
+        return redirect(url_for("admin.classes" if classe_id is not None else "admin.filieres"))
+
+    def generer():
+        mesures = {}
+        yield from zip_en_flux(
+            rendre_en_parallele(bulletins, processus_bulletins(), mesures)
+        )
+        journaliser_mesures(f"Bulletins {libelle}", mesures)
+
+    nom_archive = secure_filename(f"bulletins_{libelle}.zip")
+    return Response(
+        stream_with_context(generer()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={nom_archive}"}
+    )
+
+
+# -------------------------------
+# EXPORTS EN TACHE DE FOND (bulletins ZIP, resultats CSV)
+# -------------------------------
+@admin_bp.route("/exports/<type_export>", methods=["POST"])
+@login_required
+def export_tache(type_export):
+    _require_admin()
+
+    if type_export not in ("bulletins_zip", "resultats_csv"):
+        abort(404)
+    classe_id = request.form.get("classe_id", type=int)
+    filiere_id = request.form.get("filiere_id", type=int)
+    if classe_id is not None:
+        Classe.query.get_or_404(classe_id)
+        parametres = {"classe_id": classe_id}
+    elif filiere_id is not None:
+        Filiere.query.get_or_404(filiere_id)
+        parametres = {"filiere_id": filiere_id}
+    else:
+        abort(400)
+
+    # Execute par `flask worker`, suivi sur la page de la tache
+    job = enfiler(type_export, parametres, demandeur_id=current_user.id)
+    flash("Tache ajoutee a la file")
+    return redirect(url_for("jobs.detail", job_id=job.id))
+
+
 # -------------------------------
 # LISTE DES FILIERES
 # -------------------------------
@@ -416,6 +512,7 @@ def add_enseignant():
     _require_admin()
 
     matieres = Matiere.query.all()
+    classes = Classe.query.order_by(Classe.nom).all()
 
     if request.method == "POST":
         username = request.form.get("username")
@@ -423,6 +520,7 @@ def add_enseignant():
         nom = request.form.get("nom")
         prenom = request.form.get("prenom")
         matiere_ids = request.form.getlist("matiere_ids")
+        classe_ids = request.form.getlist("classe_ids")
         profile_image = _save_profile_image(request.files.get("profile_image"))
 
         if not username or not password:
@@ -444,6 +542,8 @@ def add_enseignant():
 
         if matiere_ids:
             enseignant.matieres = Matiere.query.filter(Matiere.id.in_(matiere_ids)).all()
+        if classe_ids:
+            enseignant.classes = Classe.query.filter(Classe.id.in_(classe_ids)).all()
 
         db.session.add(enseignant)
         db.session.commit()
@@ -451,7 +551,7 @@ def add_enseignant():
         flash("Enseignant ajoute avec succes", "success")
         return redirect(url_for("admin.enseignants"))
 
-    return render_template("admin/enseignants/add.html", matieres=matieres)
+    return render_template("admin/enseignants/add.html", matieres=matieres, classes=classes)
 
 
 # -------------------------------
@@ -465,6 +565,8 @@ def edit_enseignant(id):
     enseignant = User.query.filter_by(id=id, role="ENSEIGNANT").first_or_404()
     matieres = Matiere.query.all()
     matiere_ids_actuels = {m.id for m in enseignant.matieres}
+    classes = Classe.query.order_by(Classe.nom).all()
+    classe_ids_actuels = {c.id for c in enseignant.classes}
 
     if request.method == "POST":
         new_username = request.form.get("username")
@@ -478,6 +580,8 @@ def edit_enseignant(id):
         enseignant.prenom = request.form.get("prenom")
         matiere_ids = request.form.getlist("matiere_ids")
         enseignant.matieres = Matiere.query.filter(Matiere.id.in_(matiere_ids)).all()
+        classe_ids = request.form.getlist("classe_ids")
+        enseignant.classes = Classe.query.filter(Classe.id.in_(classe_ids)).all()
         profile_image = _save_profile_image(request.files.get("profile_image"))
         if profile_image:
             enseignant.profile_image = profile_image
@@ -494,7 +598,9 @@ def edit_enseignant(id):
         "admin/enseignants/edit.html",
         enseignant=enseignant,
         matieres=matieres,
-        matiere_ids_actuels=matiere_ids_actuels
+        matiere_ids_actuels=matiere_ids_actuels,
+        classes=classes,
+        classe_ids_actuels=classe_ids_actuels
     )
 
 
@@ -0,0 +1,371 @@
+"""API JSON en lecture (v1): resultats, notes, demandes et flux des changements de notes."""
+import hashlib
+import json
+from datetime import date, datetime
+
+from flask import current_app, request, abort
+from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import is_resource_modified
+
+from app.models.classe import Classe
+from app.models.demande import Demande
+from app.models.note_change import SUPPRESSION
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.carnet_notes import carnet_classe
+from app.utils.classement import classement_etudiant
+from app.utils.journal_notes import LOT_CHANGEMENTS, LOT_CHANGEMENTS_MAX, lire_changements
+from app.utils.resultats import cartes_etudiant, resultat_etudiant, use_coefficients
+from app.utils.resultats_materialises import etat_resultats
+from . import api_bp
+
+# A incrementer quand la forme des reponses etudiant change (ETag precalcule)
+VERSION_API = 1
+
+# Taille de page par defaut et maximale
+PAR_PAGE = 50
+PAR_PAGE_MAX = 200
+
+# Champs disponibles par type d'element (selection avec ?champs=a,b)
+CHAMPS_NOTE = (
+    "id", "valeur", "absence", "appreciation", "annee", "date_ajout", "updated_at", "version",
+    "matiere_id", "matiere", "etudiant_id", "etudiant", "enseignant_id", "enseignant"
+)
+CHAMPS_DEMANDE = ("id", "objet", "message", "statut", "date_ajout")
+CHAMPS_ETUDIANT = ("etudiant", "annee", "cartes", "resultat", "classement", "notes")
+
+
+# ----------------------------
+# Reponses JSON
+# ----------------------------
+def _par_defaut(valeur):
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    raise TypeError(f"Non serialisable: {type(valeur).__name__}")
+
+
+def _reponse(donnees, statut=200, etag=None):
+    """
+    JSON compact (sans espaces). ETag fourni (precalcule) ou calcule sur le
+    corps : 304 si le client a deja cette version (If-None-Match).
+    """
+    corps = json.dumps(
+        donnees, ensure_ascii=False, separators=(",", ":"), default=_par_defaut
+    )
+    reponse = current_app.response_class(corps, status=statut, mimetype="application/json")
+    if statut == 200:
+        reponse.set_etag(etag or hashlib.sha256(corps.encode("utf-8")).hexdigest())
+        reponse.headers["Cache-Control"] = "private, no-cache"
+        reponse.make_conditional(request)
+    return reponse
+
+
+def _validateur(*extra):
+    """
+    ETag des resultats de l'etudiant connecte, lu dans student_results
+    (etat_resultats) sans rien calculer. None si la ligne manque ou est
+    perimee : l'ETag est alors calcule sur le corps.
+    """
+    etat = etat_resultats(current_user, use_coefficients())
+    if etat is None:
+        return None
+    contenu = repr((
+        VERSION_API, request.path, etat[0], annee_courante(),
+        _etudiant_json(current_user), *extra
+    ))
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+def _reponse_validee(etag, calcul):
+    """304 sans appeler calcul() si le client a deja l'ETag precalcule."""
+    if etag is not None and not is_resource_modified(request.environ, etag=etag):
+        reponse = current_app.response_class(status=304)
+        reponse.set_etag(etag)
+        reponse.headers["Cache-Control"] = "private, no-cache"
+        return reponse
+    return _reponse(calcul(), etag=etag)
+
+
+@api_bp.errorhandler(HTTPException)
+def _erreur(erreur):
+    """Erreurs en JSON plutot qu'en page HTML."""
+    return _reponse({"erreur": erreur.description, "code": erreur.code}, erreur.code)
+
+
+@api_bp.before_request
+def _authentifier():
+    """401 JSON au lieu de la redirection vers la page de connexion."""
+    if not current_user.is_authenticated:
+        abort(401, "Authentification requise")
+
+
+def _require_etudiant():
+    if current_user.role != "ETUDIANT":
+        abort(403)
+
+
+def _require_enseignant():
+    if current_user.role != "ENSEIGNANT":
+        abort(403)
+
+
+# ----------------------------
+# Selection de champs et pagination
+# ----------------------------
+def _champs(disponibles):
+    """Champs demandes (?champs=a,b), tous par defaut. 400 si inconnus."""
+    valeur = request.args.get("champs")
+    if not valeur:
+        return disponibles
+    champs = tuple(c.strip() for c in valeur.split(",") if c.strip())
+    inconnus = [c for c in champs if c not in disponibles]
+    if inconnus:
+        abort(400, f"Champs inconnus: {', '.join(inconnus)}")
+    return champs
+
+
+def _selection(element, champs):
+    return {c: element[c] for c in champs}
+
+
+def _paginer(query, serialiser, champs):
+    """Page ?page=&par_page= d'une requete, elements reduits aux champs."""
+    page = request.args.get("page", 1, type=int)
+    par_page = request.args.get("par_page", PAR_PAGE, type=int)
+    if page < 1 or par_page < 1:
+        abort(400, "page et par_page doivent etre positifs")
+    par_page = min(par_page, PAR_PAGE_MAX)
+
+    total = query.order_by(None).count()
+    elements = query.offset((page - 1) * par_page).limit(par_page).all()
+    return {
+        "elements": [_selection(serialiser(e), champs) for e in elements],
+        "page": page,
+        "par_page": par_page,
+        "total": total,
+        "pages": (total + par_page - 1) // par_page,
+    }
+
+
+# ----------------------------
+# Serialisation
+# ----------------------------
+def _nom(user):
+    return (user.full_name or user.username) if user is not None else None
+
+
+def _note_json(note):
+    return {
+        "id": note.id,
+        "valeur": note.valeur,
+        "absence": bool(note.absence),
+        "appreciation": note.appreciation,
+        "annee": note.annee,
+        "date_ajout": note.date_ajout,
+        "updated_at": note.updated_at,
+        "version": note.version,
+        "matiere_id": note.matiere_id,
+        "matiere": note.matiere.nom,
+        "etudiant_id": note.etudiant_id,
+        "etudiant": _nom(note.etudiant),
+        "enseignant_id": note.enseignant_id,
+        "enseignant": _nom(note.enseignant),
+    }
+
+
+def _changement_json(changement):
+    """Etat de la note apres l'ecriture ; pierre tombale reduite aux ids."""
+    element = {"seq": changement.seq, "op": changement.operation, "id": changement.note_id}
+    if changement.operation != SUPPRESSION:
+        element.update(
+            etudiant_id=changement.etudiant_id,
+            matiere_id=changement.matiere_id,
+            enseignant_id=changement.enseignant_id,
+            annee=changement.annee,
+            valeur=changement.valeur,
+            absence=bool(changement.absence),
+            appreciation=changement.appreciation,
+        )
+    return element
+
+
+def _demande_json(demande):
+    return {
+        "id": demande.id,
+        "objet": demande.objet,
+        "message": demande.message,
+        "statut": demande.statut,
+        "date_ajout": demande.date_ajout,
+    }
+
+
+def _etudiant_json(etudiant):
+    classe = etudiant.classe
+    return {
+        "id": etudiant.id,
+        "username": etudiant.username,
+        "nom": etudiant.nom,
+        "prenom": etudiant.prenom,
+        "matricule": etudiant.matricule,
+        "classe": classe.nom if classe else None,
+        "filiere_id": classe.filiere_id if classe else None,
+    }
+
+
+def _notes_query():
+    return Note.query.options(
+        joinedload(Note.matiere), joinedload(Note.etudiant), joinedload(Note.enseignant)
+    )
+
+
+# ----------------------------
+# Etudiant
+# ----------------------------
+@api_bp.route("/etudiant")
+@login_required
+def etudiant():
+    """
+    Tout ce qu'affichent le dashboard, les resultats et le bulletin en un appel :
+    identite, cartes, resultat_final, classement et notes de l'annee en cours.
+    """
+    _require_etudiant()
+    champs = _champs(CHAMPS_ETUDIANT)
+    sections = {
+        "etudiant": lambda: _etudiant_json(current_user),
+        "annee": annee_courante,
+        "cartes": lambda: cartes_etudiant(current_user.id),
+        "resultat": lambda: resultat_etudiant(current_user.id),
+        "classement": lambda: classement_etudiant(current_user),
+    }
+    # Notes lues d'abord (une requete) : noms des enseignants hors student_results
+    notes = None
+    if "notes" in champs:
+        notes = [
+            _note_json(n) for n in _notes_query().filter(
+                Note.etudiant_id == current_user.id, Note.annee == annee_courante()
+            ).order_by(Note.id)
+        ]
+        sections["notes"] = lambda: notes
+    # Seules les sections demandees sont calculees, et pas du tout si 304
+    return _reponse_validee(
+        _validateur(champs, notes),
+        lambda: {champ: sections[champ]() for champ in champs}
+    )
+
+
+@api_bp.route("/etudiant/resultats")
+@login_required
+def etudiant_resultats():
+    _require_etudiant()
+    return _reponse_validee(_validateur(), lambda: {
+        "annee": annee_courante(),
+        "resultat": resultat_etudiant(current_user.id),
+        "classement": classement_etudiant(current_user),
+    })
+
+
+@api_bp.route("/etudiant/notes")
+@login_required
+def etudiant_notes():
+    _require_etudiant()
+    query = _notes_query().filter(
+        Note.etudiant_id == current_user.id,
+        Note.annee == request.args.get("annee", annee_courante())
+    ).order_by(Note.id)
+    return _reponse(_paginer(query, _note_json, _champs(CHAMPS_NOTE)))
+
+
+@api_bp.route("/etudiant/demandes")
+@login_required
+def etudiant_demandes():
+    _require_etudiant()
+    query = Demande.query.filter_by(etudiant_id=current_user.id).order_by(
+        Demande.date_ajout.desc(), Demande.id.desc()
+    )
+    return _reponse(_paginer(query, _demande_json, _champs(CHAMPS_DEMANDE)))
+
+
+# ----------------------------
+# Enseignant
+# ----------------------------
+@api_bp.route("/enseignant/notes")
+@login_required
+def enseignant_notes():
+    """Notes saisies par l'enseignant (filtres etudiant_id, matiere_id, annee)."""
+    _require_enseignant()
+    query = _notes_query().filter(
+        Note.enseignant_id == current_user.id,
+        Note.annee == request.args.get("annee", annee_courante())
+    )
+    for filtre in ("etudiant_id", "matiere_id"):
+        valeur = request.args.get(filtre, type=int)
+        if valeur is not None:
+            query = query.filter(getattr(Note, filtre) == valeur)
+    query = query.order_by(Note.id)
+    return _reponse(_paginer(query, _note_json, _champs(CHAMPS_NOTE)))
+
+
+@api_bp.route("/enseignant/etudiants/<int:etudiant_id>")
+@login_required
+def enseignant_etudiant(etudiant_id):
+    """Identite et resultat_final d'un etudiant."""
+    _require_enseignant()
+    etudiant = (
+        User.query.options(joinedload(User.classe))
+        .filter_by(id=etudiant_id, role="ETUDIANT")
+        .first_or_404()
+    )
+    return _reponse({
+        "etudiant": _etudiant_json(etudiant),
+        "annee": annee_courante(),
+        "resultat": resultat_etudiant(etudiant.id),
+    })
+
+
+@api_bp.route("/enseignant/classes/<int:classe_id>/carnet")
+@login_required
+def enseignant_carnet(classe_id):
+    """Carnet de notes d'une classe pour les matieres de l'enseignant (?annee=)."""
+    _require_enseignant()
+    classe = Classe.query.get_or_404(classe_id)
+    if classe not in current_user.classes:
+        abort(403)
+    return _reponse(carnet_classe(classe, current_user.matieres, request.args.get("annee")))
+
+
+# ----------------------------
+# Flux des changements de notes
+# ----------------------------
+@api_bp.route("/changes")
+@login_required
+def changes():
+    """
+    Changements de notes depuis un curseur (?since=, 0 = depuis le debut,
+    ?limite=). Admin : tout ; enseignant : ses notes ; etudiant : les siennes.
+    Rappeler avec since=suivant tant que fini est faux.
+    Seules les ecritures de notes y figurent : un changement de coefficient
+    ou de credits d'une matiere (qui change les moyennes) n'y apparait pas.
+    """
+    depuis = request.args.get("since", 0, type=int)
+    limite = request.args.get("limite", LOT_CHANGEMENTS, type=int)
+    if depuis < 0 or limite < 1:
+        abort(400, "since doit etre positif et limite au moins 1")
+
+    filtres = {}
+    if current_user.role == "ETUDIANT":
+        filtres["etudiant_id"] = current_user.id
+    elif current_user.role == "ENSEIGNANT":
+        filtres["enseignant_id"] = current_user.id
+    elif current_user.role != "ADMIN":
+        abort(403)
+
+    changements, suivant, fini = lire_changements(
+        depuis, min(limite, LOT_CHANGEMENTS_MAX), **filtres
+    )
+    return _reponse({
+        "changements": [_changement_json(c) for c in changements],
+        "suivant": suivant,
+        "fini": fini,
+    })
@@ -1,6 +1,7 @@
 """Auth routes: login/logout and session loading."""
 from flask import request, redirect, url_for, render_template, flash
 from flask_login import login_user, logout_user, login_required
+from sqlalchemy.orm import joinedload
 from werkzeug.security import check_password_hash
 
 from app.extensions import login_manager
@@ -11,7 +12,8 @@ from . import auth_bp
 @login_manager.user_loader
 def load_user(user_id):
     """Flask-Login callback to load a user from the session."""
-    return User.query.get(int(user_id))
+    # Classe chargee dans la meme requete (classement du dashboard etudiant)
+    return User.query.options(joinedload(User.classe)).get(int(user_id))
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
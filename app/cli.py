@@ -0,0 +1,162 @@
+"""Commandes Flask de maintenance (flask resultats / statistiques ...)."""
+import json
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.models.user import User
+from app.utils import statistiques
+from app.utils.annees import annees_connues, cloturer_annee
+from app.utils import cache_pdf, jobs
+from app.utils.bulletins_lot import (
+    preparer_bulletins,
+    rendre_en_parallele,
+    resume_mesure,
+    zip_en_flux,
+)
+from app.utils.calculs_sql import resultat_final_sql
+from app.utils.resultats import resultat_python
+from app.utils.resultats_materialises import reconstruire
+from app.utils.simulation import simuler
+
+resultats_cli = AppGroup("resultats", help="Outils autour du calcul des resultats.")
+statistiques_cli = AppGroup("statistiques", help="Statistiques des notes par matiere.")
+annees_cli = AppGroup("annees", help="Cloture des annees academiques.")
+bulletins_cli = AppGroup("bulletins", help="Bulletins PDF en lot.")
+jobs_cli = AppGroup("jobs", help="File des taches de fond.")
+
+
+@resultats_cli.command("verifier")
+@click.option("--sans-coefficients", is_flag=True, help="Compare sans coefficients.")
+def verifier(sans_coefficients):
+    """Verifie que les moteurs Python et SQL donnent le meme resultat."""
+    use_coefficients = not sans_coefficients
+    ecarts = 0
+    total = 0
+
+    for (etudiant_id,) in User.query.with_entities(User.id).filter_by(role="ETUDIANT"):
+        total += 1
+        attendu = resultat_python(etudiant_id, use_coefficients=use_coefficients)
+        obtenu = resultat_final_sql(etudiant_id, use_coefficients=use_coefficients)
+        if attendu != obtenu:
+            ecarts += 1
+            click.echo(f"Ecart pour l'etudiant {etudiant_id}")
+            click.echo(f"  python: {attendu}")
+            click.echo(f"  sql   : {obtenu}")
+
+    click.echo(f"{total} etudiant(s) compare(s), {ecarts} ecart(s).")
+    if ecarts:
+        raise SystemExit(1)
+
+
+@resultats_cli.command("reconstruire")
+@click.option("--taille-lot", default=500, show_default=True, help="Etudiants par lot.")
+def reconstruire_table(taille_lot):
+    """Reconstruit la table student_results depuis les notes."""
+    total = 0
+    for total in reconstruire(taille_lot=taille_lot):
+        click.echo(f"{total} etudiant(s) recalcule(s)...")
+    click.echo(f"Termine : {total} etudiant(s) dans student_results.")
+
+
+@resultats_cli.command("simuler")
+@click.argument("fichier_variantes", type=click.File("r"))
+@click.option("--processus", type=int, default=None, help="Taille du pool de processus.")
+@click.option("--sortie", type=click.File("w"), default=None, help="Rapport JSON complet.")
+def simuler_deliberation(fichier_variantes, processus, sortie):
+    """
+    Evalue des regles alternatives (fichier JSON : liste de variantes)
+    sur tous les etudiants, sans rien ecrire en base.
+    """
+    rapport = simuler(json.load(fichier_variantes), processus=processus)
+
+    def _ligne(synthese):
+        decisions = synthese["decisions"]
+        return (
+            f'{synthese["nom"]}: ADMIS={decisions["ADMIS"]} '
+            f'AJOURNE={decisions["AJOURNE"]} REDOUBLE={decisions["REDOUBLE"]}'
+        )
+
+    click.echo(f'{rapport["etudiants"]} etudiant(s) evalue(s).')
+    click.echo(_ligne(rapport["reference"]))
+    for synthese in rapport["variantes"]:
+        click.echo(f'{_ligne(synthese)} ({len(synthese["changements"])} changement(s))')
+
+    if sortie:
+        json.dump(rapport, sortie, ensure_ascii=False, indent=2)
+
+
+@statistiques_cli.command("reconstruire")
+@click.option("--taille-lot", default=5000, show_default=True, help="Lignes lues par lot.")
+def reconstruire_statistiques(taille_lot):
+    """Recalcule les statistiques en un parcours de la table notes."""
+    lignes = statistiques.reconstruire(taille_lot=taille_lot)
+    click.echo(f"{lignes} note(s) parcourue(s).")
+
+
+@annees_cli.command("cloturer")
+@click.argument("annee")
+def cloturer(annee):
+    """Fige les resultats de l'annee (bilans immuables)."""
+    crees = cloturer_annee(annee)
+    click.echo(f"{crees} bilan(s) cree(s) pour {annee}.")
+
+
+@annees_cli.command("lister")
+def lister():
+    """Annees connues, avec notes et bilans figes."""
+    for ligne in annees_connues():
+        click.echo(f'{ligne["annee"]}: {ligne["notes"]} note(s), {ligne["bilans"]} bilan(s)')
+
+
+@bulletins_cli.command("generer")
+@click.option("--classe", "classe_id", type=int, default=None, help="Id de la classe.")
+@click.option("--filiere", "filiere_id", type=int, default=None, help="Id de la filiere.")
+@click.option("--processus", type=int, default=None, help="Taille du pool de processus.")
+@click.argument("sortie", type=click.File("wb"))
+def generer_bulletins(classe_id, filiere_id, processus, sortie):
+    """Ecrit les bulletins d'une classe ou filiere dans une archive ZIP."""
+    if (classe_id is None) == (filiere_id is None):
+        raise click.UsageError("Indiquer --classe ou --filiere.")
+    bulletins = preparer_bulletins(classe_id=classe_id, filiere_id=filiere_id)
+    mesures = {}
+    for morceau in zip_en_flux(rendre_en_parallele(bulletins, processus, mesures)):
+        sortie.write(morceau)
+    for pid, mesure in sorted(mesures.items()):
+        click.echo(resume_mesure(pid, mesure))
+    click.echo(f"{len(bulletins)} bulletin(s) ecrit(s).")
+
+
+@bulletins_cli.command("purger")
+@click.option("--tout", is_flag=True, help="Vide le cache au lieu d'appliquer la taille max.")
+def purger_bulletins(tout):
+    """Nettoie le cache disque des bulletins PDF."""
+    supprimes = cache_pdf.purger() if tout else cache_pdf.evincer()
+    etat = cache_pdf.etat_cache()
+    click.echo(
+        f'{supprimes} PDF supprime(s), {etat["fichiers"]} restant(s) '
+        f'({etat["octets"] / 1024 / 1024:.1f} Mo).'
+    )
+
+
+@click.command("worker")
+@click.option("--concurrence", type=int, default=None,
+              help="Taches executees en parallele (defaut JOBS_CONCURRENCE).")
+@click.option("--une-fois", is_flag=True, help="S'arrete quand la file est vide.")
+@click.option("--attente", type=float, default=1.0, show_default=True,
+              help="Secondes entre deux lectures de la file vide.")
+def worker(concurrence, une_fois, attente):
+    """Execute les taches de fond en file (table jobs)."""
+    app = current_app._get_current_object()
+    click.echo(f"Worker demarre ({', '.join(jobs.types_taches())}).")
+    jobs.lancer_worker(app, concurrence=concurrence, une_fois=une_fois, attente=attente)
+
+
+@jobs_cli.command("purger")
+@click.option("--jours", type=int, default=7, show_default=True,
+              help="Age minimal des taches terminees a supprimer.")
+def purger_jobs(jours):
+    """Supprime les taches terminees anciennes et leurs fichiers."""
+    supprimes = jobs.purger_jobs(jours)
+    click.echo(f"{supprimes} tache(s) supprimee(s).")
@@ -28,6 +28,30 @@ class Config:
     USE_COEFFICIENTS = os.environ.get("USE_COEFFICIENTS", "true").lower() == "true"
     DEFAULT_ANNEE = os.environ.get("DEFAULT_ANNEE", _default_academic_year())
 
+    # Moteur de calcul des resultats etudiant : "python", "sql" ou "table"
+    # ("table" lit student_results, tenue a jour a chaque ecriture)
+    RESULTATS_ENGINE = os.environ.get("RESULTATS_ENGINE", "python").lower()
+    # Nombre de resultats gardes en memoire par processus (0 = desactive)
+    RESULTATS_CACHE_TAILLE = int(os.environ.get("RESULTATS_CACHE_TAILLE", "1024"))
+    # Carnets de notes (classe x matieres) gardes en memoire (0 = desactive)
+    CARNETS_CACHE_TAILLE = int(os.environ.get("CARNETS_CACHE_TAILLE", "64"))
+    # Processus pour les bulletins en lot (0 = un par coeur)
+    BULLETINS_PROCESSUS = int(os.environ.get("BULLETINS_PROCESSUS", "0"))
+    # Bulletins PDF deja rendus (cle = empreinte des donnees), taille max en Mo
+    BULLETINS_CACHE_DIR = os.environ.get(
+        "BULLETINS_CACHE_DIR",
+        os.path.join(BASE_DIR, "instance", "bulletins")
+    )
+    BULLETINS_CACHE_MO = int(os.environ.get("BULLETINS_CACHE_MO", "200"))
+
+    # Taches de fond (flask worker) : fichiers produits et nombre de taches en parallele
+    JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(BASE_DIR, "instance", "jobs"))
+    JOBS_CONCURRENCE = int(os.environ.get("JOBS_CONCURRENCE", "2"))
+    # Bail d'une tache en cours (secondes) : sans signe de vie du worker, reprise
+    JOBS_BAIL = float(os.environ.get("JOBS_BAIL", "60"))
+    # Import de notes (CSV/XLSX) : notes ecrites par commit
+    NOTES_IMPORT_LOT = int(os.environ.get("NOTES_IMPORT_LOT", "1000"))
+
     # Admin par defaut (peut etre surcharge en environnement)
     DEFAULT_ADMIN_LOGIN = os.environ.get("ADMIN_LOGIN", "admin")
     DEFAULT_ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "admin123")
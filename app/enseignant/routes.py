@@ -1,11 +1,32 @@
 """Routes enseignant: dashboard, notes par etudiant, CRUD notes."""
-from flask import render_template, request, redirect, url_for, flash, abort
+import os
+
+from flask import render_template, request, redirect, url_for, flash, abort, jsonify
 from flask_login import login_required, current_user
+from markupsafe import Markup
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.utils import secure_filename
 
 from app.extensions import db
+from app.models.classe import Classe
 from app.models.matiere import Matiere
-from app.models.note import Note
+from app.models.note import Note, annee_courante
 from app.models.user import User
+from app.utils.cache_resultats import memoiser_carnet
+from app.utils.carnet_notes import carnet_classe
+from app.utils.import_notes import COLONNES, FORMATS
+from app.utils.jobs import enfiler, fichier_entree
+from app.utils.saisie_notes import (
+    MESSAGE_CONFLIT,
+    MESSAGE_DOUBLON,
+    ajouter_note,
+    enregistrer_lot,
+    etudiants_enseignant,
+    notes_classe,
+    valider_note,
+)
+from app.utils.statistiques import statistiques_enseignant
 from . import enseignant_bp
 
 
@@ -20,45 +41,46 @@ def _get_etudiant(etudiant_id: int) -> User:
     return User.query.filter_by(id=etudiant_id, role="ETUDIANT").first_or_404()
 
 
+def _note_modifiable(etudiant_id: int, note_id: int) -> Note:
+    """Note de l'annee en cours de cet enseignant pour l'etudiant, ou 404."""
+    return Note.query.filter_by(
+        id=note_id,
+        etudiant_id=etudiant_id,
+        enseignant_id=current_user.id,
+        annee=annee_courante()
+    ).first_or_404()
+
+
 @enseignant_bp.route("/dashboard")
 @login_required
 def dashboard():
     _require_enseignant()
 
-    # Stats filtrees par enseignant
-    total_notes = Note.query.filter_by(enseignant_id=current_user.id).count()
-    total_absences = Note.query.filter_by(
-        enseignant_id=current_user.id,
-        absence=True
-    ).count()
-    total_appreciations = Note.query.filter(
-        Note.enseignant_id == current_user.id,
-        Note.appreciation.isnot(None)
-    ).count()
-
-    etudiants_count = (
-        db.session.query(Note.etudiant_id)
-        .filter(Note.enseignant_id == current_user.id)
-        .distinct()
-        .count()
+    # Stats filtrees par enseignant (une requete, en cache)
+    stats = dict(
+        statistiques_enseignant(current_user.id),
+        matieres=len(current_user.matieres)
     )
 
-    # Donnees pour cartes du dashboard
-    stats = {
-        "etudiants": etudiants_count,
-        "matieres": len(current_user.matieres),
-        "notes": total_notes,
-        "absences": total_absences,
-        "appreciations": total_appreciations
-    }
-
-    # Liste des etudiants pour selection
-    etudiants = User.query.filter_by(role="ETUDIANT").all()
+    # Choix d'un etudiant : une page filtree (?q=, ?classe_id=, ?apres=)
+    try:
+        etudiants, suivant = etudiants_enseignant(
+            current_user,
+            recherche=request.args.get("q"),
+            classe_id=request.args.get("classe_id", type=int),
+            apres=request.args.get("apres")
+        )
+    except ValueError:
+        abort(400)
+    # Saisie groupee : une classe et une matiere de l'enseignant
+    classes = current_user.classes
 
     return render_template(
         "enseignant/dashboard.html",
         stats=stats,
-        etudiants=etudiants
+        etudiants=etudiants,
+        suivant=suivant,
+        classes=classes
     )
 
 
@@ -87,17 +109,8 @@ def add_note_etudiant(etudiant_id):
     _require_enseignant()
 
     etudiant = _get_etudiant(etudiant_id)
-    # Matieres deja notees par cet enseignant pour cet etudiant
-    notes_etudiant = Note.query.filter_by(
-        etudiant_id=etudiant.id,
-        enseignant_id=current_user.id
-    ).all()
-    matieres_deja_notees = {n.matiere_id for n in notes_etudiant}
     # Matieres attribuees a l'enseignant
     matieres_assignees = list(current_user.matieres)
-    matieres_disponibles = [
-        m for m in matieres_assignees if m.id not in matieres_deja_notees
-    ]
 
     if request.method == "POST":
         # Champs du formulaire
@@ -106,7 +119,7 @@ def add_note_etudiant(etudiant_id):
         absence = request.form.get("absence") == "on"
         appreciation = request.form.get("appreciation")
 
-        # Bloquer double note pour la meme matiere
+        # Matiere choisie : entier, attribuee a l'enseignant
         try:
             matiere_id_int = int(matiere_id)
         except (TypeError, ValueError):
@@ -117,46 +130,36 @@ def add_note_etudiant(etudiant_id):
             flash("Matiere non attribuee a cet enseignant")
             return redirect(url_for("enseignant.add_note_etudiant", etudiant_id=etudiant.id))
 
-        # Interdire une deuxieme note pour la meme matiere
-        existing = Note.query.filter_by(
-            etudiant_id=etudiant.id,
-            matiere_id=matiere_id_int
-        ).first()
-        if existing:
-            flash("Une note existe deja pour cette matiere")
-            return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
-
-        if (valeur is None or valeur == "") and not absence:
-            flash("La note est obligatoire si l'etudiant est present")
-            return redirect(url_for("enseignant.add_note_etudiant", etudiant_id=etudiant.id))
-
         # Validation note (0-20). Si absence cochee et valeur vide -> 0.
-        if (valeur is None or valeur == "") and absence:
-            valeur = 0
-
-        try:
-            valeur = float(valeur)
-            if valeur < 0 or valeur > 20:
-                raise ValueError
-        except ValueError:
-            flash("La note doit etre comprise entre 0 et 20")
+        valeur, erreur = valider_note(valeur, absence)
+        if erreur:
+            flash(erreur)
             return redirect(url_for("enseignant.add_note_etudiant", etudiant_id=etudiant.id))
 
-        note = Note(
-            valeur=valeur,
-            absence=absence,
-            appreciation=appreciation,
-            etudiant_id=etudiant.id,
-            matiere_id=matiere_id_int,
-            enseignant_id=current_user.id
+        # Une seule requete : l'index unique refuse une deuxieme note
+        erreur = ajouter_note(
+            etudiant.id, matiere_id_int, current_user.id, valeur, absence, appreciation
         )
-
-        db.session.add(note)
+        if erreur:
+            db.session.rollback()
+            flash(erreur)
+            return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
         db.session.commit()
 
         flash("Note enregistree")
         return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
 
+    # Formulaire : matieres pas encore notees par l'enseignant
+    matieres_deja_notees = {
+        n.matiere_id for n in Note.query.filter_by(
+            etudiant_id=etudiant.id,
+            enseignant_id=current_user.id,
+            annee=annee_courante()
+        )
+    }
+    matieres_disponibles = [
+        m for m in matieres_assignees if m.id not in matieres_deja_notees
+    ]
     return render_template(
         "enseignant/add_note.html",
         etudiant=etudiant,
@@ -182,18 +185,169 @@ def add_note_redirect():
     return redirect(url_for("enseignant.dashboard"))
 
 
+@enseignant_bp.route("/saisie")
+@login_required
+def saisie_redirect():
+    _require_enseignant()
+    # Selection classe + matiere depuis le dashboard
+    classe_id = request.args.get("classe_id", type=int)
+    matiere_id = request.args.get("matiere_id", type=int)
+    if classe_id is None or matiere_id is None:
+        flash("Veuillez choisir une classe et une matiere")
+        return redirect(url_for("enseignant.dashboard"))
+    return redirect(url_for("enseignant.saisie_classe", classe_id=classe_id, matiere_id=matiere_id))
+
+
+@enseignant_bp.route("/carnet")
+@login_required
+def carnet_redirect():
+    _require_enseignant()
+    # Selection de la classe depuis le dashboard
+    classe_id = request.args.get("classe_id", type=int)
+    if classe_id is None:
+        flash("Veuillez choisir une classe")
+        return redirect(url_for("enseignant.dashboard"))
+    return redirect(url_for("enseignant.carnet", classe_id=classe_id))
+
+
+@enseignant_bp.route("/classes/<int:classe_id>/carnet")
+@login_required
+def carnet(classe_id):
+    """Carnet de notes (lecture) : etudiants de la classe x matieres de l'enseignant."""
+    _require_enseignant()
+
+    classe = Classe.query.get_or_404(classe_id)
+    if classe not in current_user.classes:
+        abort(403)
+    donnees = carnet_classe(classe, current_user.matieres, request.args.get("annee"))
+    # Tableau (500 x 9 cellules) rendu une fois par version du carnet
+    cle = (
+        "html", donnees["classe"]["nom"],
+        tuple((m["id"], m["nom"]) for m in donnees["matieres"]), donnees["annee"]
+    )
+    # Lien vers les notes d'un etudiant : construit une fois, pas par ligne
+    lien_notes = url_for("enseignant.notes_etudiant", etudiant_id=0).replace("/0/", "/%d/")
+    tableau = memoiser_carnet(classe.id, cle, lambda: Markup(render_template(
+        "enseignant/carnet_tableau.html", carnet=donnees, lien_notes=lien_notes
+    )))
+    return render_template("enseignant/carnet.html", carnet=donnees, tableau=tableau)
+
+
+@enseignant_bp.route("/classes/<int:classe_id>/matieres/<int:matiere_id>/notes", methods=["GET", "POST"])
+@login_required
+def saisie_classe(classe_id, matiere_id):
+    _require_enseignant()
+
+    classe = Classe.query.get_or_404(classe_id)
+    matiere = Matiere.query.get_or_404(matiere_id)
+    if matiere.id not in {m.id for m in current_user.matieres}:
+        if request.is_json:
+            abort(403)
+        flash("Matiere non attribuee a cet enseignant")
+        return redirect(url_for("enseignant.dashboard"))
+    if classe not in current_user.classes:
+        if request.is_json:
+            abort(403)
+        flash("Classe non attribuee a cet enseignant")
+        return redirect(url_for("enseignant.dashboard"))
+
+    # Etudiants de la classe et notes deja saisies : une seule requete
+    existantes = notes_classe(classe.id, matiere.id)
+    saisies = {}
+    erreurs = {}
+
+    if request.method == "POST":
+        if request.is_json:
+            # {"notes": [{"etudiant_id", "valeur", "absence", "appreciation", "version"}, ...]}
+            lignes = (request.get_json(silent=True) or {}).get("notes")
+            if not isinstance(lignes, list) or not all(isinstance(l, dict) for l in lignes):
+                return jsonify({"erreur": "Format attendu: {\"notes\": [...]}"}), 400
+        else:
+            lignes = [
+                {
+                    "etudiant_id": etudiant.id,
+                    "valeur": request.form.get(f"valeur_{etudiant.id}"),
+                    "absence": request.form.get(f"absence_{etudiant.id}") == "on",
+                    "appreciation": request.form.get(f"appreciation_{etudiant.id}"),
+                    "version": request.form.get(f"version_{etudiant.id}", type=int),
+                }
+                for etudiant in existantes
+            ]
+
+        inserees, modifiees, liste_erreurs = enregistrer_lot(
+            current_user.id, matiere.id, existantes, lignes
+        )
+        if request.is_json:
+            return jsonify({
+                "inserees": inserees, "modifiees": modifiees, "erreurs": liste_erreurs
+            }), 422 if liste_erreurs else 200
+
+        if not liste_erreurs:
+            flash(f"{inserees} note(s) ajoutee(s), {modifiees} note(s) modifiee(s)")
+            return redirect(url_for(
+                "enseignant.saisie_classe", classe_id=classe.id, matiere_id=matiere.id
+            ))
+
+        # Rien n'est enregistre : on reaffiche la saisie avec les erreurs par ligne
+        flash(f"{len(liste_erreurs)} ligne(s) en erreur, aucune note enregistree")
+        saisies = {ligne["etudiant_id"]: ligne for ligne in lignes}
+        erreurs = {e["etudiant_id"]: e["erreur"] for e in liste_erreurs}
+
+    return render_template(
+        "enseignant/saisie_classe.html",
+        classe=classe,
+        matiere=matiere,
+        existantes=existantes,
+        saisies=saisies,
+        erreurs=erreurs
+    )
+
+
+@enseignant_bp.route("/import", methods=["GET", "POST"])
+@login_required
+def import_notes():
+    _require_enseignant()
+
+    if request.method == "POST":
+        fichier = request.files.get("fichier")
+        if not fichier or not fichier.filename:
+            flash("Veuillez choisir un fichier")
+            return redirect(url_for("enseignant.import_notes"))
+
+        nom = secure_filename(fichier.filename) or "import"
+        extension = os.path.splitext(nom)[1].lower().lstrip(".")
+        if extension not in FORMATS:
+            flash("Formats acceptes : CSV ou XLSX")
+            return redirect(url_for("enseignant.import_notes"))
+
+        # Le fichier est traite par `flask worker` : suivi et rapport de rejets
+        # sur la page de la tache
+        chemin = fichier_entree(nom)
+        fichier.save(chemin)
+        job = enfiler("import_notes", {
+            "fichier": chemin,
+            "format_fichier": extension,
+            "enseignant_id": current_user.id,
+            "nom": nom,
+        }, demandeur_id=current_user.id)
+        flash("Import en file d'attente")
+        return redirect(url_for("jobs.detail", job_id=job.id))
+
+    return render_template(
+        "enseignant/import_notes.html",
+        colonnes=COLONNES,
+        matieres=current_user.matieres
+    )
+
+
 @enseignant_bp.route("/etudiants/<int:etudiant_id>/notes/<int:note_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_note_etudiant(etudiant_id, note_id):
     _require_enseignant()
 
     etudiant = _get_etudiant(etudiant_id)
-    # Note appartenant a cet enseignant uniquement
-    note = Note.query.filter_by(
-        id=note_id,
-        etudiant_id=etudiant.id,
-        enseignant_id=current_user.id
-    ).first_or_404()
+    # Note de l'annee en cours appartenant a cet enseignant uniquement
+    note = _note_modifiable(etudiant.id, note_id)
     # Matieres attribuees a l'enseignant (select)
     matieres = list(current_user.matieres)
 
@@ -204,11 +358,13 @@ def edit_note_etudiant(etudiant_id, note_id):
         absence = request.form.get("absence") == "on"
         appreciation = request.form.get("appreciation")
 
-        if (valeur is None or valeur == "") and not absence:
-            flash("La note est obligatoire si l'etudiant est present")
+        # Validation note (0-20). Si absence cochee et valeur vide -> 0.
+        valeur, erreur = valider_note(valeur, absence)
+        if erreur:
+            flash(erreur)
             return redirect(url_for("enseignant.edit_note_etudiant", etudiant_id=etudiant.id, note_id=note.id))
 
-        # Bloquer double note pour la meme matiere
+        # Matiere choisie : entier, attribuee a l'enseignant
         try:
             matiere_id_int = int(matiere_id)
         except (TypeError, ValueError):
@@ -219,32 +375,34 @@ def edit_note_etudiant(etudiant_id, note_id):
             flash("Matiere non attribuee a cet enseignant")
             return redirect(url_for("enseignant.edit_note_etudiant", etudiant_id=etudiant.id, note_id=note.id))
 
-        # Interdire une autre note pour la meme matiere
-        existing = Note.query.filter_by(
-            etudiant_id=etudiant.id,
-            matiere_id=matiere_id_int
-        ).first()
-        if existing and existing.id != note.id:
-            flash("Une note existe deja pour cette matiere")
-            return redirect(url_for("enseignant.edit_note_etudiant", etudiant_id=etudiant.id, note_id=note.id))
-
-        if (valeur is None or valeur == "") and absence:
-            valeur = 0
-
-        try:
-            valeur = float(valeur)
-            if valeur < 0 or valeur > 20:
-                raise ValueError
-        except ValueError:
-            flash("La note doit etre comprise entre 0 et 20")
-            return redirect(url_for("enseignant.edit_note_etudiant", etudiant_id=etudiant.id, note_id=note.id))
+        # Verrou optimiste : le formulaire porte la version lue a l'affichage
+        saisie = {
+            "matiere_id": matiere_id_int,
+            "valeur": valeur,
+            "absence": absence,
+            "appreciation": appreciation,
+        }
+        if request.form.get("version", type=int) != note.version:
+            return _conflit_note(etudiant, note, matieres, saisie)
 
         note.matiere_id = matiere_id_int
         note.valeur = valeur
         note.absence = absence
         note.appreciation = appreciation
 
-        db.session.commit()
+        # Changement de matiere deja notee : refuse par l'index unique.
+        # Ecriture concurrente depuis la lecture : UPDATE sans ligne (version).
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash(MESSAGE_DOUBLON)
+            return redirect(url_for("enseignant.edit_note_etudiant", etudiant_id=etudiant.id, note_id=note_id))
+        except StaleDataError:
+            db.session.rollback()
+            return _conflit_note(
+                etudiant, _note_modifiable(etudiant_id, note_id), matieres, saisie
+            )
         flash("Note modifiee")
         return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
 
@@ -256,6 +414,18 @@ def edit_note_etudiant(etudiant_id, note_id):
     )
 
 
+def _conflit_note(etudiant, note, matieres, saisie):
+    """Formulaire recharge avec la note actuelle et la saisie refusee (409)."""
+    flash(MESSAGE_CONFLIT, "error")
+    return render_template(
+        "enseignant/edit_note.html",
+        etudiant=etudiant,
+        note=note,
+        matieres=matieres,
+        saisie=saisie
+    ), 409
+
+
 @enseignant_bp.route("/etudiants/<int:etudiant_id>/notes/<int:note_id>/delete")
 @login_required
 def delete_note_etudiant(etudiant_id, note_id):
@@ -263,13 +433,15 @@ def delete_note_etudiant(etudiant_id, note_id):
 
     etudiant = _get_etudiant(etudiant_id)
     # Supprimer uniquement ses propres notes
-    note = Note.query.filter_by(
-        id=note_id,
-        etudiant_id=etudiant.id,
-        enseignant_id=current_user.id
-    ).first_or_404()
+    note = _note_modifiable(etudiant.id, note_id)
 
     db.session.delete(note)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError:
+        # Modifiee entre la lecture et le DELETE : rien n'est supprime
+        db.session.rollback()
+        flash(MESSAGE_CONFLIT, "error")
+        return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
     flash("Note supprimee")
     return redirect(url_for("enseignant.notes_etudiant", etudiant_id=etudiant.id))
@@ -1,22 +1,71 @@
 """Routes etudiant: dashboard, resultats, bulletin, demandes."""
-from datetime import datetime
-from io import BytesIO
-
-from flask import render_template, abort, current_app, send_file, request, redirect, url_for, flash
+import hashlib
+import io
+from datetime import date, datetime
+
+from flask import (
+    render_template, abort, send_file, request, redirect, url_for, flash, make_response,
+    session
+)
 from flask_login import login_required, current_user
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from werkzeug.http import is_resource_modified
 
 from app.extensions import db
 from app.models.demande import Demande
-from app.models.note import Note
-from app.utils.calculs import resultat_final
+from app.models.note import annee_courante
+from app.utils.annees import parcours_etudiant, resultat_annee
+from app.utils.bulletin_pdf import donnees_bulletin
+from app.utils.cache_pdf import bulletin_en_cache, empreinte
+from app.utils.cache_resultats import cles_etudiant
+from app.utils.classement import classement_etudiant
+from app.utils.jobs import enfiler
+from app.utils.resultats import cartes_etudiant, resultat_etudiant, use_coefficients
+from app.utils.resultats_materialises import etat_resultats
 from . import etudiant_bp
 
+# A incrementer quand les gabarits resultats/bulletin changent (ETag)
+VERSION_PAGES = 1
+
+
+def _validateur(page, *extra):
+    """
+    ETag et date de derniere modification d'une page de resultats, lus
+    dans student_results sans rien calculer. None : page toujours rendue
+    (ligne absente ou perimee, message flash en attente).
+    """
+    if session.get("_flashes"):
+        return None
+    etat = etat_resultats(current_user, use_coefficients())
+    if etat is None:
+        return None
+    etat, derniere_maj = etat
+    classe = current_user.classe
+    identite = (
+        current_user.username, current_user.full_name, current_user.matricule,
+        current_user.profile_image, classe.nom if classe else None
+    )
+    contenu = repr((VERSION_PAGES, page, etat, identite, *extra))
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest(), derniere_maj
+
+
+def _non_modifiee(validateur):
+    """Reponse 304 si le navigateur a deja cette version, sinon None."""
+    if validateur is None:
+        return None
+    etag, derniere_maj = validateur
+    if is_resource_modified(request.environ, etag=etag, last_modified=derniere_maj):
+        return None
+    return _avec_validateur(make_response("", 304), validateur)
+
 
-def _use_coefficients() -> bool:
-    """Active ou non les coefficients dans les calculs."""
-    return current_app.config.get("USE_COEFFICIENTS", True)
+def _avec_validateur(reponse, validateur):
+    """ETag, Last-Modified et revalidation a chaque visite (page privee)."""
+    if validateur is not None:
+        etag, derniere_maj = validateur
+        reponse.set_etag(etag)
+        reponse.last_modified = derniere_maj
+        reponse.headers["Cache-Control"] = "private, no-cache"
+    return reponse
 
 
 @etudiant_bp.route("/dashboard")
@@ -25,29 +74,15 @@ def dashboard():
     if current_user.role != "ETUDIANT":
         abort(403)
 
-    # Toutes les notes de l'etudiant courant
-    notes = Note.query.filter_by(etudiant_id=current_user.id).all()
-    resultat = resultat_final(notes, use_coefficients=_use_coefficients())
-
-    # Compte des absences
-    total_absences = Note.query.filter_by(
-        etudiant_id=current_user.id,
-        absence=True
-    ).count()
-
-    # Cartes de stats
-    stats = {
-        "matieres": len(resultat["matieres"]),
-        "notes": len(notes),
-        "absences": total_absences,
-        "moyenne": resultat["moyenne_generale"],
-        "credits": resultat["credits_valides"],
-        "decision": resultat["decision"]
-    }
+    # Cles des cartes et des classements en une requete ; cartes de stats
+    # (une requete d'agregats, memorisee jusqu'a la prochaine note)
+    cle, versions = cles_etudiant(current_user, use_coefficients())
+    stats = cartes_etudiant(current_user.id, cle=cle)
 
     return render_template(
         "etudiant/dashboard.html",
-        stats=stats
+        stats=stats,
+        classement=classement_etudiant(current_user, versions)
     )
 
 
@@ -57,12 +92,50 @@ def resultats():
     if current_user.role != "ETUDIANT":
         abort(403)
 
+    # Rien de change depuis la derniere visite : 304 sans calcul ni rendu
+    validateur = _validateur("resultats")
+    reponse = _non_modifiee(validateur)
+    if reponse is not None:
+        return reponse
+
     # Resultats detailles par matiere
-    notes = Note.query.filter_by(etudiant_id=current_user.id).all()
-    resultat = resultat_final(notes, use_coefficients=_use_coefficients())
+    resultat = resultat_etudiant(current_user.id)
 
-    return render_template(
+    return _avec_validateur(make_response(render_template(
         "etudiant/resultats.html",
+        resultat=resultat,
+        classement=classement_etudiant(current_user),
+        annee=annee_courante()
+    )), validateur)
+
+
+@etudiant_bp.route("/parcours")
+@login_required
+def parcours():
+    if current_user.role != "ETUDIANT":
+        abort(403)
+
+    # Annees cloturees (bilans figes) + annee en cours
+    return render_template(
+        "etudiant/parcours.html",
+        parcours=parcours_etudiant(current_user)
+    )
+
+
+@etudiant_bp.route("/parcours/<annee>")
+@login_required
+def parcours_annee(annee):
+    if current_user.role != "ETUDIANT":
+        abort(403)
+
+    # Releve d'une annee, lu dans le bilan fige si elle est cloturee
+    resultat = resultat_annee(current_user.id, annee)
+    if resultat is None:
+        abort(404)
+
+    return render_template(
+        "etudiant/parcours_annee.html",
+        annee=annee,
         resultat=resultat
     )
 
@@ -73,15 +146,21 @@ def bulletin():
     if current_user.role != "ETUDIANT":
         abort(403)
 
+    # Le bulletin est date du jour : la date fait partie du validateur
+    validateur = _validateur("bulletin", date.today())
+    reponse = _non_modifiee(validateur)
+    if reponse is not None:
+        return reponse
+
     # Donnees a afficher dans le bulletin HTML
-    notes = Note.query.filter_by(etudiant_id=current_user.id).all()
-    resultat = resultat_final(notes, use_coefficients=_use_coefficients())
+    resultat = resultat_etudiant(current_user.id)
 
-    return render_template(
+    return _avec_validateur(make_response(render_template(
         "etudiant/bulletin.html",
         resultat=resultat,
+        classement=classement_etudiant(current_user),
         now=datetime.now()
-    )
+    )), validateur)
 
 
 @etudiant_bp.route("/bulletin/pdf")
@@ -91,76 +170,42 @@ def bulletin_pdf():
         abort(403)
 
     # Donnees a injecter dans le PDF
-    notes = Note.query.filter_by(etudiant_id=current_user.id).all()
-    resultat = resultat_final(notes, use_coefficients=_use_coefficients())
-
-    # Buffer en memoire pour generer le PDF
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # En-tete du bulletin
-    y = height - 50
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(40, y, "Bulletin de notes")
-    y -= 20
-
-    pdf.setFont("Helvetica", 10)
-    identite = current_user.full_name or current_user.username
-    pdf.drawString(40, y, f"Etudiant: {identite}")
-    y -= 15
-    pdf.drawString(40, y, f"Date: {datetime.now().strftime('%Y-%m-%d')}")
-    y -= 25
-
-    # Tableau des moyennes par matiere
-    pdf.setFont("Helvetica-Bold", 10)
-    pdf.drawString(40, y, "Matiere")
-    pdf.drawString(260, y, "Moyenne")
-    pdf.drawString(340, y, "Credits")
-    y -= 12
-    pdf.setFont("Helvetica", 10)
-
-    for item in resultat["matieres"]:
-        # Saut de page si on arrive en bas
-        if y < 60:
-            pdf.showPage()
-            y = height - 50
-            pdf.setFont("Helvetica-Bold", 10)
-            pdf.drawString(40, y, "Matiere")
-            pdf.drawString(260, y, "Moyenne")
-            pdf.drawString(340, y, "Credits")
-            y -= 12
-            pdf.setFont("Helvetica", 10)
-
-        pdf.drawString(40, y, str(item["matiere"]))
-        pdf.drawString(260, y, f'{item["moyenne"]:.2f}')
-        pdf.drawString(340, y, str(item["credits"]))
-        y -= 14
-
-    # Resume global
-    y -= 10
-    pdf.setFont("Helvetica-Bold", 10)
-    pdf.drawString(40, y, f'Moyenne generale: {resultat["moyenne_generale"]:.2f}')
-    y -= 14
-    pdf.drawString(40, y, f'Credits valides: {resultat["credits_valides"]}')
-    y -= 14
-    pdf.drawString(40, y, f'Decision: {resultat["decision"]}')
-    y -= 14
-    if resultat["mention"]:
-        pdf.drawString(40, y, f'Mention: {resultat["mention"]}')
-
-    pdf.showPage()
-    pdf.save()
-
-    buffer.seek(0)
+    donnees = donnees_bulletin(
+        current_user,
+        resultat_etudiant(current_user.id),
+        classement_etudiant(current_user)
+    )
+
+    # Meme donnees, meme PDF : 304 si le navigateur l'a deja
+    cle = empreinte(donnees)
+    if cle in request.if_none_match:
+        reponse = make_response("", 304)
+        reponse.set_etag(cle)
+        return reponse
+
+    # Sinon lu depuis le cache disque (rendu seulement s'il manque)
+    contenu, cle = bulletin_en_cache(donnees)
     return send_file(
-        buffer,
+        io.BytesIO(contenu),
         as_attachment=True,
         download_name="bulletin.pdf",
-        mimetype="application/pdf"
+        mimetype="application/pdf",
+        etag=cle,
+        conditional=True
     )
 
 
+@etudiant_bp.route("/bulletin/pdf/tache", methods=["POST"])
+@login_required
+def bulletin_pdf_tache():
+    if current_user.role != "ETUDIANT":
+        abort(403)
+
+    # PDF prepare par `flask worker`, a telecharger depuis la page de la tache
+    job = enfiler("bulletin_pdf", {"etudiant_id": current_user.id}, demandeur_id=current_user.id)
+    return redirect(url_for("jobs.detail", job_id=job.id))
+
+
 @etudiant_bp.route("/demandes", methods=["GET", "POST"])
 @login_required
 def demandes():
@@ -0,0 +1,93 @@
+"""Routes taches de fond: suivi, annulation, telechargement."""
+import os
+
+from flask import render_template, redirect, url_for, flash, abort, jsonify, send_file
+from flask_login import login_required, current_user
+
+from app.models.job import TERMINE, Job
+from app.utils import jobs as file_jobs
+from . import jobs_bp
+
+# Gabarit de base selon le role
+BASES = {
+    "ADMIN": "base/base_admin.html",
+    "ENSEIGNANT": "base/base_enseignant.html",
+    "ETUDIANT": "base/base_etudiant.html",
+}
+
+
+def _get_job(job_id: int) -> Job:
+    """Job visible par l'utilisateur courant (le sien, ou tous pour l'admin)."""
+    job = Job.query.get_or_404(job_id)
+    if current_user.role != "ADMIN" and job.demandeur_id != current_user.id:
+        abort(404)
+    return job
+
+
+@jobs_bp.route("/")
+@login_required
+def index():
+    query = Job.query
+    if current_user.role != "ADMIN":
+        query = query.filter_by(demandeur_id=current_user.id)
+    jobs = query.order_by(Job.id.desc()).limit(100).all()
+    return render_template("jobs/index.html", jobs=jobs, base=BASES[current_user.role])
+
+
+@jobs_bp.route("/<int:job_id>")
+@login_required
+def detail(job_id):
+    job = _get_job(job_id)
+    return render_template(
+        "jobs/detail.html", job=job, abandonne=file_jobs.abandonne(job),
+        base=BASES[current_user.role]
+    )
+
+
+@jobs_bp.route("/<int:job_id>/statut")
+@login_required
+def statut(job_id):
+    # Polling : etat courant en JSON
+    job = _get_job(job_id)
+    etat = file_jobs.etat_job(job)
+    etat["telechargement"] = (
+        url_for("jobs.telecharger", job_id=job.id) if etat["fichier_pret"] else None
+    )
+    return jsonify(etat)
+
+
+@jobs_bp.route("/<int:job_id>/telecharger")
+@login_required
+def telecharger(job_id):
+    job = _get_job(job_id)
+    if job.statut != TERMINE or not job.fichier or not os.path.exists(job.fichier):
+        abort(404)
+    return send_file(
+        job.fichier,
+        as_attachment=True,
+        download_name=job.nom_fichier,
+        mimetype=job.mimetype
+    )
+
+
+@jobs_bp.route("/<int:job_id>/annuler", methods=["POST"])
+@login_required
+def annuler(job_id):
+    job = _get_job(job_id)
+    if job.termine:
+        flash("Cette tache est deja terminee")
+    else:
+        file_jobs.annuler(job)
+        flash("Annulation demandee")
+    return redirect(url_for("jobs.detail", job_id=job.id))
+
+
+@jobs_bp.route("/<int:job_id>/relancer", methods=["POST"])
+@login_required
+def relancer(job_id):
+    job = _get_job(job_id)
+    if file_jobs.relancer(job):
+        flash("Tache remise en file")
+    else:
+        flash("Seule une tache echouee, annulee ou abandonnee peut etre relancee")
+    return redirect(url_for("jobs.detail", job_id=job.id))
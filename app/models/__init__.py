@@ -4,4 +4,10 @@ from .filiere import Filiere
 from .classe import Classe
 from .matiere import Matiere
 from .note import Note
+from .note_change import NoteChange
 from .demande import Demande
+from .resultat import StudentResult, StudentResultMatiere
+from .statistique import StatistiqueMatiere
+from .bilan_annuel import BilanAnnuel
+from .job import Job
+from .version_cache import VersionCache
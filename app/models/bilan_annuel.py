@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+class BilanAnnuel(db.Model):
+    """Resultat fige d'un etudiant pour une annee academique cloturee."""
+
+    __tablename__ = "bilans_annuels"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    etudiant_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    annee = db.Column(db.String(20), nullable=False)
+    niveau = db.Column(db.String(10), nullable=True)
+    classe_nom = db.Column(db.String(100), nullable=True)
+
+    moyenne_generale = db.Column(db.Float, nullable=False)
+    credits_valides = db.Column(db.Integer, nullable=False)
+    decision = db.Column(db.String(20), nullable=False)
+    mention = db.Column(db.String(20), nullable=True)
+    # Resultat complet (format resultat_final) pour le releve historique
+    resultat = db.Column(db.JSON, nullable=False)
+
+    cloture_le = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("etudiant_id", "annee", name="uq_bilans_annuels_etudiant_annee"),
+    )
+
+
+@event.listens_for(BilanAnnuel, "before_update")
+def _bilan_immuable(mapper, connection, target):
+    """Une annee cloturee ne se modifie plus."""
+    raise ValueError("Un bilan annuel cloture ne peut pas etre modifie.")
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from app.extensions import db
+
+# Statuts d'une tache de fond
+EN_ATTENTE = "EN_ATTENTE"
+EN_COURS = "EN_COURS"
+TERMINE = "TERMINE"
+ECHEC = "ECHEC"
+ANNULE = "ANNULE"
+
+
+class Job(db.Model):
+    """Tache de fond (export, bulletins, import) executee par `flask worker`."""
+
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    parametres = db.Column(db.JSON, nullable=False, default=dict)
+    statut = db.Column(db.String(20), nullable=False, default=EN_ATTENTE)
+
+    # Avancement (0-100) et dernier message de la tache
+    progression = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255), nullable=True)
+    erreur = db.Column(db.Text, nullable=True)
+
+    tentatives = db.Column(db.Integer, nullable=False, default=0)
+    max_tentatives = db.Column(db.Integer, nullable=False, default=3)
+    # Pas de reprise avant cette date (attente entre deux essais)
+    disponible_le = db.Column(db.DateTime, default=datetime.utcnow)
+    annulation_demandee = db.Column(db.Boolean, nullable=False, default=False)
+    worker = db.Column(db.String(100), nullable=True)
+    # Point de reprise ecrit par la tache avec ses commits (nouvel essai)
+    reprise = db.Column(db.JSON, nullable=True)
+
+    # Fichier produit (chemin sur disque, nom propose au telechargement)
+    fichier = db.Column(db.String(255), nullable=True)
+    nom_fichier = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+
+    demandeur_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=True
+    )
+
+    cree_le = db.Column(db.DateTime, default=datetime.utcnow)
+    demarre_le = db.Column(db.DateTime, nullable=True)
+    # Dernier signe de vie du worker (bail renouvele pendant l'execution)
+    battement_le = db.Column(db.DateTime, nullable=True)
+    termine_le = db.Column(db.DateTime, nullable=True)
+
+    demandeur = db.relationship("User")
+
+    __table_args__ = (
+        # File d'attente : prochain job disponible
+        db.Index("ix_jobs_statut_disponible", "statut", "disponible_le"),
+    )
+
+    @property
+    def termine(self) -> bool:
+        return self.statut in (TERMINE, ECHEC, ANNULE)
@@ -1,8 +1,19 @@
 from datetime import datetime
 
+from flask import current_app
+
 from app.extensions import db
 
 
+def annee_courante() -> str:
+    """Annee academique en cours (Config.DEFAULT_ANNEE)."""
+    return current_app.config["DEFAULT_ANNEE"]
+
+
+# Colonnes de l'unicite d'une note (ON CONFLICT)
+CLE_NOTE = ("etudiant_id", "matiere_id", "annee")
+
+
 class Note(db.Model):
     """Note d'un etudiant, saisie par un enseignant."""
 
@@ -11,11 +22,18 @@ class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     valeur = db.Column(db.Float, nullable=False)
     date_ajout = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Verrou optimiste : chaque UPDATE verifie puis incremente la version
+    version = db.Column(db.Integer, nullable=False, default=1)
 
     # Presence/absence et appreciation
     absence = db.Column(db.Boolean, default=False)
     appreciation = db.Column(db.Text, nullable=True)
 
+    # Annee academique de la note (ex: 2025-2026)
+    annee = db.Column(db.String(20), nullable=False, default=annee_courante)
+
     etudiant_id = db.Column(
         db.Integer,
         db.ForeignKey("users.id"),
@@ -45,3 +63,17 @@ class Note(db.Model):
         "User",
         foreign_keys=[enseignant_id]
     )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # Notes d'un etudiant pour une annee (calculs, jointure de cohorte)
+        db.Index("ix_notes_etudiant_annee", "etudiant_id", "annee"),
+        # Notes saisies par un enseignant (dashboard, listes)
+        db.Index("ix_notes_enseignant", "enseignant_id"),
+        # Une note par matiere et par etudiant pour l'annee (cible des upserts)
+        db.Index(
+            "uq_notes_etudiant_matiere_annee", "etudiant_id", "matiere_id", "annee",
+            unique=True
+        ),
+    )
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from app.extensions import db
+
+# Operations du journal (comme Changements.notes)
+INSERTION = "I"
+MODIFICATION = "U"
+SUPPRESSION = "D"
+
+
+class NoteChange(db.Model):
+    """
+    Journal des ecritures de notes (ajout seul), lu par curseur sur seq.
+    Etat de la note apres l'ecriture ; une suppression ne garde que les ids.
+    """
+
+    __tablename__ = "note_changes"
+
+    # Numero croissant, jamais reutilise (AUTOINCREMENT sous SQLite)
+    seq = db.Column(db.Integer, primary_key=True)
+    operation = db.Column(db.String(1), nullable=False)
+    # Pas de cle etrangere : la ligne survit a la note supprimee
+    note_id = db.Column(db.Integer, nullable=False)
+
+    etudiant_id = db.Column(db.Integer, nullable=True)
+    enseignant_id = db.Column(db.Integer, nullable=True)
+    matiere_id = db.Column(db.Integer, nullable=True)
+    annee = db.Column(db.String(20), nullable=True)
+    valeur = db.Column(db.Float, nullable=True)
+    absence = db.Column(db.Boolean, nullable=True)
+    appreciation = db.Column(db.Text, nullable=True)
+
+    cree_le = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Flux filtre d'un etudiant ou d'un enseignant
+        db.Index("ix_note_changes_etudiant_seq", "etudiant_id", "seq"),
+        db.Index("ix_note_changes_enseignant_seq", "enseignant_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class StudentResult(db.Model):
+    """Resultat materialise d'un etudiant (tenu a jour a chaque ecriture)."""
+
+    __tablename__ = "student_results"
+
+    etudiant_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    moyenne_generale = db.Column(db.Float, nullable=False, default=0.0)
+    credits_valides = db.Column(db.Integer, nullable=False, default=0)
+    decision = db.Column(db.String(20), nullable=False)
+    mention = db.Column(db.String(20), nullable=True)
+
+    # Compteurs pour les cartes du dashboard
+    nb_notes = db.Column(db.Integer, nullable=False, default=0)
+    nb_absences = db.Column(db.Integer, nullable=False, default=0)
+
+    # Parametres de calcul utilises (USE_COEFFICIENTS, annee en cours)
+    use_coefficients = db.Column(db.Boolean, nullable=False, default=True)
+    annee = db.Column(db.String(20), nullable=True)
+
+    # Incremente a chaque recalcul
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class StudentResultMatiere(db.Model):
+    """Detail materialise par matiere (une ligne par matiere notee)."""
+
+    __tablename__ = "student_result_matieres"
+
+    etudiant_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    matiere_id = db.Column(
+        db.Integer,
+        db.ForeignKey("matieres.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    # Ordre d'affichage (ordre de premiere note, comme resultat_final)
+    rang = db.Column(db.Integer, nullable=False)
+    matiere_nom = db.Column(db.String(100), nullable=False)
+    moyenne = db.Column(db.Float, nullable=False)
+    validee = db.Column(db.Boolean, nullable=False)
+    credits = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class StatistiqueMatiere(db.Model):
+    """
+    Statistiques des notes d'une matiere pour une annee (accumulateur de
+    Welford). classe_id vide = toutes classes confondues.
+    """
+
+    __tablename__ = "statistiques_matieres"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    matiere_id = db.Column(
+        db.Integer,
+        db.ForeignKey("matieres.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    classe_id = db.Column(
+        db.Integer,
+        db.ForeignKey("classes.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    annee = db.Column(db.String(20), nullable=False)
+
+    effectif = db.Column(db.Integer, nullable=False, default=0)
+    moyenne = db.Column(db.Float, nullable=False, default=0.0)
+    # Somme des carres des ecarts (variance = m2 / effectif)
+    m2 = db.Column(db.Float, nullable=False, default=0.0)
+    minimum = db.Column(db.Float, nullable=True)
+    maximum = db.Column(db.Float, nullable=True)
+    # Valeur extreme retiree : min/max recalcules a la lecture
+    bornes_a_revoir = db.Column(db.Boolean, nullable=False, default=False)
+    absences = db.Column(db.Integer, nullable=False, default=0)
+    # 20 compteurs : [0,1[, [1,2[, ..., [19,20]
+    histogramme = db.Column(db.JSON, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    matiere = db.relationship("Matiere")
+    classe = db.relationship("Classe")
+
+    __table_args__ = (
+        db.Index("ix_statistiques_matieres_portee", "matiere_id", "classe_id", "annee"),
+    )
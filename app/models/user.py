@@ -1,5 +1,6 @@
 from app.extensions import db
 from flask_login import UserMixin
+from sqlalchemy import func, literal_column
 
 # Table d'association (many-to-many) entre enseignants et matieres
 enseignant_matieres = db.Table(
@@ -8,6 +9,13 @@ enseignant_matieres = db.Table(
     db.Column("matiere_id", db.Integer, db.ForeignKey("matieres.id"), primary_key=True),
 )
 
+# Table d'association (many-to-many) entre enseignants et classes
+enseignant_classes = db.Table(
+    "enseignant_classes",
+    db.Column("enseignant_id", db.Integer, db.ForeignKey("users.id"), primary_key=True),
+    db.Column("classe_id", db.Integer, db.ForeignKey("classes.id"), primary_key=True),
+)
+
 
 class User(db.Model, UserMixin):
     """Modele utilisateur pour admin/enseignant/etudiant."""
@@ -58,6 +66,14 @@ class User(db.Model, UserMixin):
         backref=db.backref("enseignants", lazy="dynamic")
     )
 
+    # Classes ou l'enseignant intervient (etudiants qu'il peut noter)
+    classes = db.relationship(
+        "Classe",
+        secondary=enseignant_classes,
+        order_by="Classe.nom",
+        backref="enseignants"
+    )
+
     @property
     def login(self) -> str:
         """Alias conforme au cahier des charges (login = username)."""
@@ -71,3 +87,12 @@ class User(db.Model, UserMixin):
     def full_name(self) -> str:
         parts = [self.prenom or "", self.nom or ""]
         return " ".join(p for p in parts if p).strip()
+
+
+def tri_nom(colonne):
+    """Nom ou prenom pour le tri : vide plutot que NULL (meme ordre partout)."""
+    return func.coalesce(colonne, literal_column("''"))
+
+
+# Etudiants tries par nom (choix d'un etudiant, pagination par curseur)
+db.Index("ix_users_role_nom", User.role, tri_nom(User.nom), tri_nom(User.prenom), User.id)
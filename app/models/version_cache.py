@@ -0,0 +1,21 @@
+from app.extensions import db
+
+# Portees suivies (cle = id de l'enseignant, de la classe, de la filiere)
+ENSEIGNANT = "enseignant"
+CLASSE = "classe"
+FILIERE = "filiere"
+
+
+class VersionCache(db.Model):
+    """
+    Compteur d'ecritures par portee, incremente dans la transaction qui
+    ecrit : cle des caches memoire, commune a tous les processus.
+    """
+
+    __tablename__ = "versions_caches"
+
+    portee = db.Column(db.String(20), primary_key=True)
+    cle = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    # Derniere incrementation (Last-Modified des pages qui en dependent)
+    modifie_le = db.Column(db.DateTime)
@@ -0,0 +1,177 @@
+# app/utils/annees.py
+"""Cloture des annees academiques et parcours cumule (L1/L2/L3)."""
+
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from app.extensions import db
+from app.models.bilan_annuel import BilanAnnuel
+from app.models.classe import Classe
+from app.models.filiere import Filiere
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.cohorte import resultats_cohorte
+from app.utils.resultats import resultat_etudiant, use_coefficients
+
+
+# ----------------------------
+# G1.1 Cloture d'une annee (instantanes figes)
+# ----------------------------
+def cloturer_annee(annee):
+    """
+    Fige le resultat de chaque etudiant note pendant l'annee donnee.
+
+    Les etudiants deja clotures pour cette annee sont ignores : un bilan
+    ne se recalcule jamais. Retourne le nombre de bilans crees.
+    """
+    session = db.session
+    deja_clotures = select(BilanAnnuel.etudiant_id).where(BilanAnnuel.annee == annee)
+    etudiant_ids = session.execute(
+        select(Note.etudiant_id)
+        .where(Note.annee == annee, Note.etudiant_id.not_in(deja_clotures))
+        .distinct()
+    ).scalars().all()
+    if not etudiant_ids:
+        return 0
+
+    resultats = resultats_cohorte(
+        etudiant_ids=etudiant_ids,
+        use_coefficients=use_coefficients(),
+        annee=annee
+    )
+    # Niveau et classe au moment de la cloture
+    affectations = {
+        etudiant_id: (niveau, classe_nom)
+        for etudiant_id, niveau, classe_nom in session.execute(
+            select(User.id, Filiere.niveau, Classe.nom)
+            .outerjoin(Classe, Classe.id == User.classe_id)
+            .outerjoin(Filiere, Filiere.id == Classe.filiere_id)
+            .where(User.id.in_(etudiant_ids))
+        )
+    }
+
+    now = datetime.utcnow()
+    session.execute(insert(BilanAnnuel), [
+        {
+            "etudiant_id": etudiant_id,
+            "annee": annee,
+            "niveau": affectations.get(etudiant_id, (None, None))[0],
+            "classe_nom": affectations.get(etudiant_id, (None, None))[1],
+            "moyenne_generale": resultat["moyenne_generale"],
+            "credits_valides": resultat["credits_valides"],
+            "decision": resultat["decision"],
+            "mention": resultat["mention"],
+            "resultat": resultat,
+            "cloture_le": now,
+        }
+        for etudiant_id, resultat in resultats.items()
+    ])
+    session.commit()
+    return len(resultats)
+
+
+def annees_connues():
+    """Annees presentes dans les notes, avec nombre de notes et de bilans."""
+    notes = dict(db.session.execute(
+        select(Note.annee, func.count(Note.id)).group_by(Note.annee)
+    ).all())
+    bilans = dict(db.session.execute(
+        select(BilanAnnuel.annee, func.count(BilanAnnuel.id)).group_by(BilanAnnuel.annee)
+    ).all())
+    return [
+        {"annee": annee, "notes": notes.get(annee, 0), "bilans": bilans.get(annee, 0)}
+        for annee in sorted(set(notes) | set(bilans))
+    ]
+
+
+# ----------------------------
+# G1.2 Parcours d'un etudiant
+# ----------------------------
+def _ligne_bilan(bilan):
+    return {
+        "annee": bilan.annee,
+        "niveau": bilan.niveau,
+        "classe": bilan.classe_nom,
+        "moyenne_generale": bilan.moyenne_generale,
+        "credits_valides": bilan.credits_valides,
+        "decision": bilan.decision,
+        "mention": bilan.mention,
+        "cloturee": True,
+    }
+
+
+def _resultat_calcule(etudiant_id, annee):
+    """Resultat d'une annee non cloturee, calcule sur ses notes (None sans note)."""
+    if annee == annee_courante():
+        resultat = resultat_etudiant(etudiant_id)
+    else:
+        resultat = resultats_cohorte(
+            etudiant_ids=[etudiant_id], use_coefficients=use_coefficients(), annee=annee
+        ).get(etudiant_id)
+    if resultat is None or not resultat["matieres"]:
+        return None
+    return resultat
+
+
+def parcours_etudiant(etudiant):
+    """
+    Une ligne par annee : les annees cloturees viennent des bilans figes
+    (une requete, independante du nombre de notes) ; l'annee en cours et
+    une annee passee pas encore cloturee sont calculees sur leurs notes.
+    Les credits sont cumules d'une annee a l'autre.
+    """
+    bilans = BilanAnnuel.query.filter_by(etudiant_id=etudiant.id).order_by(
+        BilanAnnuel.annee
+    ).all()
+    annees = [_ligne_bilan(bilan) for bilan in bilans]
+
+    courante = annee_courante()
+    notees = set(db.session.execute(
+        select(Note.annee).where(Note.etudiant_id == etudiant.id).distinct()
+    ).scalars())
+    for annee in sorted((notees | {courante}) - {bilan.annee for bilan in bilans}):
+        resultat = _resultat_calcule(etudiant.id, annee)
+        if resultat is None:
+            continue
+        # Niveau et classe connus pour l'annee en cours seulement
+        classe = etudiant.classe if annee == courante else None
+        annees.append({
+            "annee": annee,
+            "niveau": classe.filiere.niveau if classe else None,
+            "classe": classe.nom if classe else None,
+            "moyenne_generale": resultat["moyenne_generale"],
+            "credits_valides": resultat["credits_valides"],
+            "decision": resultat["decision"],
+            "mention": resultat["mention"],
+            "cloturee": False,
+        })
+    annees.sort(key=lambda ligne: ligne["annee"])
+
+    credits_cumules = 0
+    for ligne in annees:
+        credits_cumules += ligne["credits_valides"]
+        ligne["credits_cumules"] = credits_cumules
+
+    return {
+        "annees": annees,
+        "annee_courante": courante,
+        "credits_cumules": credits_cumules,
+        "moyenne_cumulee": round(
+            sum(l["moyenne_generale"] for l in annees) / len(annees), 2
+        ) if annees else 0.0,
+    }
+
+
+def resultat_annee(etudiant_id, annee):
+    """
+    Resultat detaille d'une annee : bilan fige si l'annee est cloturee,
+    calcul sur les notes de l'annee sinon (annee en cours ou pas encore
+    cloturee), None sans note cette annee-la.
+    """
+    bilan = BilanAnnuel.query.filter_by(etudiant_id=etudiant_id, annee=annee).first()
+    if bilan is not None:
+        return bilan.resultat
+    if annee == annee_courante():
+        return resultat_etudiant(etudiant_id)
+    return _resultat_calcule(etudiant_id, annee)
@@ -0,0 +1,175 @@
+# app/utils/bulletin_pdf.py
+"""Rendu PDF des bulletins (reportlab), sans acces a la base."""
+
+import time
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# A incrementer a chaque changement de mise en page (invalide le cache PDF)
+VERSION_GABARIT = 2
+
+# Mise en page (points, origine en bas a gauche)
+LARGEUR, HAUTEUR = A4
+MARGE = 40
+COLONNES = (("Matiere", MARGE), ("Moyenne", 260), ("Credits", 340))
+Y_TITRE = HAUTEUR - 50
+Y_IDENTITE = Y_TITRE - 20
+Y_DATE = Y_IDENTITE - 15
+Y_TABLEAU = Y_DATE - 25
+Y_TABLEAU_SUITE = HAUTEUR - 50
+Y_BAS = 60
+INTERLIGNE = 14
+
+
+def donnees_bulletin(etudiant, resultat, classement, date=None):
+    """
+    Tout ce qu'il faut pour rendre un bulletin, en types simples
+    (transmissible a un autre processus).
+    """
+    return {
+        "etudiant_id": etudiant.id,
+        "identite": etudiant.full_name or etudiant.username,
+        "matricule": etudiant.matricule,
+        "date": (date or datetime.now()).strftime("%Y-%m-%d"),
+        "resultat": resultat,
+        "classement": classement,
+    }
+
+
+# ----------------------------
+# Parties fixes : dessinees une fois par document (form XObjects)
+# ----------------------------
+def _entete_tableau(pdf, y):
+    pdf.setFont("Helvetica-Bold", 10)
+    for libelle, x in COLONNES:
+        pdf.drawString(x, y, libelle)
+
+
+def _definir_gabarits(pdf):
+    """
+    Premiere page (titre, libelles, en-tete du tableau) et pages suivantes
+    (en-tete du tableau) : chaque page ne fait ensuite que les reutiliser.
+    """
+    pdf.beginForm("premiere_page")
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(MARGE, Y_TITRE, "Bulletin de notes")
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(MARGE, Y_IDENTITE, "Etudiant:")
+    pdf.drawString(MARGE, Y_DATE, "Date:")
+    _entete_tableau(pdf, Y_TABLEAU)
+    pdf.endForm()
+
+    pdf.beginForm("page_suite")
+    _entete_tableau(pdf, Y_TABLEAU_SUITE)
+    pdf.endForm()
+
+
+# ----------------------------
+# Pagination
+# ----------------------------
+def _lignes_resume(resultat, classement):
+    lignes = [
+        ("Helvetica-Bold", f'Moyenne generale: {resultat["moyenne_generale"]:.2f}'),
+        ("Helvetica-Bold", f'Credits valides: {resultat["credits_valides"]}'),
+        ("Helvetica-Bold", f'Decision: {resultat["decision"]}'),
+    ]
+    if resultat["mention"]:
+        lignes.append(("Helvetica-Bold", f'Mention: {resultat["mention"]}'))
+    # Position dans la classe / filiere
+    for libelle, cle in (("classe", "classe"), ("filiere", "filiere")):
+        position = classement[cle]
+        if position:
+            lignes.append((
+                "Helvetica",
+                f'Rang {libelle}: {position["rang"]}/{position["effectif"]} '
+                f'(percentile {position["percentile"]}, mediane {position["mediane"]})'
+            ))
+    return lignes
+
+
+def paginer(nb_matieres, nb_lignes_resume):
+    """
+    Decoupe les lignes du tableau en pages : liste de (debut, fin).
+    Le resume reste sur la derniere page (page ajoutee s'il ne tient pas).
+    """
+    hauteur_resume = 10 + INTERLIGNE * nb_lignes_resume
+    pages = []
+    debut = 0
+    y_depart = Y_TABLEAU - 12
+    while True:
+        place = int((y_depart - Y_BAS) // INTERLIGNE) + 1
+        fin = min(debut + place, nb_matieres)
+        pages.append((debut, fin))
+        y_fin = y_depart - (fin - debut) * INTERLIGNE
+        if fin == nb_matieres and y_fin - hauteur_resume >= Y_BAS - INTERLIGNE:
+            return pages
+        if fin == nb_matieres:
+            # Resume seul sur une derniere page
+            pages.append((fin, fin))
+            return pages
+        debut = fin
+        y_depart = Y_TABLEAU_SUITE - 12
+
+
+# ----------------------------
+# Rendu d'un bulletin
+# ----------------------------
+def rendre_bulletin(donnees, temps_pages=None):
+    """
+    Bulletin PDF (bytes) a partir de donnees_bulletin.
+    temps_pages : liste completee avec la duree de rendu de chaque page (s).
+    """
+    resultat = donnees["resultat"]
+    matieres = resultat["matieres"]
+    resume = _lignes_resume(resultat, donnees["classement"])
+    pages = paginer(len(matieres), len(resume))
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    _definir_gabarits(pdf)
+    decalage_etiquette = stringWidth("Etudiant: ", "Helvetica", 10)
+    decalage_date = stringWidth("Date: ", "Helvetica", 10)
+
+    for numero, (debut, fin) in enumerate(pages, start=1):
+        depart = time.perf_counter()
+        if numero == 1:
+            pdf.doForm("premiere_page")
+            pdf.setFont("Helvetica", 10)
+            pdf.drawString(MARGE + decalage_etiquette, Y_IDENTITE, donnees["identite"])
+            pdf.drawString(MARGE + decalage_date, Y_DATE, donnees["date"])
+            y = Y_TABLEAU - 12
+        else:
+            # Page de resume seul : pas d'en-tete de tableau
+            if fin > debut:
+                pdf.doForm("page_suite")
+            y = Y_TABLEAU_SUITE - 12
+
+        # Lignes variables du tableau
+        pdf.setFont("Helvetica", 10)
+        for item in matieres[debut:fin]:
+            pdf.drawString(COLONNES[0][1], y, str(item["matiere"]))
+            pdf.drawString(COLONNES[1][1], y, f'{item["moyenne"]:.2f}')
+            pdf.drawString(COLONNES[2][1], y, str(item["credits"]))
+            y -= INTERLIGNE
+
+        if numero == len(pages):
+            y -= 10
+            for police, texte in resume:
+                pdf.setFont(police, 10)
+                pdf.drawString(MARGE, y, texte)
+                y -= INTERLIGNE
+
+        if len(pages) > 1:
+            pdf.setFont("Helvetica", 8)
+            pdf.drawRightString(LARGEUR - MARGE, 30, f"Page {numero}/{len(pages)}")
+
+        pdf.showPage()
+        if temps_pages is not None:
+            temps_pages.append(time.perf_counter() - depart)
+
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,176 @@
+# app/utils/bulletins_lot.py
+"""Bulletins d'une classe ou filiere : rendu en parallele, archive ZIP en flux."""
+
+import io
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from werkzeug.utils import secure_filename
+
+from app.models.classe import Classe
+from app.models.user import User
+from app.utils.bulletin_pdf import donnees_bulletin, rendre_bulletin
+from app.utils.classement import classement
+from app.utils.cohorte import resultats_cohorte
+from app.utils.resultats import use_coefficients
+
+# Bulletins envoyes a un processus en une fois
+TAILLE_LOT = 16
+
+
+# ----------------------------
+# H1.1 Preparation (dans la requete, acces base)
+# ----------------------------
+def preparer_bulletins(classe_id=None, filiere_id=None):
+    """
+    Donnees de tous les bulletins d'une classe ou d'une filiere :
+    liste de (nom de fichier, donnees_bulletin). Resultats calcules
+    en un passage sur la cohorte, classes chargees avec les etudiants,
+    chaque classement (classe, filiere) lu une fois par portee.
+    """
+    query = User.query.options(joinedload(User.classe)).filter_by(role="ETUDIANT")
+    if classe_id is not None:
+        query = query.filter(User.classe_id == classe_id)
+    elif filiere_id is not None:
+        query = query.join(Classe, Classe.id == User.classe_id).filter(
+            Classe.filiere_id == filiere_id
+        )
+    etudiants = query.order_by(User.nom, User.prenom, User.id).all()
+    if not etudiants:
+        return []
+
+    resultats = resultats_cohorte(
+        etudiant_ids=[e.id for e in etudiants],
+        use_coefficients=use_coefficients()
+    )
+    maintenant = datetime.now()
+    classements = {}
+
+    def _position(portee, portee_id, etudiant_id):
+        if (portee, portee_id) not in classements:
+            classements[portee, portee_id] = classement(portee, portee_id)
+        return classements[portee, portee_id].position(etudiant_id)
+
+    bulletins = []
+    for etudiant in etudiants:
+        positions = {"classe": None, "filiere": None}
+        if etudiant.classe is not None:
+            positions["classe"] = _position("classe", etudiant.classe_id, etudiant.id)
+            positions["filiere"] = _position(
+                "filiere", etudiant.classe.filiere_id, etudiant.id
+            )
+        nom = secure_filename(
+            f"{etudiant.matricule or etudiant.id}_{etudiant.full_name or etudiant.username}"
+        )
+        bulletins.append((
+            f"{nom or etudiant.id}.pdf",
+            donnees_bulletin(etudiant, resultats[etudiant.id], positions, maintenant)
+        ))
+    return bulletins
+
+
+# ----------------------------
+# H1.2 Rendu en parallele
+# ----------------------------
+def _rendre_lot(lot):
+    """Execute dans un processus du pool : aucun acces a la base."""
+    debut = time.perf_counter()
+    temps_pages = []
+    fichiers = [(nom, rendre_bulletin(donnees, temps_pages)) for nom, donnees in lot]
+    return os.getpid(), time.perf_counter() - debut, temps_pages, fichiers
+
+
+def rendre_en_parallele(bulletins, processus=None, mesures=None):
+    """
+    Genere (nom, pdf) dans l'ordre des bulletins, au fil du rendu.
+    Au plus deux lots par processus en attente : la memoire reste bornee.
+    mesures : dict {pid: {"bulletins", "pages", "secondes", "secondes_pages"}}
+    complete au passage.
+    """
+    processus = processus or os.cpu_count() or 1
+    lots = [bulletins[i:i + TAILLE_LOT] for i in range(0, len(bulletins), TAILLE_LOT)]
+    mesures = mesures if mesures is not None else {}
+
+    with ProcessPoolExecutor(max_workers=min(processus, max(len(lots), 1))) as pool:
+        en_cours = deque()
+        suivants = iter(lots)
+        for lot in suivants:
+            en_cours.append(pool.submit(_rendre_lot, lot))
+            if len(en_cours) >= 2 * processus:
+                break
+        while en_cours:
+            pid, duree, temps_pages, fichiers = en_cours.popleft().result()
+            mesure = mesures.setdefault(
+                pid, {"bulletins": 0, "pages": 0, "secondes": 0.0, "secondes_pages": 0.0}
+            )
+            mesure["bulletins"] += len(fichiers)
+            mesure["pages"] += len(temps_pages)
+            mesure["secondes"] += duree
+            mesure["secondes_pages"] += sum(temps_pages)
+            lot = next(suivants, None)
+            if lot is not None:
+                en_cours.append(pool.submit(_rendre_lot, lot))
+            yield from fichiers
+
+
+# ----------------------------
+# H1.3 Archive ZIP en flux
+# ----------------------------
+class _Tampon(io.RawIOBase):
+    """Sortie non positionnable : zipfile ecrit alors en flux."""
+
+    def __init__(self):
+        self._morceaux = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, donnees):
+        self._morceaux.append(bytes(donnees))
+        self._position += len(donnees)
+        return len(donnees)
+
+    def tell(self):
+        return self._position
+
+    def vider(self):
+        donnees = b"".join(self._morceaux)
+        self._morceaux.clear()
+        return donnees
+
+
+def zip_en_flux(fichiers):
+    """Genere l'archive morceau par morceau, un fichier a la fois."""
+    tampon = _Tampon()
+    with zipfile.ZipFile(tampon, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for nom, contenu in fichiers:
+            archive.writestr(nom, contenu)
+            yield tampon.vider()
+    yield tampon.vider()
+
+
+def resume_mesure(pid, mesure):
+    """Ligne lisible : bulletins, pages et temps moyen par page d'un processus."""
+    par_page = mesure["secondes_pages"] / mesure["pages"] * 1000 if mesure["pages"] else 0.0
+    return (
+        f'processus {pid}: {mesure["bulletins"]} bulletin(s), {mesure["pages"]} page(s) '
+        f'en {mesure["secondes"]:.2f} s ({par_page:.1f} ms/page)'
+    )
+
+
+def journaliser_mesures(libelle, mesures):
+    """Temps de rendu par processus dans le journal de l'application."""
+    for pid, mesure in sorted(mesures.items()):
+        current_app.logger.info("%s: %s", libelle, resume_mesure(pid, mesure))
+
+
+def processus_bulletins():
+    """Taille du pool configuree (BULLETINS_PROCESSUS, 0 = un par coeur)."""
+    return current_app.config.get("BULLETINS_PROCESSUS") or os.cpu_count() or 1
@@ -0,0 +1,156 @@
+# app/utils/cache_pdf.py
+"""Bulletins PDF deja rendus, ranges sur disque sous l'empreinte de leurs donnees."""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import suppress
+from threading import Lock
+
+from flask import current_app
+
+from app.utils.bulletin_pdf import VERSION_GABARIT, rendre_bulletin
+
+# Taille du cache estimee par ce processus (octets), sans parcourir le disque
+# a chaque rendu ; recalee par un parcours complet au plus toutes les
+# INTERVALLE_RECALAGE secondes (PDF ajoutes par les autres processus).
+INTERVALLE_RECALAGE = 300
+_taille = {"octets": None, "recale_le": 0.0}
+_taille_lock = Lock()
+
+
+def _dossier():
+    return current_app.config["BULLETINS_CACHE_DIR"]
+
+
+def _taille_max():
+    return current_app.config.get("BULLETINS_CACHE_MO", 200) * 1024 * 1024
+
+
+def empreinte(donnees):
+    """
+    Cle du PDF : SHA-256 des donnees du bulletin (resultat, identite,
+    classement, date) et de la version du gabarit.
+    """
+    contenu = json.dumps(
+        {"gabarit": VERSION_GABARIT, "donnees": donnees},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+def chemin_pdf(cle):
+    """Deux niveaux de dossiers pour ne pas tout mettre dans un repertoire."""
+    return os.path.join(_dossier(), cle[:2], f"{cle}.pdf")
+
+
+def bulletin_en_cache(donnees):
+    """
+    Contenu et cle du PDF, rendu seulement s'il n'est pas deja sur disque.
+    Le fichier est lu ici : une eviction concurrente peut le supprimer a
+    tout moment, il est alors rendu a nouveau. Chaque lecture rafraichit
+    la date du fichier (eviction LRU).
+    """
+    cle = empreinte(donnees)
+    chemin = chemin_pdf(cle)
+    try:
+        with open(chemin, "rb") as fichier:
+            contenu = fichier.read()
+    except FileNotFoundError:
+        pass
+    else:
+        with suppress(FileNotFoundError):
+            os.utime(chemin)
+        return contenu, cle
+
+    contenu = rendre_bulletin(donnees)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    # Ecriture atomique : un lecteur concurrent ne voit jamais un PDF partiel
+    descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix=".tmp")
+    with os.fdopen(descripteur, "wb") as fichier:
+        fichier.write(contenu)
+    os.replace(temporaire, chemin)
+
+    if _ajouter_taille(len(contenu)) > _taille_max():
+        evincer()
+    return contenu, cle
+
+
+def _ajouter_taille(octets):
+    """Ajoute un PDF a la taille estimee et la retourne (parcours si perimee)."""
+    with _taille_lock:
+        maintenant = time.monotonic()
+        if (_taille["octets"] is None
+                or maintenant - _taille["recale_le"] > INTERVALLE_RECALAGE):
+            _taille["octets"] = sum(taille for _, taille, _ in _fichiers())
+            _taille["recale_le"] = maintenant
+        else:
+            _taille["octets"] += octets
+        return _taille["octets"]
+
+
+def _fichiers():
+    """(date d'acces, taille, chemin) de chaque PDF du cache."""
+    fichiers = []
+    for racine, _, noms in os.walk(_dossier()):
+        for nom in noms:
+            if nom.endswith(".pdf"):
+                chemin = os.path.join(racine, nom)
+                infos = os.stat(chemin)
+                fichiers.append((infos.st_mtime, infos.st_size, chemin))
+    return fichiers
+
+
+def evincer(taille_max=None):
+    """
+    Supprime les PDF les moins recemment servis tant que le cache depasse
+    sa taille maximale (on redescend a 90% pour ne pas evincer a chaque ajout).
+    Retourne le nombre de fichiers supprimes.
+    """
+    taille_max = _taille_max() if taille_max is None else taille_max
+    fichiers = _fichiers()
+    total = sum(taille for _, taille, _ in fichiers)
+    if total <= taille_max:
+        _recaler(total)
+        return 0
+
+    cible = taille_max * 0.9
+    supprimes = 0
+    for _, taille, chemin in sorted(fichiers):
+        if total <= cible:
+            break
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+        total -= taille
+        supprimes += 1
+    _recaler(total)
+    return supprimes
+
+
+def _recaler(octets):
+    with _taille_lock:
+        _taille["octets"] = octets
+        _taille["recale_le"] = time.monotonic()
+
+
+def purger():
+    """Vide tout le cache. Retourne le nombre de fichiers supprimes."""
+    supprimes = 0
+    for _, _, chemin in _fichiers():
+        try:
+            os.remove(chemin)
+            supprimes += 1
+        except FileNotFoundError:
+            pass
+    _recaler(0)
+    return supprimes
+
+
+def etat_cache():
+    """Nombre de PDF et taille totale (octets)."""
+    fichiers = _fichiers()
+    return {"fichiers": len(fichiers), "octets": sum(t for _, t, _ in fichiers)}
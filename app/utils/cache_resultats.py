@@ -0,0 +1,324 @@
+# app/utils/cache_resultats.py
+"""
+Memoisation des resultats etudiants (LRU borne, local au processus).
+Les cles portent une version lue en base (student_results, versions_caches),
+incrementee dans la transaction qui ecrit : une ecriture d'un autre
+processus (worker, commande, autre worker web) change donc aussi la cle.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import and_, func, insert, select, update
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.note import Note
+from app.models.resultat import StudentResult
+from app.models.user import User
+from app.models.version_cache import CLASSE, ENSEIGNANT, FILIERE, VersionCache
+from app.utils.ecritures import abonner_apres_commit, abonner_avant_commit
+from app.utils.saisie_notes import INSERTS_DIALECTE
+
+
+class CacheLRU:
+    """Cache LRU thread-safe avec compteurs de hits/miss."""
+
+    def __init__(self, taille_max=1024):
+        self.taille_max = taille_max
+        self.hits = 0
+        self.misses = 0
+        self._donnees = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, cle, defaut=None):
+        with self._lock:
+            if cle in self._donnees:
+                self._donnees.move_to_end(cle)
+                self.hits += 1
+                return self._donnees[cle]
+            self.misses += 1
+            return defaut
+
+    def set(self, cle, valeur):
+        if self.taille_max <= 0:
+            return
+        with self._lock:
+            self._donnees[cle] = valeur
+            self._donnees.move_to_end(cle)
+            # Eviction des entrees les moins recemment utilisees
+            while len(self._donnees) > self.taille_max:
+                self._donnees.popitem(last=False)
+
+    def supprimer_si(self, predicat):
+        """Retire les entrees dont la cle verifie predicat(cle)."""
+        with self._lock:
+            for cle in [c for c in self._donnees if predicat(c)]:
+                del self._donnees[cle]
+
+    def vider(self):
+        with self._lock:
+            self._donnees.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "taille": len(self._donnees),
+                "taille_max": self.taille_max,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Cache partage par les routes etudiant
+cache_resultats = CacheLRU()
+# Cartes du dashboard etudiant (memes cles et invalidation)
+cache_cartes = CacheLRU()
+# Statistiques du dashboard enseignant : cle (enseignant, version en base)
+cache_enseignants = CacheLRU()
+# Carnets de notes (classe x matieres) : cle = version de la classe en base
+cache_carnets = CacheLRU()
+
+
+def tampon_etudiant(etudiant_id):
+    """
+    (version, date) de la ligne student_results de l'etudiant, None sans ligne.
+    Recalculee a chaque ecriture de ses notes ou des matieres notees.
+    """
+    return db.session.execute(
+        select(StudentResult.version, StudentResult.updated_at)
+        .where(StudentResult.etudiant_id == etudiant_id)
+    ).first()
+
+
+def version_cache(portee, cle) -> int:
+    """Version en base d'une portee (0 tant qu'aucune ecriture ne l'a touchee)."""
+    return db.session.execute(
+        select(VersionCache.version)
+        .where(VersionCache.portee == portee, VersionCache.cle == cle)
+    ).scalar() or 0
+
+
+def version_enseignant(enseignant_id) -> int:
+    return version_cache(ENSEIGNANT, enseignant_id)
+
+
+def _cle(etudiant_id, tampon, use_coefficients):
+    return (
+        etudiant_id,
+        tuple(tampon) if tampon is not None else None,
+        bool(use_coefficients),
+    )
+
+
+def cle_resultat(etudiant_id, use_coefficients):
+    """Cle (etudiant, tampon student_results, coefficients) : une requete."""
+    return _cle(etudiant_id, tampon_etudiant(etudiant_id), use_coefficients)
+
+
+def portees_classement(etudiant):
+    """[(portee, cle)] des classements de l'etudiant : sa classe, sa filiere."""
+    classe = etudiant.classe
+    if classe is None:
+        return []
+    portees = [(CLASSE, classe.id)]
+    if classe.filiere_id is not None:
+        portees.append((FILIERE, classe.filiere_id))
+    return portees
+
+
+def cles_etudiant(etudiant, use_coefficients):
+    """
+    Cle de resultat de l'etudiant (cle_resultat) et versions des classements
+    de sa classe et de sa filiere, lues en une seule requete.
+    Retourne (cle, {portee: version}).
+    """
+    portees = portees_classement(etudiant)
+    stmt = select(StudentResult.version, StudentResult.updated_at).where(
+        User.id == etudiant.id
+    )
+    depuis = User.__table__.outerjoin(
+        StudentResult.__table__, StudentResult.etudiant_id == User.id
+    )
+    for portee, cle in portees:
+        ligne = VersionCache.__table__.alias()
+        stmt = stmt.add_columns(func.coalesce(ligne.c.version, 0))
+        depuis = depuis.outerjoin(ligne, and_(ligne.c.portee == portee, ligne.c.cle == cle))
+    version, maj, *versions = db.session.execute(stmt.select_from(depuis)).one()
+    tampon = (version, maj) if version is not None else None
+    return (
+        _cle(etudiant.id, tampon, use_coefficients),
+        {portee: v for (portee, _), v in zip(portees, versions)},
+    )
+
+
+def memoiser(etudiant_id, use_coefficients, calcul, cache=None, cle=None):
+    """
+    Retourne le resultat en cache ou appelle calcul() puis le memorise.
+    cle : deja lue (cles_etudiant), sinon lue ici. Le dict retourne est
+    partage : ne pas le modifier.
+    """
+    cache = cache_resultats if cache is None else cache
+    if cle is None:
+        cle = cle_resultat(etudiant_id, use_coefficients)
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = calcul()
+        cache.set(cle, resultat)
+    return resultat
+
+
+def memoiser_enseignant(enseignant_id, calcul):
+    """Statistiques d'un enseignant en cache, ou calcul() memorise."""
+    cle = (enseignant_id, version_enseignant(enseignant_id))
+    stats = cache_enseignants.get(cle)
+    if stats is None:
+        stats = calcul()
+        cache_enseignants.set(cle, stats)
+    return stats
+
+
+def memoiser_carnet(classe_id, cle, calcul):
+    """Carnet d'une classe (cle : matieres, annee...) en cache, ou calcul() memorise."""
+    cle = (classe_id, version_cache(CLASSE, classe_id), *cle)
+    carnet = cache_carnets.get(cle)
+    if carnet is None:
+        carnet = calcul()
+        cache_carnets.set(cle, carnet)
+    return carnet
+
+
+# ----------------------------
+# Invalidation (appelee par les ecritures)
+# ----------------------------
+def invalider_etudiants(etudiant_ids):
+    """
+    Notes modifiees : libere les entrees de ces etudiants. Leur cle a deja
+    change (tampon) ; seules les ecritures de ce processus passent ici.
+    """
+    etudiant_ids = set(etudiant_ids)
+    if not etudiant_ids:
+        return
+    cache_resultats.supprimer_si(lambda cle: cle[0] in etudiant_ids)
+    cache_cartes.supprimer_si(lambda cle: cle[0] in etudiant_ids)
+
+
+def invalider_matieres():
+    """Coefficient/credits modifies : libere tous les resultats."""
+    cache_resultats.vider()
+    cache_cartes.vider()
+
+
+def invalider_enseignants(enseignant_ids):
+    """Notes saisies ou modifiees : libere les entrees de leurs auteurs."""
+    enseignant_ids = set(enseignant_ids)
+    if not enseignant_ids:
+        return
+    cache_enseignants.supprimer_si(lambda cle: cle[0] in enseignant_ids)
+
+
+def invalider_classes(classe_ids):
+    """Classes dont un etudiant a change : libere leurs carnets."""
+    classe_ids = set(classe_ids)
+    if not classe_ids:
+        return
+    cache_carnets.supprimer_si(lambda cle: cle[0] in classe_ids)
+
+
+def incrementer_versions(session, portee, cles):
+    """+1 sur la version de chaque cle d'une portee (upsert, dans la transaction)."""
+    cles = sorted({cle for cle in cles if cle is not None})
+    if not cles:
+        return
+    table = VersionCache.__table__
+    maintenant = datetime.utcnow()
+    lignes = [
+        {"portee": portee, "cle": cle, "version": 1, "modifie_le": maintenant}
+        for cle in cles
+    ]
+    fabrique = INSERTS_DIALECTE.get(session.get_bind().dialect.name)
+    if fabrique is not None:
+        session.execute(fabrique(table).on_conflict_do_update(
+            index_elements=["portee", "cle"],
+            set_={"version": table.c.version + 1, "modifie_le": maintenant}
+        ), lignes)
+        return
+    # Autre moteur : UPDATE des cles connues, INSERT des autres
+    connues = set(session.execute(
+        select(table.c.cle).where(table.c.portee == portee, table.c.cle.in_(cles))
+    ).scalars())
+    if connues:
+        session.execute(
+            update(table)
+            .where(table.c.portee == portee, table.c.cle.in_(connues))
+            .values(version=table.c.version + 1, modifie_le=maintenant)
+        )
+    nouvelles = [ligne for ligne in lignes if ligne["cle"] not in connues]
+    if nouvelles:
+        session.execute(insert(table), nouvelles)
+
+
+def classes_touchees(session, changements):
+    """
+    Classes dont le carnet ou le classement change : classe actuelle des
+    etudiants notes, inscrits, renommes ou deplaces, classe quittee par ces
+    derniers, et classes des etudiants notes dans une matiere modifiee.
+    """
+    etudiants = (
+        changements.etudiants | changements.affectations
+        | changements.identites | set(changements.classes)
+    )
+    classes = set(changements.classes.values())
+    if etudiants:
+        classes.update(session.execute(
+            select(User.classe_id).where(User.id.in_(etudiants))
+        ).scalars())
+    if changements.matieres:
+        # Coefficient/credits : moyennes (donc classements) a revoir
+        classes.update(session.execute(
+            select(User.classe_id).distinct()
+            .join(Note, Note.etudiant_id == User.id)
+            .where(Note.matiere_id.in_(changements.matieres))
+        ).scalars())
+    classes.discard(None)
+    return classes
+
+
+def filieres_touchees(session, changements):
+    """Filieres des classes touchees, et celles quittees ou rejointes par une classe."""
+    filieres = set(changements.filieres)
+    if changements.classes_touchees:
+        filieres.update(session.execute(
+            select(Classe.filiere_id).where(Classe.id.in_(changements.classes_touchees))
+        ).scalars())
+    return filieres
+
+
+def _incrementer(session, changements):
+    """
+    Abonne avant commit : versions des enseignants auteurs des notes ecrites,
+    des classes touchees (memorisees pour l'apres commit) et de leurs filieres.
+    """
+    incrementer_versions(session, ENSEIGNANT, changements.enseignants)
+    changements.classes_touchees = classes_touchees(session, changements)
+    incrementer_versions(session, CLASSE, changements.classes_touchees)
+    incrementer_versions(session, FILIERE, filieres_touchees(session, changements))
+
+
+def _apres_commit(changements):
+    if changements.matieres:
+        invalider_matieres()
+    invalider_etudiants(changements.etudiants)
+    invalider_enseignants(changements.enseignants)
+    invalider_classes(changements.classes_touchees)
+
+
+def enregistrer(app):
+    """Dimensionne les caches, tient les versions en base et libere les entrees perimees."""
+    cache_resultats.taille_max = app.config.get("RESULTATS_CACHE_TAILLE", 1024)
+    cache_cartes.taille_max = app.config.get("RESULTATS_CACHE_TAILLE", 1024)
+    cache_enseignants.taille_max = app.config.get("RESULTATS_CACHE_TAILLE", 1024)
+    cache_carnets.taille_max = app.config.get("CARNETS_CACHE_TAILLE", 64)
+    abonner_avant_commit(_incrementer)
+    abonner_apres_commit(_apres_commit)
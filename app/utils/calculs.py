@@ -3,12 +3,22 @@
 from collections import defaultdict
 
 
+# Regles de deliberation par defaut
+SEUIL_ADMIS = 10
+SEUIL_AJOURNE = 8
+SEUILS_MENTION = (
+    (16, "Tres Bien"),
+    (14, "Bien"),
+    (12, "Assez Bien"),
+    (10, "Passable"),
+)
+
 # ----------------------------
 # A1.1 Moyenne d'une matiere
 # ----------------------------
 def moyenne_matiere(notes):
     """
-    notes : liste de Note (meme matiere)
+    notes : liste de Note ou NoteCompacte (meme matiere)
     Retourne la moyenne de la matiere (arrondie a 2 decimales)
     """
     if not notes:
@@ -47,7 +57,7 @@ def credits_matiere(moyenne, credits):
 # ----------------------------
 def moyenne_generale(notes, use_coefficients=True):
     """
-    notes : liste de Note (toutes matieres confondues)
+    notes : liste de Note ou NoteCompacte (toutes matieres confondues)
     - Si use_coefficients = True : moyenne ponderee par coefficients
     - Sinon : moyenne simple des moyennes par matiere
     """
@@ -97,7 +107,7 @@ def moyenne_generale(notes, use_coefficients=True):
 # ----------------------------
 def bilan_academique(notes, use_coefficients=True):
     """
-    notes : liste de Note d'un etudiant
+    notes : liste de Note ou NoteCompacte d'un etudiant
 
     Retourne :
     - moyennes par matiere
@@ -140,30 +150,29 @@ def bilan_academique(notes, use_coefficients=True):
 # ----------------------------
 # A2.1 Mention academique
 # ----------------------------
-def mention(moyenne):
-    if moyenne < 10:
-        return None
-    if moyenne < 12:
-        return "Passable"
-    if moyenne < 14:
-        return "Assez Bien"
-    if moyenne < 16:
-        return "Bien"
-    return "Tres Bien"
+def mention(moyenne, seuils=SEUILS_MENTION):
+    """
+    seuils : couples (seuil, mention) du plus haut au plus bas
+    """
+    for seuil, libelle in seuils:
+        if moyenne >= seuil:
+            return libelle
+    return None
 
 
 # ----------------------------
 # A2.2 Decision academique finale
 # ----------------------------
-def decision_academique(credits_valides, moyenne_generale, total_credits=60):
+def decision_academique(credits_valides, moyenne_generale, total_credits=60,
+                        seuil_admis=SEUIL_ADMIS, seuil_ajourne=SEUIL_AJOURNE):
     """
     Determine la decision finale de l'etudiant
     """
 
-    if credits_valides >= total_credits and moyenne_generale >= 10:
+    if credits_valides >= total_credits and moyenne_generale >= seuil_admis:
         return "ADMIS"
 
-    if moyenne_generale >= 8:
+    if moyenne_generale >= seuil_ajourne:
         return "AJOURNE"
 
     return "REDOUBLE"
@@ -0,0 +1,106 @@
+# app/utils/calculs_sql.py
+"""Variante SQL de resultat_final : agregation GROUP BY cote base."""
+
+from sqlalchemy import case, func
+
+from app.extensions import db
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+from app.utils.calculs import (
+    credits_matiere,
+    decision_academique,
+    matiere_validee,
+    mention,
+)
+
+
+# ----------------------------
+# C1.1 Agregats par matiere (une requete)
+# ----------------------------
+def agregats_etudiant(etudiant_id, annee=None):
+    """
+    Retourne une ligne par matiere notee dans l'annee (en cours par defaut) :
+    (nom, coefficient, credits, moyenne brute, nb notes, nb absences)
+
+    Les lignes sont dans l'ordre de premiere note saisie, comme
+    le regroupement fait par bilan_academique.
+    """
+    return (
+        db.session.query(
+            Matiere.nom,
+            Matiere.coefficient,
+            Matiere.credits,
+            func.avg(Note.valeur),
+            func.count(Note.id),
+            func.sum(case((Note.absence.is_(True), 1), else_=0)),
+        )
+        .join(Matiere, Matiere.id == Note.matiere_id)
+        .filter(
+            Note.etudiant_id == etudiant_id,
+            Note.annee == (annee or annee_courante())
+        )
+        .group_by(Matiere.id, Matiere.nom, Matiere.coefficient, Matiere.credits)
+        .order_by(func.min(Note.id))
+        .all()
+    )
+
+
+# ----------------------------
+# C1.2 Resultat complet depuis les agregats
+# ----------------------------
+def resultat_depuis_agregats(agregats, use_coefficients=True):
+    """
+    agregats : lignes retournees par agregats_etudiant
+
+    Meme contrat que resultat_final. L'arrondi reste fait en Python :
+    ROUND() de SQLite ne donne pas le meme resultat que round() sur
+    les demi-centiemes (ex: 9.995).
+    """
+    resultats_matieres = []
+    total_credits = 0
+    total_points = 0.0
+    total_coeffs = 0.0
+    total_moyennes = 0.0
+
+    for nom, coef, credits, moyenne_brute, _, _ in agregats:
+        moy = round(moyenne_brute, 2)
+        credits_acquis = credits_matiere(moy, credits)
+        total_credits += credits_acquis
+
+        resultats_matieres.append({
+            "matiere": nom,
+            "moyenne": moy,
+            "validee": matiere_validee(moy),
+            "credits": credits_acquis
+        })
+
+        total_moyennes += moy
+        if coef is not None and coef > 0:
+            total_points += moy * coef
+            total_coeffs += coef
+
+    if use_coefficients:
+        moyenne_gen = round(total_points / total_coeffs, 2) if total_coeffs else 0.0
+    elif resultats_matieres:
+        moyenne_gen = round(total_moyennes / len(resultats_matieres), 2)
+    else:
+        moyenne_gen = 0.0
+
+    decision = decision_academique(total_credits, moyenne_gen)
+    mention_finale = mention(moyenne_gen) if decision == "ADMIS" else None
+
+    return {
+        "matieres": resultats_matieres,
+        "moyenne_generale": moyenne_gen,
+        "credits_valides": total_credits,
+        "decision": decision,
+        "mention": mention_finale
+    }
+
+
+def resultat_final_sql(etudiant_id, use_coefficients=True):
+    """Equivalent de resultat_final en un seul aller-retour SQL."""
+    return resultat_depuis_agregats(
+        agregats_etudiant(etudiant_id),
+        use_coefficients=use_coefficients
+    )
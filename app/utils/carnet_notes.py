@@ -0,0 +1,76 @@
+# app/utils/carnet_notes.py
+"""Carnet de notes d'une classe : etudiants x matieres de l'enseignant."""
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.cache_resultats import memoiser_carnet
+
+
+# ----------------------------
+# M1.1 Etudiants et notes (deux requetes)
+# ----------------------------
+def calculer_carnet(classe_id, matiere_ids, annee):
+    """
+    Une ligne par etudiant de la classe (nom, prenom, id), une cellule par
+    matiere : les notes de l'annee sont lues a plat puis placees en Python
+    (plus rapide qu'un pivot SQL de 3 agregats par matiere). Retourne
+    [{"id", "matricule", "nom", "prenom", "notes"}], notes alignees sur
+    matiere_ids (None si pas de note).
+    """
+    colonne = {matiere_id: i for i, matiere_id in enumerate(matiere_ids)}
+    dans_classe = (User.classe_id == classe_id, User.role == "ETUDIANT")
+
+    etudiants = []
+    lignes = {}
+    for etudiant_id, matricule, nom, prenom in db.session.execute(
+        select(User.id, User.matricule, User.nom, User.prenom)
+        .where(*dans_classe)
+        .order_by(User.nom, User.prenom, User.id)
+    ):
+        notes = lignes[etudiant_id] = [None] * len(matiere_ids)
+        etudiants.append({
+            "id": etudiant_id, "matricule": matricule, "nom": nom, "prenom": prenom,
+            "notes": notes,
+        })
+
+    for etudiant_id, matiere_id, valeur, absence, appreciation in db.session.execute(
+        select(Note.etudiant_id, Note.matiere_id, Note.valeur, Note.absence, Note.appreciation)
+        .join(User, User.id == Note.etudiant_id)
+        .where(*dans_classe, Note.annee == annee, Note.matiere_id.in_(matiere_ids))
+    ):
+        lignes[etudiant_id][colonne[matiere_id]] = {
+            "valeur": valeur, "absence": bool(absence), "appreciation": appreciation
+        }
+    return etudiants
+
+
+# ----------------------------
+# M1.2 Lecture en cache
+# ----------------------------
+def cle_carnet(classe, matieres, annee):
+    """Noms compris : renommer la classe ou une matiere change la cle."""
+    return (classe.nom, tuple((m.id, m.nom) for m in matieres), annee)
+
+
+def carnet_classe(classe, matieres, annee=None):
+    """
+    Carnet d'une classe pour des matieres (celles de l'enseignant), en cache
+    jusqu'a la prochaine ecriture touchant un etudiant de la classe (version
+    de la classe en base). Dict partage : ne pas le modifier.
+    """
+    annee = annee or annee_courante()
+    matieres = sorted(matieres, key=lambda m: (m.nom, m.id))
+    matiere_ids = tuple(m.id for m in matieres)
+
+    def calcul():
+        return {
+            "classe": {"id": classe.id, "nom": classe.nom},
+            "annee": annee,
+            "matieres": [{"id": m.id, "nom": m.nom} for m in matieres],
+            "etudiants": calculer_carnet(classe.id, matiere_ids, annee) if matiere_ids else [],
+        }
+
+    return memoiser_carnet(classe.id, cle_carnet(classe, matieres, annee), calcul)
@@ -0,0 +1,177 @@
+# app/utils/classement.py
+"""Rang, percentile et mediane par classe et par filiere."""
+
+from bisect import bisect_left, bisect_right, insort
+from threading import Lock
+
+from flask import current_app
+
+from app.models.version_cache import CLASSE, FILIERE
+from app.utils.cache_resultats import portees_classement, version_cache
+from app.utils.cohorte import resultats_cohorte
+from app.utils.resultats_materialises import versions_cohorte
+
+
+class Classement:
+    """Moyennes generales d'une cohorte, gardees triees."""
+
+    def __init__(self, moyennes=None):
+        self._par_etudiant = dict(moyennes or {})
+        self._triees = sorted(self._par_etudiant.values())
+
+    def __len__(self):
+        return len(self._triees)
+
+    def __contains__(self, etudiant_id):
+        return etudiant_id in self._par_etudiant
+
+    def copie(self):
+        return Classement(self._par_etudiant)
+
+    def retirer(self, etudiant_id):
+        moyenne = self._par_etudiant.pop(etudiant_id, None)
+        if moyenne is not None:
+            del self._triees[bisect_left(self._triees, moyenne)]
+
+    def mettre_a_jour(self, etudiant_id, moyenne):
+        self.retirer(etudiant_id)
+        self._par_etudiant[etudiant_id] = moyenne
+        insort(self._triees, moyenne)
+
+    def mediane(self):
+        n = len(self._triees)
+        if not n:
+            return None
+        milieu = n // 2
+        if n % 2:
+            return self._triees[milieu]
+        return round((self._triees[milieu - 1] + self._triees[milieu]) / 2, 2)
+
+    def position(self, etudiant_id):
+        """
+        Rang (1 = meilleure moyenne, ex aequo au meme rang),
+        percentile (part de la cohorte a moyenne <=) et mediane.
+        """
+        moyenne = self._par_etudiant.get(etudiant_id)
+        if moyenne is None:
+            return None
+        n = len(self._triees)
+        inferieurs_ou_egaux = bisect_right(self._triees, moyenne)
+        return {
+            "rang": n - inferieurs_ou_egaux + 1,
+            "effectif": n,
+            "percentile": round(100 * inferieurs_ou_egaux / n, 1),
+            "mediane": self.mediane(),
+        }
+
+
+# Classements charges : {("classe"|"filiere", id): (version, versions, Classement)}
+# version : versions_caches de la portee au chargement ; versions : {etudiant: version}
+_classements = {}
+# Un verrou par classement, le temps de lire ou remplacer son entree
+_verrous = {}
+_lock = Lock()
+
+
+def _use_coefficients() -> bool:
+    return current_app.config.get("USE_COEFFICIENTS", True)
+
+
+def _filtre(portee, portee_id):
+    return {"classe_id": portee_id} if portee == CLASSE else {"filiere_id": portee_id}
+
+
+def _verrou(cle):
+    with _lock:
+        return _verrous.setdefault(cle, Lock())
+
+
+def _classe(resultat):
+    """Etudiant classe : au moins une note dans l'annee (sinon hors classement)."""
+    return bool(resultat["matieres"])
+
+
+def _charger(portee, portee_id):
+    """Construit le classement d'une classe ou filiere (calcul par cohorte)."""
+    resultats = resultats_cohorte(
+        use_coefficients=_use_coefficients(), **_filtre(portee, portee_id)
+    )
+    return Classement({
+        etudiant_id: resultat["moyenne_generale"]
+        for etudiant_id, resultat in resultats.items() if _classe(resultat)
+    })
+
+
+def _actualiser(ancien, versions_avant, versions):
+    """
+    Copie du classement ou seuls les etudiants partis, arrives ou dont
+    la version student_results a change sont recalcules.
+    """
+    nouveau = ancien.copie()
+    for etudiant_id in set(versions_avant) - set(versions):
+        nouveau.retirer(etudiant_id)
+    changes = [
+        etudiant_id for etudiant_id, version in versions.items()
+        if versions_avant.get(etudiant_id) != version
+    ]
+    if changes:
+        resultats = resultats_cohorte(etudiant_ids=changes, use_coefficients=_use_coefficients())
+        for etudiant_id in changes:
+            resultat = resultats.get(etudiant_id)
+            if resultat is not None and _classe(resultat):
+                nouveau.mettre_a_jour(etudiant_id, resultat["moyenne_generale"])
+            else:
+                nouveau.retirer(etudiant_id)
+    return nouveau
+
+
+def classement(portee, portee_id, version=None):
+    """
+    Classement d'une classe ou d'une filiere (charge a la demande).
+    Garde en memoire tant que la version de la portee (versions_caches,
+    incrementee dans la transaction de chaque ecriture qui la touche, quel
+    que soit le processus) ne change pas : une lecture de cle primaire par
+    appel, aucune si la version est donnee (cles_etudiant). Aucun verrou
+    n'est tenu pendant les requetes de recalcul.
+    """
+    cle = (portee, portee_id)
+    if version is None:
+        version = version_cache(portee, portee_id)
+    verrou = _verrou(cle)
+    with verrou:
+        charge = _classements.get(cle)
+    if charge is not None and charge[0] == version:
+        return charge[2]
+
+    # Versions lues avant les moyennes : une ecriture concurrente sera revue
+    versions = versions_cohorte(**_filtre(portee, portee_id))
+    if charge is None:
+        resultat = _charger(portee, portee_id)
+    else:
+        resultat = _actualiser(charge[2], charge[1], versions)
+    with verrou:
+        actuel = _classements.get(cle)
+        if actuel is None or actuel[0] < version:
+            _classements[cle] = (version, versions, resultat)
+    return resultat
+
+
+def classement_etudiant(etudiant, versions=None):
+    """
+    Position de l'etudiant dans sa classe et dans sa filiere.
+    versions : {portee: version} deja lues (cles_etudiant).
+    """
+    positions = {CLASSE: None, FILIERE: None}
+    versions = versions or {}
+    for portee, portee_id in portees_classement(etudiant):
+        positions[portee] = classement(
+            portee, portee_id, versions.get(portee)
+        ).position(etudiant.id)
+    return positions
+
+
+def vider():
+    """Oublie les classements charges (tests, changement de configuration)."""
+    with _lock:
+        _classements.clear()
+        _verrous.clear()
@@ -0,0 +1,287 @@
+# app/utils/cohorte.py
+"""Resultats de toute une cohorte (classe / filiere) en calcul vectorise."""
+
+import numpy as np
+from sqlalchemy import and_
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.calculs import SEUIL_ADMIS, SEUIL_AJOURNE, SEUILS_MENTION
+
+
+# ----------------------------
+# B1.1 Chargement colonnaire d'une cohorte
+# ----------------------------
+def charger_cohorte(classe_id=None, filiere_id=None, etudiant_ids=None, annee=None):
+    """
+    Charge en une seule requete les notes d'une cohorte.
+
+    La cohorte est une classe, une filiere, une liste d'etudiants
+    ou (sans filtre) tous les etudiants. Seules les notes de l'annee
+    academique demandee (par defaut l'annee en cours) sont lues.
+
+    Retourne un dict de tableaux NumPy :
+    - etudiants : ids des etudiants de la cohorte (tries)
+    - etudiant / matiere / valeur / absence : une ligne par note,
+      triees par (etudiant, id de note) comme dans le calcul unitaire
+    """
+    query = (
+        db.session.query(User.id, Note.matiere_id, Note.valeur, Note.absence)
+        .outerjoin(Note, and_(
+            Note.etudiant_id == User.id,
+            Note.annee == (annee or annee_courante())
+        ))
+        .filter(User.role == "ETUDIANT")
+    )
+    if classe_id is not None:
+        query = query.filter(User.classe_id == classe_id)
+    if filiere_id is not None:
+        query = query.join(Classe, Classe.id == User.classe_id).filter(
+            Classe.filiere_id == filiere_id
+        )
+    if etudiant_ids is not None:
+        query = query.filter(User.id.in_(list(etudiant_ids)))
+
+    rows = query.order_by(User.id, Note.id).all()
+
+    etudiants = np.array(sorted({row[0] for row in rows}), dtype=np.int64)
+    # Les etudiants sans note ramenent une ligne (id, None, None)
+    notes = [row for row in rows if row[1] is not None]
+
+    return {
+        "etudiants": etudiants,
+        "etudiant": np.array([row[0] for row in notes], dtype=np.int64),
+        "matiere": np.array([row[1] for row in notes], dtype=np.int64),
+        "valeur": np.array([row[2] for row in notes], dtype=np.float64),
+        "absence": np.array([bool(row[3]) for row in notes], dtype=bool),
+    }
+
+
+def charger_matieres():
+    """Referentiel des matieres : {id: {nom, coefficient, credits}}."""
+    return {
+        m.id: {"nom": m.nom, "coefficient": m.coefficient, "credits": m.credits}
+        for m in db.session.query(
+            Matiere.id, Matiere.nom, Matiere.coefficient, Matiere.credits
+        )
+    }
+
+
+# ----------------------------
+# B1.2 Calcul vectorise
+# ----------------------------
+def calculer_tableaux(cohorte, matieres, use_coefficients=True, total_credits=60,
+                      seuil_admis=SEUIL_ADMIS, seuil_ajourne=SEUIL_AJOURNE,
+                      seuils_mention=SEUILS_MENTION):
+    """
+    cohorte : dict retourne par charger_cohorte
+    matieres : dict retourne par charger_matieres (les notes d'une matiere
+    qui n'y figure pas sont ignorees)
+    seuils : memes parametres que decision_academique et mention
+
+    Retourne les tableaux du calcul :
+    - par groupe (etudiant, matiere) : g_etu, g_mat, moyennes, validees, credits
+    - par etudiant : moyennes_gen, credits_valides, decisions, mentions,
+      nb_notes, nb_absences
+    """
+    etudiants = cohorte["etudiants"]
+    nb_etudiants = len(etudiants)
+
+    mat_ids = np.array(sorted(matieres), dtype=np.int64)
+    mat_noms = [matieres[i]["nom"] for i in mat_ids.tolist()]
+    mat_credits = np.array(
+        [matieres[i]["credits"] for i in mat_ids.tolist()], dtype=np.int64
+    )
+    mat_coefs = np.array(
+        [
+            np.nan if matieres[i]["coefficient"] is None else matieres[i]["coefficient"]
+            for i in mat_ids.tolist()
+        ],
+        dtype=np.float64
+    )
+
+    etu_idx = np.searchsorted(etudiants, cohorte["etudiant"])
+    mat_idx = np.searchsorted(mat_ids, cohorte["matiere"])
+    valeurs = cohorte["valeur"]
+    absences = cohorte["absence"]
+
+    # Matiere absente du referentiel (creee apres son chargement) : searchsorted
+    # donnerait la colonne de sa voisine, ses notes sont ignorees
+    connues = mat_idx < len(mat_ids)
+    connues[connues] = mat_ids[mat_idx[connues]] == cohorte["matiere"][connues]
+    if not connues.all():
+        etu_idx, mat_idx = etu_idx[connues], mat_idx[connues]
+        valeurs, absences = valeurs[connues], absences[connues]
+
+    # Un groupe = un couple (etudiant, matiere)
+    cles = etu_idx * max(len(mat_ids), 1) + mat_idx
+    _, premiers, inverse, effectifs = np.unique(
+        cles, return_index=True, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+
+    sommes = np.zeros(len(premiers), dtype=np.float64)
+    np.add.at(sommes, inverse, valeurs)
+
+    # Plusieurs notes dans une matiere : on reprend sum() pour garder
+    # exactement la meme somme flottante que moyenne_matiere
+    multiples = np.flatnonzero(effectifs > 1)
+    if multiples.size:
+        ordre = np.argsort(inverse, kind="stable")
+        bornes = np.concatenate(([0], np.cumsum(effectifs)))
+        for g in multiples.tolist():
+            sommes[g] = sum(valeurs[ordre[bornes[g]:bornes[g + 1]]].tolist())
+
+    # Ordre des matieres = ordre de premiere apparition chez l'etudiant
+    ordre_groupes = np.argsort(premiers, kind="stable")
+    premiers = premiers[ordre_groupes]
+    g_etu = etu_idx[premiers]
+    g_mat = mat_idx[premiers]
+    moyennes_brutes = sommes[ordre_groupes] / effectifs[ordre_groupes]
+
+    # round() Python (et non np.round) pour des arrondis identiques
+    moyennes = np.array(
+        [round(m, 2) for m in moyennes_brutes.tolist()], dtype=np.float64
+    )
+    validees = moyennes >= 10
+    credits = np.where(validees, mat_credits[g_mat], 0)
+
+    credits_valides = np.zeros(nb_etudiants, dtype=np.int64)
+    np.add.at(credits_valides, g_etu, credits)
+
+    # np.add.at accumule dans l'ordre des groupes, comme la boucle Python
+    if use_coefficients:
+        coefs = mat_coefs[g_mat]
+        actifs = coefs > 0
+        points = np.zeros(nb_etudiants, dtype=np.float64)
+        poids = np.zeros(nb_etudiants, dtype=np.float64)
+        np.add.at(points, g_etu[actifs], moyennes[actifs] * coefs[actifs])
+        np.add.at(poids, g_etu[actifs], coefs[actifs])
+    else:
+        points = np.zeros(nb_etudiants, dtype=np.float64)
+        np.add.at(points, g_etu, moyennes)
+        poids = np.bincount(g_etu, minlength=nb_etudiants).astype(np.float64)
+
+    brutes = np.divide(
+        points, poids, out=np.zeros(nb_etudiants, dtype=np.float64), where=poids != 0
+    )
+    moyennes_gen = np.array(
+        [round(m, 2) for m in brutes.tolist()], dtype=np.float64
+    )
+
+    decisions = _decisions(
+        credits_valides, moyennes_gen, total_credits, seuil_admis, seuil_ajourne
+    )
+    mentions = _mentions(moyennes_gen, decisions, seuils_mention)
+
+    return {
+        "etudiants": etudiants,
+        "mat_ids": mat_ids,
+        "mat_noms": mat_noms,
+        "g_etu": g_etu,
+        "g_mat": g_mat,
+        "moyennes": moyennes,
+        "validees": validees,
+        "credits": credits,
+        "moyennes_gen": moyennes_gen,
+        "credits_valides": credits_valides,
+        "decisions": decisions,
+        "mentions": mentions,
+        "nb_notes": np.bincount(etu_idx, minlength=nb_etudiants),
+        "nb_absences": np.bincount(
+            etu_idx, weights=absences, minlength=nb_etudiants
+        ).astype(np.int64),
+    }
+
+
+def calculer_resultats(cohorte, matieres, use_coefficients=True, **regles):
+    """
+    cohorte : dict retourne par charger_cohorte
+    matieres : dict retourne par charger_matieres
+    regles : seuils optionnels (voir calculer_tableaux)
+
+    Retourne {etudiant_id: resultat} avec exactement le meme contenu
+    que resultat_final (memes arrondis, meme ordre des matieres).
+    """
+    return _assembler(calculer_tableaux(
+        cohorte, matieres, use_coefficients=use_coefficients, **regles
+    ))
+
+
+def _decisions(credits_valides, moyennes_gen, total_credits, seuil_admis, seuil_ajourne):
+    """Equivalent vectorise de decision_academique."""
+    admis = (credits_valides >= total_credits) & (moyennes_gen >= seuil_admis)
+    return np.select(
+        [admis, moyennes_gen >= seuil_ajourne],
+        ["ADMIS", "AJOURNE"],
+        default="REDOUBLE"
+    ).astype(object)
+
+
+def _mentions(moyennes_gen, decisions, seuils_mention):
+    """Equivalent vectorise de mention (uniquement si ADMIS)."""
+    mentions = np.select(
+        [moyennes_gen >= seuil for seuil, _ in seuils_mention],
+        [libelle for _, libelle in seuils_mention],
+        default=None
+    ).astype(object)
+    mentions[decisions != "ADMIS"] = None
+    return mentions
+
+
+def _assembler(tableaux):
+    """Reconstruit les dicts au format de resultat_final."""
+    ids = tableaux["etudiants"].tolist()
+    mat_noms = tableaux["mat_noms"]
+    details = {etudiant_id: [] for etudiant_id in ids}
+
+    for e, m, moy, valide, cred in zip(
+        tableaux["g_etu"].tolist(), tableaux["g_mat"].tolist(),
+        tableaux["moyennes"].tolist(), tableaux["validees"].tolist(),
+        tableaux["credits"].tolist()
+    ):
+        details[ids[e]].append({
+            "matiere": mat_noms[m],
+            "moyenne": moy,
+            "validee": valide,
+            "credits": cred
+        })
+
+    return {
+        etudiant_id: {
+            "matieres": details[etudiant_id],
+            "moyenne_generale": moy_gen,
+            "credits_valides": cred,
+            "decision": decision,
+            "mention": mention_finale
+        }
+        for etudiant_id, moy_gen, cred, decision, mention_finale in zip(
+            ids, tableaux["moyennes_gen"].tolist(),
+            tableaux["credits_valides"].tolist(),
+            tableaux["decisions"].tolist(), tableaux["mentions"].tolist()
+        )
+    }
+
+
+# ----------------------------
+# B1.3 Point d'entree
+# ----------------------------
+def resultats_cohorte(classe_id=None, filiere_id=None, etudiant_ids=None,
+                      use_coefficients=True, annee=None):
+    """
+    Resultats de tous les etudiants d'une classe ou d'une filiere.
+
+    Retourne {etudiant_id: resultat} (meme format que resultat_final).
+    """
+    cohorte = charger_cohorte(
+        classe_id=classe_id,
+        filiere_id=filiere_id,
+        etudiant_ids=etudiant_ids,
+        annee=annee
+    )
+    return calculer_resultats(
+        cohorte, charger_matieres(), use_coefficients=use_coefficients
+    )
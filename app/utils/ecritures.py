@@ -0,0 +1,260 @@
+# app/utils/ecritures.py
+"""Suivi des ecritures sur les notes et matieres (evenements de session)."""
+
+from sqlalchemy import event, inspect
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.matiere import Matiere
+from app.models.note import Note
+from app.models.user import User
+
+# Colonnes de Matiere qui changent les resultats
+CHAMPS_MATIERE = ("nom", "coefficient", "credits")
+# Colonnes de User affichees avec les notes (carnets)
+CHAMPS_IDENTITE = ("nom", "prenom", "matricule")
+# Colonnes d'un enseignant affichees avec ses notes (page resultats)
+CHAMPS_ENSEIGNANT = ("nom", "prenom", "username", "profile_image")
+# Colonnes de Note conservees dans le detail des changements
+CHAMPS_NOTE = (
+    "etudiant_id", "matiere_id", "enseignant_id", "annee", "valeur", "absence", "appreciation"
+)
+
+# Abonnes : appeles dans la transaction (avant) ou apres le commit
+_abonnes_avant_commit = []
+_abonnes_apres_commit = []
+
+
+class Changements:
+    """Ce qui a ete modifie pendant une transaction."""
+
+    def __init__(self):
+        # Etudiants dont les notes ont change
+        self.etudiants = set()
+        # Matieres dont coefficient/credits/nom ont change
+        self.matieres = set()
+        # Enseignants auteurs des notes modifiees
+        self.enseignants = set()
+        # Etudiants crees ou changes de classe
+        self.affectations = set()
+        # Classe au debut de la transaction des etudiants changes de classe
+        # ou supprimes : {etudiant_id: classe_id}
+        self.classes = {}
+        # Etudiants dont le nom, prenom ou matricule a change
+        self.identites = set()
+        # Enseignants dont le nom, login ou photo a change, ou supprimes
+        self.identites_enseignants = set()
+        # Filieres quittees ou rejointes par une classe, ou d'une classe supprimee
+        self.filieres = set()
+        # Classes dont le carnet change (calculees avant commit, cache_resultats)
+        self.classes_touchees = set()
+        # Detail par note : {"id", "operation" (I/U/D), "avant", "apres"}
+        self.notes = []
+
+    def __bool__(self):
+        return bool(
+            self.etudiants or self.matieres or self.enseignants
+            or self.affectations or self.classes or self.identites
+            or self.identites_enseignants or self.filieres or self.notes
+        )
+
+
+def abonner_avant_commit(callback):
+    """callback(session, changements) execute dans la transaction."""
+    if callback not in _abonnes_avant_commit:
+        _abonnes_avant_commit.append(callback)
+    return callback
+
+
+def abonner_apres_commit(callback):
+    """callback(changements) execute une fois le commit termine."""
+    if callback not in _abonnes_apres_commit:
+        _abonnes_apres_commit.append(callback)
+    return callback
+
+
+def changements_en_cours(session):
+    """Changements accumules par la transaction courante."""
+    if "changements" not in session.info:
+        session.info["changements"] = Changements()
+    return session.info["changements"]
+
+
+def signaler(session, etudiants=(), matieres=(), enseignants=()):
+    """
+    Declare des changements faits hors ORM (requetes Core, upserts...),
+    pour que les abonnes les voient au prochain commit.
+    """
+    changements = changements_en_cours(session)
+    changements.etudiants.update(e for e in etudiants if e is not None)
+    changements.matieres.update(m for m in matieres if m is not None)
+    changements.enseignants.update(e for e in enseignants if e is not None)
+
+
+def signaler_note(session, operation, note_id, avant=None, apres=None):
+    """
+    Declare l'ecriture d'une note faite hors ORM.
+    avant / apres : dicts des colonnes CHAMPS_NOTE (None si absente).
+    """
+    changements = changements_en_cours(session)
+    changements.notes.append({
+        "id": note_id, "operation": operation, "avant": avant, "apres": apres
+    })
+    for etat in (avant, apres):
+        if etat:
+            signaler(session, [etat["etudiant_id"]], enseignants=[etat["enseignant_id"]])
+
+
+def _etat_note(obj, avant=False):
+    """Colonnes d'une note, apres modification ou (avant=True) avant."""
+    etat = {}
+    attrs = inspect(obj).attrs
+    for champ in CHAMPS_NOTE:
+        history = attrs[champ].history
+        if avant and history.deleted:
+            etat[champ] = history.deleted[0]
+        elif avant and history.added:
+            # Valeur auparavant vide (non chargee ou None)
+            etat[champ] = None
+        else:
+            etat[champ] = getattr(obj, champ)
+    return etat
+
+
+def _valeurs_avant_apres(obj, champ):
+    """Anciennes et nouvelles valeurs d'un attribut (historique ORM)."""
+    history = inspect(obj).attrs[champ].history
+    return [v for v in (*history.deleted, *history.added, *history.unchanged) if v is not None]
+
+
+def _classe_origine(obj):
+    """Classe d'un etudiant avant ses modifications non encore ecrites."""
+    history = inspect(obj).attrs.classe_id.history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return obj.classe_id
+
+
+# ----------------------------
+# Evenements de session
+# ----------------------------
+def _before_flush(session, flush_context, instances):
+    """
+    Note la classe d'origine des etudiants changes de classe ou supprimes,
+    tant que leur ligne est encore lisible (premier flush de la transaction).
+    """
+    changements = changements_en_cours(session)
+    for obj in session.dirty:
+        if (isinstance(obj, User) and obj.role == "ETUDIANT"
+                and inspect(obj).attrs.classe_id.history.has_changes()):
+            changements.classes.setdefault(obj.id, _classe_origine(obj))
+    for obj in session.deleted:
+        if isinstance(obj, User) and obj.role == "ETUDIANT":
+            changements.classes.setdefault(obj.id, _classe_origine(obj))
+
+
+def _garder_ancienne_classe(target, value, oldvalue, initiator):
+    """Rien a faire : active_history charge l'ancienne classe avant l'affectation."""
+
+
+def _after_flush(session, flush_context):
+    """Collecte ce qui vient d'etre ecrit (etat avant flush encore visible)."""
+    changements = changements_en_cours(session)
+
+    for obj in session.new:
+        if isinstance(obj, Note):
+            signaler_note(session, "I", obj.id, apres=_etat_note(obj))
+        elif isinstance(obj, User) and obj.role == "ETUDIANT":
+            changements.affectations.add(obj.id)
+
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, Note):
+            signaler(
+                session,
+                _valeurs_avant_apres(obj, "etudiant_id"),
+                enseignants=_valeurs_avant_apres(obj, "enseignant_id")
+            )
+            changements.notes.append({
+                "id": obj.id,
+                "operation": "U",
+                "avant": _etat_note(obj, avant=True),
+                "apres": _etat_note(obj),
+            })
+        elif isinstance(obj, Matiere):
+            state = inspect(obj)
+            if any(state.attrs[c].history.has_changes() for c in CHAMPS_MATIERE):
+                changements.matieres.add(obj.id)
+        elif isinstance(obj, User) and obj.role == "ETUDIANT":
+            state = inspect(obj)
+            if state.attrs.classe_id.history.has_changes():
+                changements.affectations.add(obj.id)
+            if any(state.attrs[c].history.has_changes() for c in CHAMPS_IDENTITE):
+                changements.identites.add(obj.id)
+        elif isinstance(obj, User) and obj.role == "ENSEIGNANT":
+            state = inspect(obj)
+            if any(state.attrs[c].history.has_changes() for c in CHAMPS_ENSEIGNANT):
+                changements.identites_enseignants.add(obj.id)
+        elif isinstance(obj, Classe):
+            if inspect(obj).attrs.filiere_id.history.has_changes():
+                changements.filieres.update(_valeurs_avant_apres(obj, "filiere_id"))
+
+    for obj in session.deleted:
+        if isinstance(obj, Note):
+            signaler_note(session, "D", obj.id, avant=_etat_note(obj, avant=True))
+        elif isinstance(obj, Matiere):
+            changements.matieres.add(obj.id)
+        elif isinstance(obj, User) and obj.role == "ETUDIANT":
+            changements.etudiants.add(obj.id)
+            changements.affectations.add(obj.id)
+        elif isinstance(obj, User) and obj.role == "ENSEIGNANT":
+            changements.identites_enseignants.add(obj.id)
+        elif isinstance(obj, Classe):
+            changements.filieres.update(_valeurs_avant_apres(obj, "filiere_id"))
+
+
+def _before_commit(session):
+    """Laisse les abonnes ecrire dans la meme transaction."""
+    if not _abonnes_avant_commit:
+        return
+    # Dernier flush pour collecter les objets encore en attente
+    session.flush()
+    changements = session.info.get("changements")
+    if not changements:
+        return
+    for callback in _abonnes_avant_commit:
+        callback(session, changements)
+
+
+def _after_commit(session):
+    """Previent les abonnes (caches memoire) une fois le commit valide."""
+    changements = session.info.pop("changements", None)
+    if not changements:
+        return
+    for callback in _abonnes_apres_commit:
+        callback(changements)
+
+
+def _after_rollback(session):
+    """Oublie les changements d'une transaction annulee."""
+    session.info.pop("changements", None)
+
+
+def installer():
+    """Branche les evenements sur la session Flask-SQLAlchemy (une fois)."""
+    hooks = (
+        ("before_flush", _before_flush),
+        ("after_flush", _after_flush),
+        ("before_commit", _before_commit),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    )
+    for nom, callback in hooks:
+        if not event.contains(db.session, nom, callback):
+            event.listen(db.session, nom, callback)
+    # Ancienne classe connue meme si l'attribut etait expire (commit precedent)
+    if not event.contains(User.classe_id, "set", _garder_ancienne_classe):
+        event.listen(User.classe_id, "set", _garder_ancienne_classe, active_history=True)
@@ -0,0 +1,199 @@
+# app/utils/import_notes.py
+"""Import de notes depuis un tableur (CSV ou XLSX) : lecture en flux, commits par lots."""
+
+import csv
+import os
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.saisie_notes import MESSAGE_DOUBLON, ecrire_notes, valider_note
+
+FORMATS = ("csv", "xlsx")
+# Colonnes attendues (ligne d'en-tete, casse indifferente)
+COLONNES = ("matricule", "matiere", "valeur", "absence", "appreciation")
+COLONNES_RAPPORT = ("ligne",) + COLONNES + ("motif",)
+# Valeurs de la colonne absence comprises comme "absent"
+VRAI = {"1", "x", "o", "oui", "true", "vrai", "abs", "absent"}
+
+
+def taille_lot():
+    """Notes ecrites par commit (NOTES_IMPORT_LOT)."""
+    return current_app.config.get("NOTES_IMPORT_LOT", 1000)
+
+
+# ----------------------------
+# K1.1 Lecture en flux
+# ----------------------------
+def _normaliser(entete):
+    return [str(c or "").strip().lower() for c in entete]
+
+
+def lire_csv(chemin):
+    """
+    Genere (numero de ligne, {colonne: valeur}, avancement 0-1).
+    Separateur ; ou , detecte sur l'en-tete.
+    """
+    taille = os.path.getsize(chemin) or 1
+    with open(chemin, encoding="utf-8-sig", newline="") as fichier:
+        entete = fichier.readline()
+        separateur = ";" if entete.count(";") >= entete.count(",") else ","
+        colonnes = _normaliser(next(csv.reader([entete], delimiter=separateur), []))
+        lecteur = csv.reader(fichier, delimiter=separateur)
+        for valeurs in lecteur:
+            if not any(v.strip() for v in valeurs):
+                continue
+            # line_num compte les lignes lues apres l'en-tete
+            yield lecteur.line_num + 1, dict(zip(colonnes, valeurs)), fichier.buffer.tell() / taille
+
+
+def lire_xlsx(chemin):
+    """Meme contrat que lire_csv, premiere feuille (openpyxl en lecture seule)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Import XLSX indisponible : installer openpyxl") from None
+
+    classeur = load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        colonnes = _normaliser(next(lignes, ()))
+        total = classeur.worksheets[0].max_row or 0
+        for numero, valeurs in enumerate(lignes, start=2):
+            if not any(v not in (None, "") for v in valeurs):
+                continue
+            yield numero, dict(zip(colonnes, valeurs)), numero / total if total else 0
+    finally:
+        classeur.close()
+
+
+LECTEURS = {"csv": lire_csv, "xlsx": lire_xlsx}
+
+
+# ----------------------------
+# K1.2 Validation et ecriture par lots
+# ----------------------------
+def _texte(valeur):
+    return "" if valeur is None else str(valeur).strip()
+
+
+def _index_etudiants():
+    """{matricule: id} de tous les etudiants, en une requete."""
+    return dict(db.session.execute(
+        select(User.matricule, User.id)
+        .where(User.role == "ETUDIANT", User.matricule.isnot(None))
+    ).all())
+
+
+def _notes_existantes(matiere_ids):
+    """Couples (etudiant, matiere) deja notes cette annee pour ces matieres."""
+    return set(db.session.execute(
+        select(Note.etudiant_id, Note.matiere_id).where(
+            Note.annee == annee_courante(), Note.matiere_id.in_(matiere_ids)
+        )
+    ).all())
+
+
+def importer_notes(chemin, format_fichier, enseignant, rapport, progression=None, lot=None):
+    """
+    Importe les notes d'un fichier pour un enseignant. Memes regles que
+    l'ajout d'une note : matiere attribuee, note 0-20 (vide si absent),
+    une seule note par matiere et par etudiant pour l'annee.
+
+    rapport : fichier texte ouvert ou sont ecrites les lignes rejetees (CSV),
+    en-tete compris s'il est vide.
+    progression : objet Progression d'un job (avancement entre deux commits).
+    Chaque lot valide enregistre son point de reprise (derniere ligne lue,
+    compteurs, taille du rapport) : un nouvel essai saute les lignes deja
+    traitees au lieu de les rejeter comme doublons.
+    Retourne {"lues", "importees", "rejetees"}.
+    """
+    if format_fichier not in LECTEURS:
+        raise ValueError(f"Format non pris en charge: {format_fichier}")
+    lot = lot or taille_lot()
+
+    # Index en memoire : matricules, matieres de l'enseignant, notes deja saisies
+    enseignant_id = enseignant.id
+    etudiants = _index_etudiants()
+    matieres = {}
+    for matiere in enseignant.matieres:
+        matieres[str(matiere.id)] = matiere.id
+        matieres[matiere.nom.strip().lower()] = matiere.id
+    deja_notees = _notes_existantes(set(matieres.values()))
+
+    reprise = progression.reprise if progression is not None else None
+    deja_lue = reprise["ligne"] if reprise else 0
+    ecrivain = csv.writer(rapport, delimiter=";")
+    if rapport.tell() == 0:
+        ecrivain.writerow(COLONNES_RAPPORT)
+    compteurs = {"lues": 0, "importees": 0, "rejetees": 0}
+    if reprise:
+        compteurs.update({cle: reprise[cle] for cle in compteurs})
+    en_attente = []
+    # Ligne du fichier de chaque note en attente : {(etudiant, matiere): (numero, ligne)}
+    sources = {}
+
+    def rejeter(numero, ligne, motif):
+        ecrivain.writerow([numero] + [_texte(ligne.get(c)) for c in COLONNES] + [motif])
+        compteurs["rejetees"] += 1
+
+    def ecrire(numero, avancement):
+        # Notes saisies entretemps (autre enseignant) : ignorees par ON CONFLICT
+        conflits = ecrire_notes(en_attente)
+        for note in conflits:
+            rejeter(*sources[(note["etudiant_id"], note["matiere_id"])], MESSAGE_DOUBLON)
+        compteurs["importees"] += len(en_attente) - len(conflits)
+        if progression is not None:
+            rapport.flush()
+            progression.point_de_reprise(dict(compteurs, ligne=numero, rapport=rapport.tell()))
+        db.session.commit()
+        en_attente.clear()
+        sources.clear()
+        if progression is not None:
+            progression.avancer(
+                int(100 * avancement), None,
+                f'{compteurs["lues"]} ligne(s) lue(s), {compteurs["importees"]} importee(s), '
+                f'{compteurs["rejetees"]} rejetee(s)'
+            )
+
+    numero, avancement = deja_lue, 0
+    for numero, ligne, avancement in LECTEURS[format_fichier](chemin):
+        if numero <= deja_lue:
+            continue
+        compteurs["lues"] += 1
+        etudiant_id = etudiants.get(_texte(ligne.get("matricule")))
+        if etudiant_id is None:
+            rejeter(numero, ligne, "Matricule inconnu")
+            continue
+        matiere_id = matieres.get(_texte(ligne.get("matiere")).lower())
+        if matiere_id is None:
+            rejeter(numero, ligne, "Matiere non attribuee a cet enseignant")
+            continue
+        if (etudiant_id, matiere_id) in deja_notees:
+            rejeter(numero, ligne, MESSAGE_DOUBLON)
+            continue
+
+        absence = _texte(ligne.get("absence")).lower() in VRAI
+        valeur, erreur = valider_note(_texte(ligne.get("valeur")).replace(",", "."), absence)
+        if erreur:
+            rejeter(numero, ligne, erreur)
+            continue
+
+        deja_notees.add((etudiant_id, matiere_id))
+        sources[(etudiant_id, matiere_id)] = (numero, ligne)
+        en_attente.append({
+            "etudiant_id": etudiant_id,
+            "matiere_id": matiere_id,
+            "enseignant_id": enseignant_id,
+            "valeur": valeur,
+            "absence": absence,
+            "appreciation": _texte(ligne.get("appreciation")) or None,
+        })
+        if len(en_attente) >= lot:
+            ecrire(numero, avancement)
+
+    ecrire(numero, avancement)
+    return compteurs
@@ -0,0 +1,448 @@
+# app/utils/jobs.py
+"""File de taches de fond dans la table jobs, executees par `flask worker`."""
+
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models.job import ANNULE, ECHEC, EN_ATTENTE, EN_COURS, TERMINE, Job
+
+# Attente avant un nouvel essai : DELAI_REESSAI * 2^(tentative - 1) secondes
+DELAI_REESSAI = 5
+# Ecart minimal entre deux ecritures de progression (secondes)
+INTERVALLE_PROGRESSION = 0.5
+# Renouvellements du bail par duree de bail (JOBS_BAIL)
+BATTEMENTS_PAR_BAIL = 4
+
+# Taches connues : {type: fonction(progression, **parametres)}
+_taches = {}
+
+
+class TacheAnnulee(Exception):
+    """Levee dans la tache quand une annulation a ete demandee."""
+
+
+class BailPerdu(Exception):
+    """Levee dans la tache quand son job a ete repris par un autre worker."""
+
+
+def _a_moi(job_id, worker):
+    """Job encore EN_COURS chez ce worker : seule condition pour y ecrire."""
+    return and_(Job.id == job_id, Job.statut == EN_COURS, Job.worker == worker)
+
+
+def tache(type_tache):
+    """
+    Declare une fonction de tache. Elle recoit un objet Progression et les
+    parametres du job, et retourne (chemin, nom, mimetype) ou None.
+    """
+    def decorateur(fonction):
+        _taches[type_tache] = fonction
+        return fonction
+    return decorateur
+
+
+def types_taches():
+    return sorted(_taches)
+
+
+# ----------------------------
+# I1.1 Mise en file et suivi
+# ----------------------------
+def enfiler(type_tache, parametres=None, demandeur_id=None, max_tentatives=3):
+    """Ajoute un job en attente (commit inclus) et le retourne."""
+    if type_tache not in _taches:
+        raise ValueError(f"Type de tache inconnu: {type_tache}")
+    job = Job(
+        type=type_tache,
+        parametres=parametres or {},
+        demandeur_id=demandeur_id,
+        max_tentatives=max_tentatives,
+        disponible_le=datetime.utcnow(),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def duree_bail():
+    """Secondes sans signe de vie apres lesquelles un job EN_COURS est repris."""
+    return current_app.config.get("JOBS_BAIL", 60)
+
+
+def abandonne(job):
+    """Job EN_COURS dont le worker ne renouvelle plus le bail (arrete ou plante)."""
+    if job.statut != EN_COURS:
+        return False
+    vu_le = job.battement_le or job.demarre_le
+    return vu_le is None or vu_le < datetime.utcnow() - timedelta(seconds=duree_bail())
+
+
+def annuler(job):
+    """
+    Annule tout de suite un job en attente ou abandonne, sinon le signale
+    a la tache.
+    """
+    if job.statut == EN_ATTENTE or abandonne(job):
+        job.statut = ANNULE
+        job.termine_le = datetime.utcnow()
+    elif job.statut == EN_COURS:
+        job.annulation_demandee = True
+    db.session.commit()
+
+
+def relancer(job):
+    """
+    Remet en file un job echoue, annule ou abandonne (compteur d'essais a
+    zero). Le point de reprise est garde : les ecritures deja validees ne
+    sont pas refaites.
+    """
+    if job.statut not in (ECHEC, ANNULE) and not abandonne(job):
+        return False
+    job.statut = EN_ATTENTE
+    job.tentatives = 0
+    job.progression = 0
+    job.message = None
+    job.erreur = None
+    job.annulation_demandee = False
+    job.disponible_le = datetime.utcnow()
+    job.termine_le = None
+    db.session.commit()
+    return True
+
+
+def dossier_job(job_id):
+    """Dossier des fichiers produits par un job."""
+    return os.path.join(current_app.config["JOBS_DIR"], str(job_id))
+
+
+def fichier_entree(nom):
+    """
+    Chemin ou deposer un fichier a traiter par une tache (upload) ; a passer
+    dans parametres["fichier"] pour qu'il soit supprime avec le job.
+    """
+    dossier = os.path.join(current_app.config["JOBS_DIR"], "entrees")
+    os.makedirs(dossier, exist_ok=True)
+    return os.path.join(dossier, f"{uuid.uuid4().hex}_{nom}")
+
+
+def etat_job(job):
+    """Etat serialisable (suivi par polling)."""
+    return {
+        "id": job.id,
+        "type": job.type,
+        "statut": job.statut,
+        "progression": job.progression,
+        "message": job.message,
+        "erreur": job.erreur if job.statut == ECHEC else None,
+        "tentatives": job.tentatives,
+        "fichier_pret": job.statut == TERMINE and bool(job.fichier),
+        "cree_le": job.cree_le.isoformat() if job.cree_le else None,
+        "termine_le": job.termine_le.isoformat() if job.termine_le else None,
+    }
+
+
+# ----------------------------
+# I1.2 Execution
+# ----------------------------
+class Progression:
+    """
+    Passe a la tache : avancement, dossier de sortie, annulation.
+    La progression est ecrite sur une connexion a part pour ne pas
+    valider le travail en cours de la tache (appeler avancer() entre
+    deux commits quand la tache ecrit en base).
+    """
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.worker = job.worker
+        # Etat laisse par un essai precedent (None au premier essai)
+        self.reprise = job.reprise
+        self._derniere_ecriture = 0.0
+        self._dernier_pourcentage = -1
+
+    def fichier_sortie(self, nom):
+        dossier = dossier_job(self.job_id)
+        os.makedirs(dossier, exist_ok=True)
+        return os.path.join(dossier, nom)
+
+    def point_de_reprise(self, etat):
+        """
+        Enregistre etat (dict JSON) dans la transaction de la tache : il est
+        valide avec son prochain commit et relu par un nouvel essai.
+        Leve BailPerdu (la transaction doit etre annulee) si le job a ete
+        repris par un autre worker.
+        """
+        if not db.session.execute(
+            update(Job).where(_a_moi(self.job_id, self.worker)).values(reprise=etat)
+        ).rowcount:
+            raise BailPerdu()
+        self.reprise = etat
+
+    def avancer(self, fait, total=None, message=None):
+        """
+        fait / total (ou un pourcentage si total est None).
+        Leve TacheAnnulee si l'annulation a ete demandee, BailPerdu si le
+        job a ete repris par un autre worker.
+        """
+        pourcentage = int(100 * fait / total) if total else int(fait)
+        pourcentage = max(0, min(pourcentage, 99))
+        maintenant = time.monotonic()
+        if (pourcentage == self._dernier_pourcentage and message is None
+                and maintenant - self._derniere_ecriture < INTERVALLE_PROGRESSION):
+            return
+        valeurs = {"progression": pourcentage, "battement_le": datetime.utcnow()}
+        if message is not None:
+            valeurs["message"] = message[:255]
+        with db.engine.begin() as connexion:
+            a_moi = connexion.execute(
+                update(Job).where(_a_moi(self.job_id, self.worker)).values(**valeurs)
+            ).rowcount
+            annulation = connexion.execute(
+                select(Job.annulation_demandee).where(Job.id == self.job_id)
+            ).scalar()
+        if not a_moi:
+            raise BailPerdu()
+        self._derniere_ecriture = maintenant
+        self._dernier_pourcentage = pourcentage
+        if annulation:
+            raise TacheAnnulee()
+
+
+def liberer_abandonnes():
+    """
+    Jobs EN_COURS dont le bail a expire (worker arrete ou plante) : remis en
+    file, ou ANNULE si l'annulation etait demandee, ECHEC si les essais sont
+    epuises. Retourne le nombre de jobs liberes.
+    """
+    limite = datetime.utcnow() - timedelta(seconds=duree_bail())
+    expire = and_(
+        Job.statut == EN_COURS,
+        func.coalesce(Job.battement_le, Job.demarre_le) < limite,
+    )
+    # Lecture d'abord : pas de verrou d'ecriture a chaque attente du worker
+    job_ids = db.session.execute(select(Job.id).where(expire)).scalars().all()
+    if not job_ids:
+        return 0
+
+    maintenant = datetime.utcnow()
+    fin = (
+        (Job.annulation_demandee.is_(True), ANNULE),
+        (Job.tentatives >= Job.max_tentatives, ECHEC),
+    )
+    liberes = db.session.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), expire)
+        .values(
+            statut=case(*fin, else_=EN_ATTENTE),
+            termine_le=case(*((condition, maintenant) for condition, _ in fin), else_=None),
+            disponible_le=maintenant,
+            message="Worker interrompu pendant l'execution",
+            erreur=f"Bail expire : aucun signe de vie du worker depuis {duree_bail():g} s",
+        )
+    ).rowcount
+    db.session.commit()
+    if liberes:
+        current_app.logger.warning("%s job(s) abandonne(s) libere(s)", liberes)
+    return liberes
+
+
+def reserver(nom_worker):
+    """
+    Prend le prochain job disponible, apres avoir libere les jobs abandonnes.
+    La mise a jour conditionnelle (statut encore EN_ATTENTE) evite que deux
+    workers prennent le meme.
+    """
+    liberer_abandonnes()
+    while True:
+        maintenant = datetime.utcnow()
+        job_id = db.session.execute(
+            select(Job.id)
+            .where(Job.statut == EN_ATTENTE, Job.disponible_le <= maintenant)
+            .order_by(Job.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        pris = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.statut == EN_ATTENTE)
+            .values(
+                statut=EN_COURS,
+                worker=nom_worker,
+                demarre_le=maintenant,
+                battement_le=maintenant,
+                tentatives=Job.tentatives + 1,
+                progression=0,
+                erreur=None,
+            )
+        ).rowcount
+        db.session.commit()
+        if pris:
+            return db.session.get(Job, job_id)
+
+
+def _battre(app, job_id, worker, arret, intervalle):
+    """
+    Renouvelle le bail du job (battement_le) jusqu'a ce que arret soit leve,
+    ou que le job ait ete repris par un autre worker.
+    """
+    with app.app_context():
+        while not arret.wait(intervalle):
+            try:
+                with db.engine.begin() as connexion:
+                    a_moi = connexion.execute(
+                        update(Job)
+                        .where(_a_moi(job_id, worker))
+                        .values(battement_le=datetime.utcnow())
+                    ).rowcount
+            except OperationalError:
+                # Base occupee (ecriture de la tache) : battement suivant
+                app.logger.warning("Bail du job %s non renouvele", job_id)
+                continue
+            if not a_moi:
+                return
+
+
+@contextmanager
+def bail(job_id, worker):
+    """Renouvelle le bail du job dans un fil a part tant que le bloc s'execute."""
+    arret = threading.Event()
+    fil = threading.Thread(
+        target=_battre,
+        args=(current_app._get_current_object(), job_id, worker, arret,
+              duree_bail() / BATTEMENTS_PAR_BAIL),
+        name=f"bail-{job_id}", daemon=True,
+    )
+    fil.start()
+    try:
+        yield
+    finally:
+        arret.set()
+        fil.join()
+
+
+def executer(job):
+    """
+    Execute un job reserve et enregistre son issue (succes, nouvel essai,
+    echec). L'issue n'est ecrite que si le job est encore a ce worker (mise
+    a jour conditionnelle, comme reserver) : repris entre-temps par un autre
+    worker (bail expire), l'essai est abandonne sans rien ecrire.
+    """
+    job_id, worker = job.id, job.worker
+    fonction = _taches.get(job.type)
+    try:
+        if fonction is None:
+            raise LookupError(f"Type de tache inconnu: {job.type}")
+        with bail(job_id, worker):
+            sortie = fonction(Progression(job), **job.parametres)
+    except BailPerdu:
+        db.session.rollback()
+        issue = None
+    except TacheAnnulee:
+        db.session.rollback()
+        issue = {"statut": ANNULE, "message": "Annule pendant l'execution"}
+    except Exception:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        issue = {"erreur": traceback.format_exc(limit=5)}
+        current_app.logger.exception("Job %s (%s) en erreur", job_id, job.type)
+        if fonction is not None and job.tentatives < job.max_tentatives:
+            issue.update(
+                statut=EN_ATTENTE,
+                disponible_le=datetime.utcnow() + timedelta(
+                    seconds=DELAI_REESSAI * 2 ** (job.tentatives - 1)
+                ),
+                message=f"Nouvel essai ({job.tentatives}/{job.max_tentatives})",
+            )
+        else:
+            issue["statut"] = ECHEC
+    else:
+        issue = {"statut": TERMINE, "progression": 100}
+        if sortie:
+            issue["fichier"], issue["nom_fichier"], issue["mimetype"] = sortie
+
+    if issue is not None:
+        if issue["statut"] in (TERMINE, ECHEC, ANNULE):
+            issue["termine_le"] = datetime.utcnow()
+        if db.session.execute(update(Job).where(_a_moi(job_id, worker)).values(**issue)).rowcount:
+            db.session.commit()
+        else:
+            # Travail non valide de la tache abandonne avec l'issue
+            db.session.rollback()
+            issue = None
+    if issue is None:
+        current_app.logger.warning(
+            "Job %s repris par un autre worker : essai de %s abandonne", job_id, worker
+        )
+    return db.session.get(Job, job_id).statut
+
+
+# ----------------------------
+# I1.3 Worker
+# ----------------------------
+def lancer_worker(app, concurrence=None, une_fois=False, attente=1.0, arret=None):
+    """
+    Lance `concurrence` fils d'execution qui prennent les jobs en file.
+    une_fois : s'arrete quand la file est vide (cron, tests).
+    Les taches lourdes (bulletins) ont leur propre pool de processus.
+    """
+    concurrence = concurrence or app.config.get("JOBS_CONCURRENCE", 2)
+    arret = arret or threading.Event()
+    nom = f"{socket.gethostname()}:{os.getpid()}"
+
+    def boucle(numero):
+        with app.app_context():
+            while not arret.is_set():
+                job = reserver(f"{nom}/{numero}")
+                if job is None:
+                    if une_fois:
+                        return
+                    arret.wait(attente)
+                    continue
+                executer(job)
+                db.session.remove()
+
+    fils = [
+        threading.Thread(target=boucle, args=(numero,), name=f"worker-{numero}", daemon=True)
+        for numero in range(1, concurrence + 1)
+    ]
+    for f in fils:
+        f.start()
+    try:
+        for f in fils:
+            while f.is_alive():
+                f.join(0.5)
+    except KeyboardInterrupt:
+        arret.set()
+        for f in fils:
+            f.join()
+
+
+def purger_jobs(jours=7):
+    """Supprime les jobs termines depuis plus de `jours` jours et leurs fichiers."""
+    limite = datetime.utcnow() - timedelta(days=jours)
+    anciens = Job.query.filter(
+        Job.statut.in_((TERMINE, ECHEC, ANNULE)), Job.termine_le < limite
+    ).all()
+    for job in anciens:
+        shutil.rmtree(dossier_job(job.id), ignore_errors=True)
+        # Fichier depose pour la tache (import) : supprime avec le job
+        entree = (job.parametres or {}).get("fichier")
+        if entree and os.path.exists(entree):
+            os.remove(entree)
+        db.session.delete(job)
+    db.session.commit()
+    return len(anciens)
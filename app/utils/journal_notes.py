@@ -0,0 +1,105 @@
+# app/utils/journal_notes.py
+"""Journal des ecritures de notes (note_changes) et lecture incrementale par curseur."""
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import make_url
+
+from app.extensions import db
+from app.models.note_change import SUPPRESSION, NoteChange
+from app.utils.ecritures import CHAMPS_NOTE, abonner_avant_commit
+
+# Changements rendus par appel de lire_changements
+LOT_CHANGEMENTS = 500
+LOT_CHANGEMENTS_MAX = 5000
+# Moteurs ou seq suit l'ordre des commits (voir _serialiser)
+MOTEURS_JOURNAL = ("sqlite", "postgresql")
+# Cle du verrou consultatif PostgreSQL des ecritures du journal
+VERROU_JOURNAL = 0x6E6F7465
+
+
+# ----------------------------
+# L1.1 Ecriture (meme transaction que les notes)
+# ----------------------------
+def _serialiser(session):
+    """
+    Un lecteur ne doit jamais voir seq N+1 valide avant seq N : les
+    transactions qui journalisent prennent seq une par une, jusqu'au commit.
+    SQLite serialise deja les ecritures ; PostgreSQL prend un verrou
+    consultatif libere au commit (ou rollback).
+
+    Cout : sous PostgreSQL, les transactions qui ecrivent des notes se
+    suivent une a une sur ce verrou. _journaliser est donc abonne en dernier
+    (apres student_results, statistiques et versions des caches) : le verrou
+    n'est tenu que de l'insertion dans le journal jusqu'au commit.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(func.pg_advisory_xact_lock(VERROU_JOURNAL)))
+
+
+def _journaliser(session, changements):
+    """
+    Abonne avant commit : une ligne par ecriture de note, ORM ou Core
+    (signaler_note), numerotee dans l'ordre des commits.
+    """
+    if not changements.notes:
+        return
+    lignes = []
+    for delta in changements.notes:
+        if delta["operation"] == SUPPRESSION:
+            # Pierre tombale : ids seulement (filtrage etudiant / enseignant)
+            avant = delta["avant"] or {}
+            lignes.append({
+                "operation": SUPPRESSION,
+                "note_id": delta["id"],
+                "etudiant_id": avant.get("etudiant_id"),
+                "enseignant_id": avant.get("enseignant_id"),
+            })
+        else:
+            lignes.append(dict(
+                {champ: delta["apres"][champ] for champ in CHAMPS_NOTE},
+                operation=delta["operation"],
+                note_id=delta["id"],
+            ))
+    _serialiser(session)
+    session.execute(insert(NoteChange), lignes)
+
+
+def verifier_moteur(uri):
+    """Refuse un moteur ou seq ne suivrait pas l'ordre des commits (lignes sautees)."""
+    moteur = make_url(uri).get_backend_name()
+    if moteur not in MOTEURS_JOURNAL:
+        raise RuntimeError(
+            f"Journal des notes (note_changes) non pris en charge sous {moteur} : "
+            f"moteurs acceptes {', '.join(MOTEURS_JOURNAL)}"
+        )
+
+
+def enregistrer(app):
+    """Abonne le journal aux ecritures de notes (moteur verifie au demarrage)."""
+    verifier_moteur(app.config["SQLALCHEMY_DATABASE_URI"])
+    abonner_avant_commit(_journaliser)
+
+
+# ----------------------------
+# L1.2 Lecture incrementale
+# ----------------------------
+def lire_changements(depuis=0, limite=LOT_CHANGEMENTS, etudiant_id=None, enseignant_id=None):
+    """
+    Changements de seq > depuis, au plus `limite` lignes lues, filtres sur
+    un etudiant ou un enseignant. Plusieurs ecritures d'une meme note dans
+    le lot sont reduites a la derniere (etat final ou suppression).
+    Retourne (changements, curseur suivant, fini).
+    """
+    query = select(NoteChange).where(NoteChange.seq > depuis)
+    if etudiant_id is not None:
+        query = query.where(NoteChange.etudiant_id == etudiant_id)
+    if enseignant_id is not None:
+        query = query.where(NoteChange.enseignant_id == enseignant_id)
+    lignes = db.session.execute(query.order_by(NoteChange.seq).limit(limite)).scalars().all()
+
+    derniers = {}
+    for ligne in lignes:
+        derniers.pop(ligne.note_id, None)
+        derniers[ligne.note_id] = ligne
+    curseur = lignes[-1].seq if lignes else depuis
+    return list(derniers.values()), curseur, len(lignes) < limite
@@ -0,0 +1,60 @@
+# app/utils/notes_compactes.py
+"""Enregistrements legers de notes pour les calculs (sans ORM)."""
+
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+
+
+class MatiereCompacte(namedtuple("MatiereCompacte", ("id", "nom", "coefficient", "credits"))):
+    """Colonnes de Matiere utiles au calcul (partagee par toutes ses notes)."""
+    __slots__ = ()
+
+
+class NoteCompacte(namedtuple("NoteCompacte", ("valeur", "matiere"))):
+    """
+    Note reduite a ce que lit app/utils/calculs.py :
+    note.valeur et note.matiere (coefficient, credits, nom).
+    """
+    __slots__ = ()
+
+    @property
+    def matiere_id(self):
+        return self.matiere.id
+
+
+def charger_notes_compactes(etudiant_id=None, annee=None):
+    """
+    Charge les notes (d'un etudiant, ou toutes) avec une requete Core :
+    pas d'identity map, pas de relation paresseuse.
+    Meme ordre que Note.query (par id de note), annee en cours par defaut.
+    """
+    stmt = (
+        select(
+            Note.valeur,
+            Matiere.id,
+            Matiere.nom,
+            Matiere.coefficient,
+            Matiere.credits,
+        )
+        .join(Matiere, Matiere.id == Note.matiere_id)
+        .where(Note.annee == (annee or annee_courante()))
+        .order_by(Note.id)
+    )
+    if etudiant_id is not None:
+        stmt = stmt.where(Note.etudiant_id == etudiant_id)
+
+    matieres = {}
+    notes = []
+    for valeur, matiere_id, nom, coefficient, credits in db.session.execute(stmt):
+        matiere = matieres.get(matiere_id)
+        if matiere is None:
+            matiere = matieres[matiere_id] = MatiereCompacte(
+                matiere_id, nom, coefficient, credits
+            )
+        notes.append(NoteCompacte(valeur, matiere))
+    return notes
@@ -0,0 +1,101 @@
+# app/utils/resultats.py
+"""Point d'entree unique des resultats d'un etudiant (choix du moteur)."""
+
+from flask import current_app
+
+from app.utils.cache_resultats import cache_cartes, memoiser
+from app.utils.calculs import resultat_final
+from app.utils.calculs_sql import (
+    agregats_etudiant,
+    resultat_depuis_agregats,
+    resultat_final_sql,
+)
+from app.utils.notes_compactes import charger_notes_compactes
+from app.utils.resultats_materialises import resultat_materialise
+
+# Moteurs disponibles pour RESULTATS_ENGINE
+MOTEURS = ("python", "sql", "table")
+
+
+def use_coefficients() -> bool:
+    """Active ou non les coefficients dans les calculs."""
+    return current_app.config.get("USE_COEFFICIENTS", True)
+
+
+def moteur_resultats() -> str:
+    """Moteur configure (python par defaut)."""
+    moteur = current_app.config.get("RESULTATS_ENGINE", "python")
+    if moteur not in MOTEURS:
+        raise ValueError(
+            f"RESULTATS_ENGINE invalide: {moteur}. Attendu: {', '.join(MOTEURS)}."
+        )
+    return moteur
+
+
+def resultat_python(etudiant_id, use_coefficients=True):
+    """Calcul Python : notes compactes (sans ORM) puis resultat_final."""
+    notes = charger_notes_compactes(etudiant_id)
+    return resultat_final(notes, use_coefficients=use_coefficients)
+
+
+def resultat_etudiant(etudiant_id):
+    """
+    Resultat complet d'un etudiant selon le moteur configure.
+    Memorise jusqu'a la prochaine ecriture de ses notes ou des matieres.
+    """
+    coefficients = use_coefficients()
+    return memoiser(
+        etudiant_id,
+        coefficients,
+        lambda: calculer_resultat(etudiant_id, coefficients)
+    )
+
+
+def calculer_resultat(etudiant_id, use_coefficients=True):
+    """Calcule le resultat sans passer par le cache."""
+    moteur = moteur_resultats()
+    if moteur == "table":
+        # Ligne absente (table pas encore reconstruite) : calcul direct
+        resultat = resultat_materialise(etudiant_id, use_coefficients=use_coefficients)
+        if resultat is not None:
+            return resultat
+        moteur = "sql"
+    if moteur == "sql":
+        return resultat_final_sql(etudiant_id, use_coefficients=use_coefficients)
+    return resultat_python(etudiant_id, use_coefficients=use_coefficients)
+
+
+def cartes_etudiant(etudiant_id, cle=None):
+    """
+    Cartes du dashboard : matieres, notes, absences, moyenne, credits, decision.
+    Memorisees comme resultat_etudiant (cle deja lue : cles_etudiant) ;
+    une requete d'agregats sinon.
+    """
+    coefficients = use_coefficients()
+    return memoiser(
+        etudiant_id,
+        coefficients,
+        lambda: calculer_cartes(etudiant_id, coefficients),
+        cache=cache_cartes,
+        cle=cle
+    )
+
+
+def calculer_cartes(etudiant_id, use_coefficients=True):
+    """
+    Une ligne par matiere (moyenne, nb notes, nb absences) suffit aux cartes.
+    Le resultat obtenu au passage est celui du moteur "sql" : il n'alimente
+    le cache de resultat_etudiant que si c'est le moteur configure.
+    """
+    agregats = agregats_etudiant(etudiant_id)
+    resultat = resultat_depuis_agregats(agregats, use_coefficients=use_coefficients)
+    if moteur_resultats() == "sql":
+        memoiser(etudiant_id, use_coefficients, lambda: resultat)
+    return {
+        "matieres": len(resultat["matieres"]),
+        "notes": sum(nb_notes for _, _, _, _, nb_notes, _ in agregats),
+        "absences": sum(nb_absences or 0 for _, _, _, _, _, nb_absences in agregats),
+        "moyenne": resultat["moyenne_generale"],
+        "credits": resultat["credits_valides"],
+        "decision": resultat["decision"]
+    }
@@ -0,0 +1,296 @@
+# app/utils/resultats_materialises.py
+"""Table student_results : resultats precalcules, tenus a jour par les ecritures."""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, select
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.note import Note, annee_courante
+from app.models.resultat import StudentResult, StudentResultMatiere
+from app.models.user import User
+from app.models.version_cache import VersionCache
+from app.utils.cache_resultats import portees_classement
+from app.utils.cohorte import calculer_tableaux, charger_cohorte, charger_matieres
+from app.utils.ecritures import abonner_avant_commit
+from app.utils.saisie_notes import INSERTS_DIALECTE
+
+
+def _use_coefficients() -> bool:
+    return current_app.config.get("USE_COEFFICIENTS", True)
+
+
+# ----------------------------
+# D1.1 Recalcul d'un lot d'etudiants
+# ----------------------------
+def rafraichir(session, etudiant_ids, matieres=None):
+    """
+    Recalcule et remplace les lignes materialisees des etudiants donnes.
+
+    Les etudiants supprimes (ou sans role ETUDIANT) perdent leurs lignes.
+    """
+    etudiant_ids = sorted(set(etudiant_ids))
+    if not etudiant_ids:
+        return 0
+
+    use_coefficients = _use_coefficients()
+    cohorte = charger_cohorte(etudiant_ids=etudiant_ids)
+    tableaux = calculer_tableaux(
+        cohorte,
+        matieres if matieres is not None else charger_matieres(),
+        use_coefficients=use_coefficients
+    )
+
+    ids = tableaux["etudiants"].tolist()
+    session.execute(
+        delete(StudentResultMatiere)
+        .where(StudentResultMatiere.etudiant_id.in_(etudiant_ids))
+    )
+    partis = set(etudiant_ids) - set(ids)
+    if partis:
+        session.execute(
+            delete(StudentResult).where(StudentResult.etudiant_id.in_(partis))
+        )
+    if not ids:
+        return 0
+
+    now = datetime.utcnow()
+    lignes = [
+        {
+            "etudiant_id": etudiant_id,
+            "moyenne_generale": moyenne,
+            "credits_valides": credits,
+            "decision": decision,
+            "mention": mention_finale,
+            "nb_notes": nb_notes,
+            "nb_absences": nb_absences,
+            "use_coefficients": use_coefficients,
+            "annee": annee_courante(),
+            "version": 1,
+            "updated_at": now,
+        }
+        for etudiant_id, moyenne, credits, decision, mention_finale, nb_notes, nb_absences
+        in zip(
+            ids,
+            tableaux["moyennes_gen"].tolist(),
+            tableaux["credits_valides"].tolist(),
+            tableaux["decisions"].tolist(),
+            tableaux["mentions"].tolist(),
+            tableaux["nb_notes"].tolist(),
+            tableaux["nb_absences"].tolist(),
+        )
+    ]
+    _ecrire_entetes(session, lignes)
+
+    mat_ids = tableaux["mat_ids"].tolist()
+    mat_noms = tableaux["mat_noms"]
+    details = []
+    rang = 0
+    precedent = None
+    for e, m, moyenne, validee, credits in zip(
+        tableaux["g_etu"].tolist(), tableaux["g_mat"].tolist(),
+        tableaux["moyennes"].tolist(), tableaux["validees"].tolist(),
+        tableaux["credits"].tolist()
+    ):
+        # Rang remis a zero a chaque nouvel etudiant
+        rang = rang + 1 if e == precedent else 0
+        precedent = e
+        details.append({
+            "etudiant_id": ids[e],
+            "matiere_id": mat_ids[m],
+            "rang": rang,
+            "matiere_nom": mat_noms[m],
+            "moyenne": moyenne,
+            "validee": validee,
+            "credits": credits,
+        })
+    if details:
+        session.execute(insert(StudentResultMatiere), details)
+
+    return len(ids)
+
+
+def _ecrire_entetes(session, lignes):
+    """
+    Upsert des lignes student_results sans lecture prealable : version 1
+    pour une nouvelle ligne, version + 1 sur une ligne existante (ON CONFLICT).
+    """
+    table = StudentResult.__table__
+    fabrique = INSERTS_DIALECTE.get(session.get_bind().dialect.name)
+    if fabrique is not None:
+        requete = fabrique(table)
+        colonnes = [c for c in lignes[0] if c not in ("etudiant_id", "version")]
+        session.execute(requete.on_conflict_do_update(
+            index_elements=["etudiant_id"],
+            set_={
+                **{colonne: requete.excluded[colonne] for colonne in colonnes},
+                "version": table.c.version + 1,
+            },
+        ), lignes)
+        return
+    # Autre moteur : versions lues, lignes remplacees
+    ids = [ligne["etudiant_id"] for ligne in lignes]
+    versions = dict(session.execute(
+        select(table.c.etudiant_id, table.c.version).where(table.c.etudiant_id.in_(ids))
+    ).all())
+    session.execute(delete(table).where(table.c.etudiant_id.in_(ids)))
+    for ligne in lignes:
+        ligne["version"] = versions.get(ligne["etudiant_id"], 0) + 1
+    session.execute(insert(table), lignes)
+
+
+def _etudiants_concernes(session, changements):
+    """Etudiants a recalculer apres une transaction."""
+    etudiants = set(changements.etudiants)
+    if changements.matieres:
+        # Un changement de coefficient/credits touche tous les etudiants notes
+        etudiants.update(session.execute(
+            select(Note.etudiant_id)
+            .where(Note.matiere_id.in_(changements.matieres))
+            .distinct()
+        ).scalars())
+    if changements.identites_enseignants:
+        # Nom et photo de l'enseignant affiches avec ses notes (ETag des pages)
+        etudiants.update(session.execute(
+            select(Note.etudiant_id)
+            .where(Note.enseignant_id.in_(changements.identites_enseignants))
+            .distinct()
+        ).scalars())
+    return etudiants
+
+
+def _apres_ecritures(session, changements):
+    """Abonne avant commit : garde student_results synchrone avec notes."""
+    etudiants = _etudiants_concernes(session, changements)
+    if etudiants:
+        rafraichir(session, etudiants)
+
+
+def enregistrer():
+    """Abonne la materialisation aux ecritures de notes/matieres."""
+    abonner_avant_commit(_apres_ecritures)
+
+
+# ----------------------------
+# D1.2 Reconstruction complete (par lots)
+# ----------------------------
+def reconstruire(taille_lot=500):
+    """
+    Reconstruit toute la table par lots d'etudiants (pagination par id).
+    Un commit par lot pour ne pas garder une transaction geante.
+    """
+    session = db.session
+    matieres = charger_matieres()
+    dernier_id = 0
+    total = 0
+
+    while True:
+        lot = session.execute(
+            select(User.id)
+            .where(User.role == "ETUDIANT", User.id > dernier_id)
+            .order_by(User.id)
+            .limit(taille_lot)
+        ).scalars().all()
+        if not lot:
+            break
+        total += rafraichir(session, lot, matieres=matieres)
+        session.commit()
+        dernier_id = lot[-1]
+        yield total
+
+
+# ----------------------------
+# D1.3 Lecture
+# ----------------------------
+def resultat_materialise(etudiant_id, use_coefficients=True):
+    """
+    Lit le resultat materialise (format resultat_final) en une requete.
+    Retourne None si la ligne manque ou a ete calculee avec un autre
+    parametre de coefficients ou pour une autre annee.
+    """
+    rows = (
+        db.session.query(StudentResult, StudentResultMatiere)
+        .outerjoin(
+            StudentResultMatiere,
+            StudentResultMatiere.etudiant_id == StudentResult.etudiant_id
+        )
+        .filter(StudentResult.etudiant_id == etudiant_id)
+        .order_by(StudentResultMatiere.rang)
+        .all()
+    )
+    if not rows:
+        return None
+
+    entete = rows[0][0]
+    if entete.use_coefficients != use_coefficients or entete.annee != annee_courante():
+        return None
+
+    return {
+        "matieres": [
+            {
+                "matiere": detail.matiere_nom,
+                "moyenne": detail.moyenne,
+                "validee": detail.validee,
+                "credits": detail.credits
+            }
+            for _, detail in rows if detail is not None
+        ],
+        "moyenne_generale": entete.moyenne_generale,
+        "credits_valides": entete.credits_valides,
+        "decision": entete.decision,
+        "mention": entete.mention
+    }
+
+
+def versions_cohorte(classe_id=None, filiere_id=None):
+    """{etudiant_id: version student_results (0 sans ligne)} d'une classe ou filiere."""
+    query = (
+        select(User.id, func.coalesce(StudentResult.version, 0))
+        .select_from(User)
+        .outerjoin(StudentResult, StudentResult.etudiant_id == User.id)
+        .where(User.role == "ETUDIANT")
+    )
+    if classe_id is not None:
+        query = query.where(User.classe_id == classe_id)
+    else:
+        query = query.join(Classe, Classe.id == User.classe_id).where(
+            Classe.filiere_id == filiere_id
+        )
+    return dict(db.session.execute(query).all())
+
+
+def etat_resultats(etudiant, use_coefficients=True):
+    """
+    Etat des resultats d'un etudiant lu en une requete, sans calcul :
+    sa ligne (version, date) et les versions de sa classe et de sa filiere
+    (versions_caches) dont dependent les classements.
+    Retourne (etat, derniere_maj) ou None si la ligne manque ou est perimee.
+    """
+    colonnes = [
+        StudentResult.version,
+        StudentResult.updated_at,
+        StudentResult.use_coefficients,
+        StudentResult.annee,
+    ]
+    stmt = select(*colonnes).where(StudentResult.etudiant_id == etudiant.id)
+    depuis = StudentResult.__table__
+    for portee, cle in portees_classement(etudiant):
+        ligne = VersionCache.__table__.alias()
+        stmt = stmt.add_columns(func.coalesce(ligne.c.version, 0), ligne.c.modifie_le)
+        depuis = depuis.outerjoin(ligne, and_(ligne.c.portee == portee, ligne.c.cle == cle))
+    stmt = stmt.select_from(depuis)
+
+    ligne = db.session.execute(stmt).first()
+    if ligne is None:
+        return None
+    version, derniere_maj, coefficients, annee, *portees = ligne
+    if coefficients != use_coefficients or annee != annee_courante():
+        return None
+
+    # (version, derniere incrementation) par portee de classement
+    for maj in portees[1::2]:
+        if maj is not None:
+            derniere_maj = max(derniere_maj, maj)
+    return (version, *portees[0::2]), derniere_maj
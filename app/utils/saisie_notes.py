@@ -0,0 +1,318 @@
+# app/utils/saisie_notes.py
+"""Saisie de notes : validation d'une valeur, choix d'un etudiant, saisie en lot (classe x matiere)."""
+
+import base64
+import json
+import math
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, insert, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.extensions import db
+from app.models.note import CLE_NOTE, Note, annee_courante
+from app.models.user import User, enseignant_classes, tri_nom
+from app.utils.ecritures import CHAMPS_NOTE, signaler_note
+
+MESSAGE_OBLIGATOIRE = "La note est obligatoire si l'etudiant est present"
+MESSAGE_PLAGE = "La note doit etre comprise entre 0 et 20"
+MESSAGE_DOUBLON = "Une note existe deja pour cette matiere"
+MESSAGE_CONFLIT = "Note modifiee entre-temps : verifiez les valeurs actuelles puis enregistrez a nouveau"
+# Etudiants par page dans le choix d'un etudiant
+ETUDIANTS_PAR_PAGE = 25
+
+
+def valider_note(valeur, absence):
+    """
+    Valeur saisie -> (note, None) ou (None, message d'erreur).
+    Absence cochee et valeur vide -> 0.
+    """
+    if valeur is None or valeur == "":
+        if not absence:
+            return None, MESSAGE_OBLIGATOIRE
+        return 0.0, None
+    try:
+        valeur = float(valeur)
+    except (TypeError, ValueError):
+        return None, MESSAGE_PLAGE
+    if not math.isfinite(valeur) or valeur < 0 or valeur > 20:
+        return None, MESSAGE_PLAGE
+    return valeur, None
+
+
+# ----------------------------
+# J1.1 Prechargement (une requete)
+# ----------------------------
+def notes_classe(classe_id, matiere_id, annee=None):
+    """
+    Etudiants d'une classe et leurs notes de la matiere pour l'annee :
+    OrderedDict {etudiant: [notes]} dans l'ordre nom, prenom.
+    """
+    lignes = (
+        db.session.query(User, Note)
+        .outerjoin(Note, and_(
+            Note.etudiant_id == User.id,
+            Note.matiere_id == matiere_id,
+            Note.annee == (annee or annee_courante())
+        ))
+        .filter(User.classe_id == classe_id, User.role == "ETUDIANT")
+        .order_by(User.nom, User.prenom, User.id, Note.id)
+        .all()
+    )
+    par_etudiant = OrderedDict()
+    for etudiant, note in lignes:
+        notes = par_etudiant.setdefault(etudiant, [])
+        if note is not None:
+            notes.append(note)
+    return par_etudiant
+
+
+# ----------------------------
+# J1.2 Choix d'un etudiant (recherche, pagination par curseur)
+# ----------------------------
+def curseur_etudiant(etudiant):
+    """Curseur de pagination : cle de tri (nom, prenom, id) de l'etudiant."""
+    cle = [etudiant.nom or "", etudiant.prenom or "", etudiant.id]
+    return base64.urlsafe_b64encode(json.dumps(cle).encode("utf-8")).decode("ascii")
+
+
+def lire_curseur(curseur):
+    """Cle de tri d'un curseur ; ValueError s'il est illisible."""
+    try:
+        nom, prenom, etudiant_id = json.loads(base64.urlsafe_b64decode(curseur.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Curseur invalide") from None
+    if not (isinstance(nom, str) and isinstance(prenom, str) and isinstance(etudiant_id, int)):
+        raise ValueError("Curseur invalide")
+    return nom, prenom, etudiant_id
+
+
+def etudiants_enseignant(enseignant, recherche=None, classe_id=None, apres=None,
+                         limite=ETUDIANTS_PAR_PAGE):
+    """
+    Page d'etudiants que l'enseignant peut noter (inscrits dans une de ses
+    classes), tries par nom, prenom, id (nom ou prenom manquant trie comme vide).
+    recherche : debut du matricule, du nom ou du prenom.
+    apres : curseur de la page precedente (curseur_etudiant) ; il porte la
+    cle de tri, la page suivante ne depend donc pas de cet etudiant
+    (supprime ou renomme entre-temps). ValueError s'il est illisible.
+    Retourne (etudiants, curseur de la page suivante ou None).
+
+    Un enseignant sans matiere ou sans classe ne voit personne.
+    """
+    if not enseignant.matieres:
+        return [], None
+
+    tri = (tri_nom(User.nom), tri_nom(User.prenom), User.id)
+    classes = select(enseignant_classes.c.classe_id).where(
+        enseignant_classes.c.enseignant_id == enseignant.id
+    )
+    query = User.query.filter(User.role == "ETUDIANT", User.classe_id.in_(classes))
+    if classe_id is not None:
+        query = query.filter(User.classe_id == classe_id)
+    recherche = (recherche or "").strip()
+    if recherche:
+        query = query.filter(or_(
+            User.matricule.startswith(recherche, autoescape=True),
+            User.nom.startswith(recherche, autoescape=True),
+            User.prenom.startswith(recherche, autoescape=True),
+        ))
+    if apres:
+        query = query.filter(tuple_(*tri) > tuple_(*lire_curseur(apres)))
+
+    # Une ligne de plus pour savoir s'il reste une page
+    etudiants = query.order_by(*tri).limit(limite + 1).all()
+    if len(etudiants) > limite:
+        return etudiants[:limite], curseur_etudiant(etudiants[limite - 1])
+    return etudiants, None
+
+
+# ----------------------------
+# J1.3 Validation et ecriture du lot
+# ----------------------------
+def _ligne_vide(ligne):
+    return (
+        (ligne.get("valeur") is None or ligne.get("valeur") == "")
+        and not ligne.get("absence")
+        and not ligne.get("appreciation")
+    )
+
+
+def enregistrer_lot(enseignant_id, matiere_id, notes_existantes, lignes):
+    """
+    lignes : [{"etudiant_id", "valeur", "absence", "appreciation", "version"}]
+    ("version" : optionnelle, version de la note lue par le client).
+    notes_existantes : resultat de notes_classe (etudiants autorises).
+
+    Valide tout en memoire puis ecrit en une transaction : nouvelles notes
+    inserees en un lot, notes de l'enseignant mises a jour. Les lignes vides
+    sont ignorees. Rien n'est ecrit s'il y a une erreur.
+    Retourne (inserees, modifiees, erreurs) ; erreurs = [{"ligne", "etudiant_id", "erreur"}].
+    """
+    par_id = {etudiant.id: notes for etudiant, notes in notes_existantes.items()}
+    erreurs = []
+    nouvelles = []
+    modifiees = []
+    # Numero de ligne par etudiant (doublons, conflits)
+    numeros = {}
+
+    for numero, ligne in enumerate(lignes, start=1):
+        def erreur(message):
+            erreurs.append({
+                "ligne": numero, "etudiant_id": ligne.get("etudiant_id"), "erreur": message
+            })
+
+        try:
+            etudiant_id = int(ligne.get("etudiant_id"))
+        except (TypeError, ValueError):
+            erreur("Etudiant invalide")
+            continue
+        if etudiant_id not in par_id:
+            erreur("Etudiant absent de la classe")
+            continue
+        if etudiant_id in numeros:
+            erreur("Etudiant present plusieurs fois")
+            continue
+        numeros[etudiant_id] = numero
+        if _ligne_vide(ligne):
+            continue
+
+        absence = bool(ligne.get("absence"))
+        valeur, message = valider_note(ligne.get("valeur"), absence)
+        if message:
+            erreur(message)
+            continue
+        appreciation = ligne.get("appreciation") or None
+
+        existantes = par_id[etudiant_id]
+        if len(existantes) > 1:
+            erreur("Plusieurs notes existent deja pour cette matiere")
+        elif existantes and existantes[0].enseignant_id != enseignant_id:
+            erreur("Note deja saisie par un autre enseignant")
+        elif existantes and ligne.get("version") not in (None, existantes[0].version):
+            erreur(MESSAGE_CONFLIT)
+        elif existantes:
+            note = existantes[0]
+            if (note.valeur, bool(note.absence), note.appreciation) != (
+                valeur, absence, appreciation
+            ):
+                modifiees.append((note, {
+                    "valeur": valeur, "absence": absence, "appreciation": appreciation
+                }))
+        else:
+            nouvelles.append({
+                "valeur": valeur,
+                "absence": absence,
+                "appreciation": appreciation,
+                "etudiant_id": etudiant_id,
+                "matiere_id": matiere_id,
+                "enseignant_id": enseignant_id,
+            })
+
+    if erreurs:
+        return 0, 0, erreurs
+
+    try:
+        conflits = ecrire_notes(nouvelles, modifiees)
+    except StaleDataError:
+        # Note modifiee entre le chargement et l'UPDATE (verrou optimiste)
+        etudiant_ids = [note.etudiant_id for note, _ in modifiees]
+        db.session.rollback()
+        return 0, 0, [
+            {"ligne": numeros[etudiant_id], "etudiant_id": etudiant_id, "erreur": MESSAGE_CONFLIT}
+            for etudiant_id in etudiant_ids
+        ]
+    if conflits:
+        # Note creee entre le chargement de la grille et l'enregistrement
+        db.session.rollback()
+        return 0, 0, [
+            {
+                "ligne": numeros[ligne["etudiant_id"]],
+                "etudiant_id": ligne["etudiant_id"],
+                "erreur": MESSAGE_DOUBLON,
+            }
+            for ligne in conflits
+        ]
+    db.session.commit()
+    return len(nouvelles), len(modifiees), []
+
+
+def _etat(note):
+    return {champ: getattr(note, champ) for champ in CHAMPS_NOTE}
+
+
+# INSERT ... ON CONFLICT des dialectes qui le permettent
+INSERTS_DIALECTE = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _inserer_notes():
+    """INSERT de notes qui ignore les couples deja notes (index unique CLE_NOTE)."""
+    fabrique = INSERTS_DIALECTE.get(db.session.get_bind().dialect.name)
+    if fabrique is None:
+        # Autre moteur : le conflit remonte en IntegrityError
+        return insert(Note.__table__)
+    return fabrique(Note.__table__).on_conflict_do_nothing(index_elements=CLE_NOTE)
+
+
+def ecrire_notes(nouvelles, modifiees=()):
+    """
+    nouvelles : dicts (etudiant_id, matiere_id, enseignant_id, valeur, absence,
+    appreciation) de notes a creer pour l'annee en cours.
+    modifiees : couples (note chargee, {valeur, absence, appreciation}).
+
+    Un INSERT ... ON CONFLICT DO NOTHING RETURNING et un UPDATE en
+    executemany (requetes Core, sans aller-retour par note), declares au
+    suivi des ecritures comme le ferait l'ORM. Le commit reste a l'appelant.
+    Retourne les lignes de nouvelles non inserees (note deja presente).
+    L'UPDATE verifie la version des notes chargees : StaleDataError si
+    l'une d'elles a change entretemps.
+    """
+    session = db.session
+    conflits = []
+    if nouvelles:
+        annee = annee_courante()
+        maintenant = datetime.utcnow()
+        completes = [dict(ligne, annee=annee, date_ajout=maintenant) for ligne in nouvelles]
+        ids = {
+            (etudiant_id, matiere_id): note_id
+            for etudiant_id, matiere_id, note_id in session.execute(
+                _inserer_notes().returning(Note.etudiant_id, Note.matiere_id, Note.id),
+                completes
+            )
+        }
+        for ligne, complete in zip(nouvelles, completes):
+            note_id = ids.pop((ligne["etudiant_id"], ligne["matiere_id"]), None)
+            if note_id is None:
+                conflits.append(ligne)
+                continue
+            apres = {champ: complete[champ] for champ in CHAMPS_NOTE}
+            signaler_note(session, "I", note_id, apres=apres)
+
+    if modifiees:
+        # Etat avant lu sur les objets deja charges, avant l'UPDATE
+        for note, valeurs in modifiees:
+            avant = _etat(note)
+            signaler_note(session, "U", note.id, avant=avant, apres=dict(avant, **valeurs))
+        session.execute(update(Note), [
+            dict(valeurs, id=note.id, version=note.version) for note, valeurs in modifiees
+        ])
+    return conflits
+
+
+def ajouter_note(etudiant_id, matiere_id, enseignant_id, valeur, absence, appreciation):
+    """
+    Cree une note de l'annee en une requete, sans verification prealable :
+    l'index unique arbitre. Retourne None ou MESSAGE_DOUBLON.
+    Le commit reste a l'appelant.
+    """
+    ligne = {
+        "etudiant_id": etudiant_id,
+        "matiere_id": matiere_id,
+        "enseignant_id": enseignant_id,
+        "valeur": valeur,
+        "absence": absence,
+        "appreciation": appreciation,
+    }
+    return MESSAGE_DOUBLON if ecrire_notes([ligne]) else None
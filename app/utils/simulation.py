@@ -0,0 +1,180 @@
+# app/utils/simulation.py
+"""Simulation de deliberation : regles alternatives evaluees sans ecriture."""
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+from app.extensions import db
+from app.models.user import User
+from app.utils.calculs import SEUIL_ADMIS, SEUIL_AJOURNE, SEUILS_MENTION
+from app.utils.cohorte import calculer_tableaux, charger_cohorte, charger_matieres
+
+DECISIONS = ("ADMIS", "AJOURNE", "REDOUBLE")
+
+# Donnees partagees par les processus du pool (chargees une seule fois)
+_cohorte = None
+_matieres = None
+
+
+# ----------------------------
+# E1.1 Variantes de regles
+# ----------------------------
+def variante_reference(use_coefficients=True):
+    """Regles actuellement appliquees."""
+    return {
+        "nom": "reference",
+        "use_coefficients": use_coefficients,
+        "coefficients": {},
+        "credits": {},
+        "total_credits": 60,
+        "seuil_admis": SEUIL_ADMIS,
+        "seuil_ajourne": SEUIL_AJOURNE,
+        "seuils_mention": SEUILS_MENTION,
+    }
+
+
+def normaliser_variante(variante, reference, numero=1):
+    """Complete une variante avec les regles de reference."""
+    complete = dict(reference)
+    complete["nom"] = f"variante {numero}"
+    complete.update(variante)
+    complete["seuils_mention"] = tuple(
+        (seuil, libelle) for seuil, libelle in complete["seuils_mention"]
+    )
+    return complete
+
+
+def _resoudre(surcharges, matieres):
+    """
+    Convertit {id ou nom de matiere: valeur} en {id: valeur}.
+    Les cles JSON etant des chaines, "3" designe l'id 3.
+    """
+    par_nom = {m["nom"]: matiere_id for matiere_id, m in matieres.items()}
+    resolues = {}
+    for cle, valeur in (surcharges or {}).items():
+        if isinstance(cle, int) or str(cle).isdigit():
+            matiere_id = int(cle)
+        elif cle in par_nom:
+            matiere_id = par_nom[cle]
+        else:
+            raise ValueError(f"Matiere inconnue dans la variante: {cle}")
+        if matiere_id not in matieres:
+            raise ValueError(f"Matiere inconnue dans la variante: {cle}")
+        resolues[matiere_id] = valeur
+    return resolues
+
+
+# ----------------------------
+# E1.2 Evaluation (dans un processus du pool)
+# ----------------------------
+def _initialiser_processus(cohorte, matieres):
+    global _cohorte, _matieres
+    _cohorte = cohorte
+    _matieres = matieres
+
+
+def _evaluer(variante):
+    """Decisions de tous les etudiants pour une variante (sans base)."""
+    matieres = {
+        matiere_id: dict(m) for matiere_id, m in _matieres.items()
+    }
+    for matiere_id, coef in variante["coefficients"].items():
+        matieres[matiere_id]["coefficient"] = coef
+    for matiere_id, credits in variante["credits"].items():
+        matieres[matiere_id]["credits"] = credits
+
+    tableaux = calculer_tableaux(
+        _cohorte,
+        matieres,
+        use_coefficients=variante["use_coefficients"],
+        total_credits=variante["total_credits"],
+        seuil_admis=variante["seuil_admis"],
+        seuil_ajourne=variante["seuil_ajourne"],
+        seuils_mention=variante["seuils_mention"],
+    )
+    return tableaux["decisions"].tolist()
+
+
+# ----------------------------
+# E1.3 Point d'entree
+# ----------------------------
+def simuler(variantes, processus=None):
+    """
+    variantes : liste de dicts (nom, use_coefficients, coefficients,
+    credits, total_credits, seuil_admis, seuil_ajourne, seuils_mention).
+    Les cles absentes reprennent les regles actuelles.
+
+    Lecture seule : les notes sont chargees une fois, puis chaque
+    variante est evaluee dans un processus separe, sans acces a la base.
+
+    Retourne la reference et, pour chaque variante, le nombre de
+    decisions par type et les etudiants dont la decision change.
+    """
+    reference = variante_reference(
+        use_coefficients=current_app.config.get("USE_COEFFICIENTS", True)
+    )
+    cohorte = charger_cohorte()
+    matieres = charger_matieres()
+    identites = {
+        etudiant_id: (matricule, f"{prenom or ''} {nom or ''}".strip())
+        for etudiant_id, matricule, nom, prenom in db.session.query(
+            User.id, User.matricule, User.nom, User.prenom
+        ).filter(User.role == "ETUDIANT")
+    }
+    # Rien ne doit etre ecrit : on referme la transaction de lecture
+    db.session.rollback()
+
+    variantes = [
+        normaliser_variante(v, reference, numero)
+        for numero, v in enumerate(variantes, start=1)
+    ]
+    for variante in variantes:
+        variante["coefficients"] = _resoudre(variante["coefficients"], matieres)
+        variante["credits"] = _resoudre(variante["credits"], matieres)
+
+    processus = processus or min(len(variantes) + 1, os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=processus,
+        initializer=_initialiser_processus,
+        initargs=(cohorte, matieres),
+    ) as pool:
+        toutes = list(pool.map(_evaluer, [reference, *variantes]))
+
+    etudiants = cohorte["etudiants"].tolist()
+    decisions_reference = toutes[0]
+
+    def _synthese(variante, decisions):
+        compte = Counter(decisions)
+        return {
+            "nom": variante["nom"],
+            "decisions": {d: compte.get(d, 0) for d in DECISIONS},
+        }
+
+    rapport = {
+        "etudiants": len(etudiants),
+        "reference": _synthese(reference, decisions_reference),
+        "variantes": [],
+    }
+
+    for variante, decisions in zip(variantes, toutes[1:]):
+        changes = [
+            i for i, (avant, apres) in enumerate(zip(decisions_reference, decisions))
+            if avant != apres
+        ]
+        synthese = _synthese(variante, decisions)
+        synthese["changements"] = [
+            {
+                "etudiant_id": etudiants[i],
+                "matricule": identites.get(etudiants[i], (None, ""))[0],
+                "nom": identites.get(etudiants[i], (None, ""))[1],
+                "avant": decisions_reference[i],
+                "apres": decisions[i],
+            }
+            for i in changes
+        ]
+        rapport["variantes"].append(synthese)
+
+    return rapport
@@ -0,0 +1,388 @@
+# app/utils/statistiques.py
+"""Statistiques de notes par matiere et par (matiere, classe), en un passage ; cartes enseignant."""
+
+import math
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, select
+
+from app.extensions import db
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+from app.models.statistique import StatistiqueMatiere
+from app.models.user import User
+from app.utils.cache_resultats import memoiser_enseignant
+from app.utils.ecritures import abonner_avant_commit
+
+NB_CLASSES_HISTOGRAMME = 20
+
+
+# ----------------------------
+# F1.1 Accumulateur de Welford
+# ----------------------------
+class Accumulateur:
+    """Effectif, moyenne, variance, min/max et histogramme 0-20, fusionnables."""
+
+    __slots__ = (
+        "effectif", "moyenne", "m2", "minimum", "maximum",
+        "absences", "histogramme", "bornes_a_revoir"
+    )
+
+    def __init__(self):
+        self.effectif = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.absences = 0
+        self.histogramme = [0] * NB_CLASSES_HISTOGRAMME
+        # Min/max a recalculer apres le retrait d'une valeur extreme
+        self.bornes_a_revoir = False
+
+    @staticmethod
+    def classe_histogramme(valeur):
+        """Indice de l'intervalle [k, k+1[ (20 compte dans [19, 20])."""
+        return min(max(int(valeur), 0), NB_CLASSES_HISTOGRAMME - 1)
+
+    def ajouter(self, valeur, absence=False):
+        self.effectif += 1
+        delta = valeur - self.moyenne
+        self.moyenne += delta / self.effectif
+        self.m2 += delta * (valeur - self.moyenne)
+        self.minimum = valeur if self.minimum is None else min(self.minimum, valeur)
+        self.maximum = valeur if self.maximum is None else max(self.maximum, valeur)
+        self.absences += 1 if absence else 0
+        self.histogramme[self.classe_histogramme(valeur)] += 1
+
+    def retirer(self, valeur, absence=False):
+        """Operation inverse de ajouter (Welford en sens inverse)."""
+        if self.effectif <= 1:
+            self.__init__()
+            return
+        ancienne_moyenne = self.moyenne
+        self.effectif -= 1
+        self.moyenne = (ancienne_moyenne * (self.effectif + 1) - valeur) / self.effectif
+        self.m2 = max(self.m2 - (valeur - self.moyenne) * (valeur - ancienne_moyenne), 0.0)
+        self.absences -= 1 if absence else 0
+        self.histogramme[self.classe_histogramme(valeur)] -= 1
+        if valeur == self.minimum or valeur == self.maximum:
+            self.bornes_a_revoir = True
+
+    def fusionner(self, autre):
+        """Combine deux accumulateurs (formule de Chan)."""
+        if not autre.effectif:
+            return self
+        if not self.effectif:
+            self.charger(autre.vers_dict())
+            return self
+        self.bornes_a_revoir = self.bornes_a_revoir or autre.bornes_a_revoir
+        total = self.effectif + autre.effectif
+        delta = autre.moyenne - self.moyenne
+        self.moyenne += delta * autre.effectif / total
+        self.m2 += autre.m2 + delta * delta * self.effectif * autre.effectif / total
+        self.effectif = total
+        self.minimum = min(self.minimum, autre.minimum)
+        self.maximum = max(self.maximum, autre.maximum)
+        self.absences += autre.absences
+        self.histogramme = [a + b for a, b in zip(self.histogramme, autre.histogramme)]
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.effectif if self.effectif else 0.0
+
+    @property
+    def ecart_type(self):
+        return math.sqrt(self.variance)
+
+    def charger(self, donnees):
+        for champ in ("effectif", "moyenne", "m2", "minimum", "maximum", "absences"):
+            setattr(self, champ, donnees[champ])
+        self.histogramme = list(donnees["histogramme"])
+        self.bornes_a_revoir = bool(donnees.get("bornes_a_revoir"))
+        return self
+
+    def vers_dict(self):
+        return {
+            "effectif": self.effectif,
+            "moyenne": self.moyenne,
+            "m2": self.m2,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "absences": self.absences,
+            "histogramme": list(self.histogramme),
+            "bornes_a_revoir": self.bornes_a_revoir,
+        }
+
+
+# ----------------------------
+# F1.2 Mise a jour a chaque ecriture de note
+# ----------------------------
+def _portees(matiere_id, classe_id, annee):
+    """Toutes classes confondues, plus la classe de l'etudiant s'il en a une."""
+    if classe_id is None:
+        return ((matiere_id, None, annee),)
+    return ((matiere_id, None, annee), (matiere_id, classe_id, annee))
+
+
+def _accumulateur_depuis(ligne):
+    """Accumulateur initialise depuis une ligne StatistiqueMatiere."""
+    return Accumulateur().charger({
+        "effectif": ligne.effectif,
+        "moyenne": ligne.moyenne,
+        "m2": ligne.m2,
+        "minimum": ligne.minimum,
+        "maximum": ligne.maximum,
+        "absences": ligne.absences,
+        "histogramme": ligne.histogramme,
+        "bornes_a_revoir": ligne.bornes_a_revoir,
+    })
+
+
+def _verrouiller(session, matiere_ids):
+    """
+    Un seul ecrivain des statistiques d'une matiere a la fois, jusqu'au
+    commit : aucun delta perdu entre la lecture et la reecriture des lignes.
+    FOR NO KEY UPDATE ne bloque pas l'ajout de notes (cle etrangere) ;
+    SQLite, qui serialise deja les ecritures, ignore la clause.
+    """
+    session.execute(
+        select(Matiere.id).where(Matiere.id.in_(matiere_ids))
+        .order_by(Matiere.id).with_for_update(key_share=True)
+    )
+
+
+def _apres_ecritures(session, changements):
+    """
+    Abonne avant commit : applique les deltas de notes aux statistiques de
+    leur annee. Une note est comptee dans la classe de son etudiant : l'etat avant est
+    retire de la classe du debut de la transaction, l'etat apres ajoute a la
+    classe actuelle, et les autres notes d'un etudiant change de classe
+    passent d'une classe a l'autre.
+    """
+    if not changements.notes and not changements.classes:
+        return
+
+    # Effet net par note : premier etat avant, dernier etat apres
+    nettes = {}
+    for delta in changements.notes:
+        if delta["id"] in nettes:
+            nettes[delta["id"]][1] = delta["apres"]
+        else:
+            nettes[delta["id"]] = [delta["avant"], delta["apres"]]
+
+    etudiant_ids = set(changements.classes) | {
+        etat["etudiant_id"]
+        for avant, apres in nettes.values()
+        for etat in (avant, apres) if etat
+    }
+    classes = dict(session.execute(
+        select(User.id, User.classe_id).where(User.id.in_(etudiant_ids))
+    ).all())
+
+    def classe_origine(etudiant_id):
+        if etudiant_id in changements.classes:
+            return changements.classes[etudiant_id]
+        return classes.get(etudiant_id)
+
+    # Portees touchees : (matiere, None) et (matiere, classe)
+    mouvements = []
+    for avant, apres in nettes.values():
+        for etat, sens, classe_id in (
+            (avant, -1, avant and classe_origine(avant["etudiant_id"])),
+            (apres, 1, apres and classes.get(apres["etudiant_id"])),
+        ):
+            if not etat or etat["valeur"] is None:
+                continue
+            for portee in _portees(etat["matiere_id"], classe_id, etat["annee"]):
+                mouvements.append((portee, sens, etat["valeur"], bool(etat["absence"])))
+
+    # Notes non modifiees des etudiants changes de classe
+    deplaces = {
+        etudiant_id for etudiant_id, origine in changements.classes.items()
+        if etudiant_id in classes and classes[etudiant_id] != origine
+    }
+    if deplaces:
+        for note_id, etudiant_id, matiere_id, annee, valeur, absence in session.execute(
+            select(
+                Note.id, Note.etudiant_id, Note.matiere_id, Note.annee, Note.valeur, Note.absence
+            ).where(Note.etudiant_id.in_(deplaces))
+        ):
+            if note_id in nettes:
+                continue
+            for classe_id, sens in (
+                (changements.classes[etudiant_id], -1), (classes[etudiant_id], 1)
+            ):
+                if classe_id is not None:
+                    mouvements.append((
+                        (matiere_id, classe_id, annee), sens, valeur, bool(absence)
+                    ))
+
+    portees = {portee for portee, _, _, _ in mouvements}
+    if not portees:
+        return
+    matiere_ids = {m for m, _, _ in portees}
+    _verrouiller(session, matiere_ids)
+    # Lignes relues apres le verrou (valeurs du dernier ecrivain)
+    lignes = {
+        (ligne.matiere_id, ligne.classe_id, ligne.annee): ligne
+        for ligne in StatistiqueMatiere.query.filter(
+            StatistiqueMatiere.matiere_id.in_(matiere_ids),
+            StatistiqueMatiere.annee.in_({a for _, _, a in portees}),
+        ).populate_existing()
+        if (ligne.matiere_id, ligne.classe_id, ligne.annee) in portees
+    }
+
+    accumulateurs = {
+        portee: _accumulateur_depuis(lignes[portee]) if portee in lignes else Accumulateur()
+        for portee in portees
+    }
+
+    for portee, sens, valeur, absence in mouvements:
+        if sens > 0:
+            accumulateurs[portee].ajouter(valeur, absence)
+        else:
+            accumulateurs[portee].retirer(valeur, absence)
+
+    now = datetime.utcnow()
+    for portee, accumulateur in accumulateurs.items():
+        ligne = lignes.get(portee)
+        if ligne is None:
+            matiere_id, classe_id, annee = portee
+            ligne = StatistiqueMatiere(matiere_id=matiere_id, classe_id=classe_id, annee=annee)
+            session.add(ligne)
+        for champ, valeur in accumulateur.vers_dict().items():
+            setattr(ligne, champ, valeur)
+        ligne.updated_at = now
+
+
+def enregistrer():
+    """Abonne les statistiques aux ecritures de notes."""
+    abonner_avant_commit(_apres_ecritures)
+
+
+# ----------------------------
+# F1.3 Reconstruction en flux
+# ----------------------------
+def reconstruire(taille_lot=5000):
+    """
+    Recalcule toutes les statistiques en un seul parcours de la table
+    notes (lecture par lots avec yield_per), puis remplace la table.
+    """
+    session = db.session
+    accumulateurs = {}
+    lignes_lues = 0
+
+    resultat = session.execute(
+        select(Note.matiere_id, User.classe_id, Note.annee, Note.valeur, Note.absence)
+        .join(User, User.id == Note.etudiant_id)
+        .execution_options(yield_per=taille_lot)
+    )
+    for matiere_id, classe_id, annee, valeur, absence in resultat:
+        for portee in _portees(matiere_id, classe_id, annee):
+            if portee not in accumulateurs:
+                accumulateurs[portee] = Accumulateur()
+            accumulateurs[portee].ajouter(valeur, bool(absence))
+        lignes_lues += 1
+
+    now = datetime.utcnow()
+    session.execute(delete(StatistiqueMatiere))
+    if accumulateurs:
+        session.execute(insert(StatistiqueMatiere), [
+            {
+                "matiere_id": matiere_id,
+                "classe_id": classe_id,
+                "annee": annee,
+                "updated_at": now,
+                **accumulateur.vers_dict(),
+            }
+            for (matiere_id, classe_id, annee), accumulateur in accumulateurs.items()
+        ])
+    session.commit()
+    return lignes_lues
+
+
+# ----------------------------
+# F1.4 Lecture (page analytique)
+# ----------------------------
+def _bornes(matiere_ids, classe_id, annee):
+    """{matiere_id: (min, max)} exacts, lus dans les notes d'une portee."""
+    query = (
+        select(Note.matiere_id, func.min(Note.valeur), func.max(Note.valeur))
+        .where(Note.matiere_id.in_(matiere_ids), Note.annee == annee)
+        .group_by(Note.matiere_id)
+    )
+    if classe_id is not None:
+        query = query.join(User, User.id == Note.etudiant_id).where(
+            User.classe_id == classe_id
+        )
+    return {matiere_id: (minimum, maximum) for matiere_id, minimum, maximum
+            in db.session.execute(query)}
+
+
+def statistiques_par_matiere(classe_id=None, annee=None):
+    """
+    Lignes de statistiques (une par matiere) de l'annee (par defaut l'annee
+    en cours) pour toutes les classes ou pour une classe donnee. Lecture de
+    la table agregee ; min/max relus dans les notes pour les seules lignes
+    dont une valeur extreme a ete retiree (une requete groupee).
+    """
+    annee = annee or annee_courante()
+    lignes = (
+        db.session.query(StatistiqueMatiere, Matiere.nom)
+        .join(Matiere, Matiere.id == StatistiqueMatiere.matiere_id)
+        .filter(
+            StatistiqueMatiere.classe_id.is_(None) if classe_id is None
+            else StatistiqueMatiere.classe_id == classe_id,
+            StatistiqueMatiere.annee == annee,
+        )
+        .order_by(Matiere.nom)
+        .all()
+    )
+    a_revoir = [ligne.matiere_id for ligne, _ in lignes if ligne.bornes_a_revoir]
+    bornes = _bornes(a_revoir, classe_id, annee) if a_revoir else {}
+    resultats = []
+    for ligne, matiere_nom in lignes:
+        accumulateur = _accumulateur_depuis(ligne)
+        if ligne.matiere_id in bornes:
+            accumulateur.minimum, accumulateur.maximum = bornes[ligne.matiere_id]
+        resultats.append({
+            "matiere": matiere_nom,
+            "effectif": accumulateur.effectif,
+            "moyenne": round(accumulateur.moyenne, 2),
+            "ecart_type": round(accumulateur.ecart_type, 2),
+            "minimum": accumulateur.minimum,
+            "maximum": accumulateur.maximum,
+            "absences": accumulateur.absences,
+            "histogramme": accumulateur.histogramme,
+            "histogramme_max": max(accumulateur.histogramme) or 1,
+        })
+    return resultats
+
+
+# ----------------------------
+# F1.5 Cartes du dashboard enseignant
+# ----------------------------
+def statistiques_enseignant(enseignant_id):
+    """
+    Notes, absences, appreciations et etudiants notes par un enseignant :
+    une requete (agregats conditionnels sur ix_notes_enseignant), en cache
+    jusqu'a sa prochaine ecriture de note.
+    """
+    def calcul():
+        notes, absences, appreciations, etudiants = db.session.execute(
+            select(
+                func.count(Note.id),
+                func.coalesce(func.sum(case((Note.absence.is_(True), 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Note.appreciation.isnot(None), 1), else_=0)), 0),
+                func.count(Note.etudiant_id.distinct()),
+            ).where(Note.enseignant_id == enseignant_id)
+        ).one()
+        return {
+            "etudiants": etudiants,
+            "notes": notes,
+            "absences": absences,
+            "appreciations": appreciations,
+        }
+
+    return memoiser_enseignant(enseignant_id, calcul)
@@ -0,0 +1,110 @@
+# app/utils/taches.py
+"""Taches de fond disponibles (bulletins, exports, import de notes)."""
+
+import csv
+import os
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.user import User
+from app.utils.bulletin_pdf import donnees_bulletin
+from app.utils.bulletins_lot import (
+    preparer_bulletins,
+    processus_bulletins,
+    rendre_en_parallele,
+    zip_en_flux,
+)
+from app.utils.cache_pdf import bulletin_en_cache
+from app.utils.classement import classement_etudiant
+from app.utils.cohorte import resultats_cohorte
+from app.utils.import_notes import importer_notes
+from app.utils.jobs import tache
+from app.utils.resultats import resultat_etudiant, use_coefficients
+
+
+@tache("bulletins_zip")
+def bulletins_zip(progression, classe_id=None, filiere_id=None):
+    """Bulletins d'une classe ou filiere dans une archive ZIP."""
+    bulletins = preparer_bulletins(classe_id=classe_id, filiere_id=filiere_id)
+    nom = f"bulletins_{'classe' if classe_id else 'filiere'}_{classe_id or filiere_id}.zip"
+    chemin = progression.fichier_sortie(nom)
+
+    with open(chemin, "wb") as sortie:
+        fichiers = rendre_en_parallele(bulletins, processus_bulletins())
+        for fait, morceau in enumerate(zip_en_flux(fichiers)):
+            sortie.write(morceau)
+            progression.avancer(fait, len(bulletins), f"{fait}/{len(bulletins)} bulletin(s)")
+    return chemin, nom, "application/zip"
+
+
+@tache("bulletin_pdf")
+def bulletin_pdf(progression, etudiant_id):
+    """Bulletin PDF d'un etudiant (copie du cache disque)."""
+    etudiant = User.query.filter_by(id=etudiant_id, role="ETUDIANT").one()
+    donnees = donnees_bulletin(
+        etudiant, resultat_etudiant(etudiant.id), classement_etudiant(etudiant)
+    )
+    contenu, _ = bulletin_en_cache(donnees)
+    chemin = progression.fichier_sortie("bulletin.pdf")
+    with open(chemin, "wb") as sortie:
+        sortie.write(contenu)
+    return chemin, "bulletin.pdf", "application/pdf"
+
+
+@tache("resultats_csv")
+def resultats_csv(progression, classe_id=None, filiere_id=None):
+    """Resultats d'une classe ou filiere au format CSV (une ligne par etudiant)."""
+    query = (
+        db.session.query(User, Classe.nom)
+        .outerjoin(Classe, Classe.id == User.classe_id)
+        .filter(User.role == "ETUDIANT")
+    )
+    if classe_id is not None:
+        query = query.filter(User.classe_id == classe_id)
+    elif filiere_id is not None:
+        query = query.filter(Classe.filiere_id == filiere_id)
+    etudiants = query.order_by(User.nom, User.prenom, User.id).all()
+    resultats = resultats_cohorte(
+        etudiant_ids=[e.id for e, _ in etudiants],
+        use_coefficients=use_coefficients()
+    )
+
+    nom = f"resultats_{'classe' if classe_id else 'filiere'}_{classe_id or filiere_id}.csv"
+    chemin = progression.fichier_sortie(nom)
+    with open(chemin, "w", newline="", encoding="utf-8") as sortie:
+        ecrivain = csv.writer(sortie, delimiter=";")
+        ecrivain.writerow((
+            "matricule", "nom", "prenom", "classe",
+            "moyenne_generale", "credits_valides", "decision", "mention"
+        ))
+        for fait, (etudiant, classe_nom) in enumerate(etudiants, start=1):
+            resultat = resultats[etudiant.id]
+            ecrivain.writerow((
+                etudiant.matricule, etudiant.nom, etudiant.prenom, classe_nom,
+                resultat["moyenne_generale"], resultat["credits_valides"],
+                resultat["decision"], resultat["mention"] or ""
+            ))
+            progression.avancer(fait, len(etudiants))
+    return chemin, nom, "text/csv"
+
+
+@tache("import_notes")
+def import_notes(progression, fichier, format_fichier, enseignant_id, nom=None):
+    """Import CSV/XLSX d'un enseignant ; le fichier produit est le rapport de rejets."""
+    enseignant = User.query.filter_by(id=enseignant_id, role="ENSEIGNANT").one()
+    nom_rapport = f"rejets_{os.path.splitext(nom or 'import')[0]}.csv"
+    chemin = progression.fichier_sortie(nom_rapport)
+    reprise = progression.reprise
+    mode = "r+" if reprise and os.path.exists(chemin) else "w"
+    with open(chemin, mode, newline="", encoding="utf-8") as rapport:
+        if mode == "r+":
+            # Nouvel essai : rejets ecrits apres le dernier lot valide effaces
+            rapport.seek(reprise["rapport"])
+            rapport.truncate()
+        compteurs = importer_notes(fichier, format_fichier, enseignant, rapport, progression)
+    progression.avancer(
+        99, None,
+        f'{compteurs["importees"]} note(s) importee(s), {compteurs["rejetees"]} ligne(s) rejetee(s) '
+        f'sur {compteurs["lues"]}'
+    )
+    return chemin, nom_rapport, "text/csv"
@@ -0,0 +1 @@
+"""Benchmarks de performance (lances a la main, hors application)."""
@@ -0,0 +1,123 @@
+"""Application de benchmark : base SQLite en memoire et donnees synthetiques."""
+import random
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.filiere import Filiere
+from app.models.matiere import Matiere
+from app.models.note import Note
+from app.models.user import User
+from app.seed import seed_defaults
+from app.utils import resultats_materialises, statistiques
+
+
+class CompteurRequetes:
+    """
+    Requetes SQL envoyees pendant le bloc with, sur `engine` ou sur
+    db.engine (partage par la suite de benchmarks et les tests).
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.requetes = []
+
+    def _noter(self, conn, cursor, statement, *args):
+        self.requetes.append(statement)
+
+    def __enter__(self):
+        self.engine = self.engine or db.engine
+        event.listen(self.engine, "before_cursor_execute", self._noter)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._noter)
+
+    def __len__(self):
+        return len(self.requetes)
+
+
+class BenchConfig(Config):
+    """Configuration isolee : base en memoire, sans cache de resultats."""
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    RESULTATS_CACHE_TAILLE = 0
+    TESTING = True
+
+
+def creer_app(**config):
+    """Cree l'application, les tables et les matieres par defaut."""
+    app = create_app(BenchConfig)
+    app.config.update(config)
+    with app.app_context():
+        db.create_all()
+        seed_defaults()
+    return app
+
+
+def generer_cohorte(nb_etudiants, taux_absence=0.0, taille_classe=50, graine=42):
+    """
+    Insere nb_etudiants etudiants repartis en classes, avec une note par
+    matiere (les 9 matieres du seed), puis reconstruit student_results et
+    les statistiques comme apres une migration. A appeler dans un app_context.
+    """
+    rnd = random.Random(graine)
+    filiere = Filiere(
+        nom="Informatique", niveau="L1", annee=current_app.config["DEFAULT_ANNEE"]
+    )
+    db.session.add(filiere)
+    db.session.flush()
+
+    matieres = [m.id for m in Matiere.query.order_by(Matiere.id)]
+    enseignant = User(username="bench_prof", password_hash="-", role="ENSEIGNANT")
+    enseignant.matieres = Matiere.query.all()
+    db.session.add(enseignant)
+    db.session.flush()
+
+    nb_classes = max(1, -(-nb_etudiants // taille_classe))
+    classes = [Classe(nom=f"Classe {i + 1}", filiere_id=filiere.id) for i in range(nb_classes)]
+    db.session.add_all(classes)
+    enseignant.classes = classes
+    db.session.flush()
+
+    # Insertion en masse (Core) : on contourne volontairement le suivi ORM
+    etudiants = [
+        {
+            "username": f"etu{i:06d}",
+            "password_hash": "-",
+            "role": "ETUDIANT",
+            "nom": f"Nom{i}",
+            "prenom": f"Prenom{i}",
+            "matricule": f"MAT{i:06d}",
+            "classe_id": classes[i // taille_classe].id,
+        }
+        for i in range(nb_etudiants)
+    ]
+    db.session.execute(db.insert(User), etudiants)
+    ids = [
+        row[0] for row in db.session.query(User.id)
+        .filter(User.role == "ETUDIANT").order_by(User.id)
+    ]
+
+    notes = []
+    for etudiant_id in ids:
+        for matiere_id in matieres:
+            absence = rnd.random() < taux_absence
+            notes.append({
+                "valeur": 0.0 if absence else round(rnd.uniform(4, 19), 2),
+                "absence": absence,
+                "etudiant_id": etudiant_id,
+                "matiere_id": matiere_id,
+                "enseignant_id": enseignant.id,
+            })
+    db.session.execute(db.insert(Note), notes)
+    db.session.commit()
+
+    # Tables derivees que le suivi ORM aurait tenues a jour (ETag, classements)
+    for _ in resultats_materialises.reconstruire():
+        pass
+    statistiques.reconstruire()
+    return ids
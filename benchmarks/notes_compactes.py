@@ -0,0 +1,110 @@
+"""
+Chargement ORM (Note) contre enregistrements compacts (NoteCompacte).
+
+    python -m benchmarks.notes_compactes --notes 10000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.extensions import db
+from app.models.note import Note
+from app.utils.calculs import resultat_final
+from app.utils.notes_compactes import charger_notes_compactes
+from benchmarks.environnement import creer_app, generer_cohorte
+
+NB_MATIERES = 9
+
+
+def _mesurer(fonction):
+    """Temps (s) et pic memoire (octets) d'un appel, session videe avant."""
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    debut = time.perf_counter()
+    resultat = fonction()
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic
+
+
+def _orm():
+    notes = Note.query.order_by(Note.id).all()
+    # Acces a la matiere comme le fait bilan_academique
+    for note in notes:
+        note.matiere
+    return notes
+
+
+def _par_etudiant(ids, chargeur):
+    for etudiant_id in ids:
+        resultat_final(chargeur(etudiant_id))
+
+
+def comparer(nb_notes):
+    """Retourne les mesures des deux chemins pour nb_notes notes."""
+    app = creer_app()
+    with app.app_context():
+        ids = generer_cohorte(max(1, nb_notes // NB_MATIERES))
+        total = Note.query.count()
+
+        _, t_orm, m_orm = _mesurer(_orm)
+        _, t_compact, m_compact = _mesurer(charger_notes_compactes)
+
+        _, r_orm, _ = _mesurer(lambda: _par_etudiant(
+            ids, lambda e: Note.query.filter_by(etudiant_id=e).all()
+        ))
+        _, r_compact, _ = _mesurer(lambda: _par_etudiant(ids, charger_notes_compactes))
+
+    facteur = 10000 / total
+    return {
+        "notes": total,
+        "chargement": {
+            "orm": {"secondes": t_orm, "octets": m_orm},
+            "compact": {"secondes": t_compact, "octets": m_compact},
+        },
+        "resultat_final_par_etudiant": {
+            "orm": {"secondes": r_orm},
+            "compact": {"secondes": r_compact},
+        },
+        "gain_par_10k_notes": {
+            "secondes": (t_orm - t_compact) * facteur,
+            "octets": int((m_orm - m_compact) * facteur),
+            "secondes_resultats": (r_orm - r_compact) * facteur,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=10000)
+    args = parser.parse_args()
+
+    mesures = comparer(args.notes)
+    charge = mesures["chargement"]
+    gain = mesures["gain_par_10k_notes"]
+    print(f'{mesures["notes"]} notes')
+    print(
+        f'Chargement ORM     : {charge["orm"]["secondes"] * 1000:.1f} ms, '
+        f'{charge["orm"]["octets"] / 1024:.0f} Ko'
+    )
+    print(
+        f'Chargement compact : {charge["compact"]["secondes"] * 1000:.1f} ms, '
+        f'{charge["compact"]["octets"] / 1024:.0f} Ko'
+    )
+    print(
+        f'resultat_final par etudiant : ORM '
+        f'{mesures["resultat_final_par_etudiant"]["orm"]["secondes"] * 1000:.1f} ms, compact '
+        f'{mesures["resultat_final_par_etudiant"]["compact"]["secondes"] * 1000:.1f} ms'
+    )
+    print(
+        f'Gain pour 10k notes : {gain["secondes"] * 1000:.1f} ms, '
+        f'{gain["octets"] / 1024:.0f} Ko au chargement, '
+        f'{gain["secondes_resultats"] * 1000:.1f} ms sur les resultats'
+    )
+
+
+if __name__ == "__main__":
+    main()
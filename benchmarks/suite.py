@@ -0,0 +1,244 @@
+"""
+Suite de reference : calculs et routes etudiant/enseignant sur des cohortes synthetiques.
+
+    python -m benchmarks.suite --etudiants 1000 10000 --sortie bench.json
+    python -m benchmarks.suite --etudiants 1000 --reference bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.note import Note
+from app.models.user import User
+from app.utils.calculs import bilan_academique, moyenne_generale, resultat_final
+from app.utils.notes_compactes import charger_notes_compactes
+from benchmarks.environnement import CompteurRequetes, creer_app, generer_cohorte
+
+TAILLES = (1000, 10000, 100000)
+ROUTES = (
+    "/etudiant/dashboard",
+    "/etudiant/resultats",
+    "/etudiant/bulletin",
+    "/etudiant/bulletin/pdf",
+    "/etudiant/parcours",
+    "/api/v1/etudiant",
+)
+# Routes revalidees avec l'ETag du premier appel : 304 lu dans student_results
+ROUTES_ETAG = (
+    "/api/v1/etudiant",
+)
+# Routes enseignant (connecte : bench_prof, auteur de toutes les notes) et
+# nombre de requetes SQL attendu cache chaud (version du cache relue en base),
+# le meme quelle que soit la taille. Le chemin froid est verifie par
+# tests/test_enseignant.py.
+ROUTES_ENSEIGNANT = {
+    "/enseignant/dashboard": 6,
+}
+CALCULS = {
+    "moyenne_generale": moyenne_generale,
+    "bilan_academique": bilan_academique,
+    "resultat_final": resultat_final,
+}
+
+
+def _synthese(durees, **extra):
+    """Temps en millisecondes (median, moyen, min) d'une serie de mesures."""
+    return {
+        "median_ms": statistics.median(durees) * 1000,
+        "moyenne_ms": statistics.fmean(durees) * 1000,
+        "min_ms": min(durees) * 1000,
+        "appels": len(durees),
+        **extra,
+    }
+
+
+def _mesurer_calculs(notes_par_etudiant):
+    mesures = {}
+    for nom, fonction in CALCULS.items():
+        durees = []
+        for notes in notes_par_etudiant.values():
+            debut = time.perf_counter()
+            fonction(notes)
+            durees.append(time.perf_counter() - debut)
+        mesures[f"calculs.{nom}"] = _synthese(durees)
+    return mesures
+
+
+def _mesurer_routes(app, compteur, user_ids, repetitions, routes=ROUTES, etag=False):
+    """etag : requetes conditionnelles (If-None-Match), 304 attendu."""
+    mesures = {}
+    client = app.test_client()
+    attendu, prefixe = (304, "revalidation") if etag else (200, "route")
+    for route in routes:
+        durees = []
+        requetes = []
+        for user_id in user_ids:
+            with client.session_transaction() as session:
+                session["_user_id"] = str(user_id)
+                session["_fresh"] = True
+            # Premier appel hors mesure (caches de classement, imports)
+            premiere = client.get(route)
+            entetes = {"If-None-Match": premiere.headers["ETag"]} if etag else {}
+            for _ in range(repetitions):
+                avant = len(compteur)
+                debut = time.perf_counter()
+                reponse = client.get(route, headers=entetes)
+                durees.append(time.perf_counter() - debut)
+                requetes.append(len(compteur) - avant)
+                if reponse.status_code != attendu:
+                    raise RuntimeError(f"{route}: statut {reponse.status_code}")
+        mesures[f"{prefixe}.{route}"] = _synthese(durees, requetes_sql=max(requetes))
+    return mesures
+
+
+def mesurer_taille(nb_etudiants, taux_absence=0.0, echantillon=500,
+                   nb_clients=5, repetitions=5, graine=42, **config):
+    """Genere une cohorte puis mesure calculs et routes."""
+    app = creer_app(**config)
+    rnd = random.Random(graine)
+
+    with app.app_context():
+        debut = time.perf_counter()
+        ids = generer_cohorte(nb_etudiants, taux_absence=taux_absence, graine=graine)
+        generation = time.perf_counter() - debut
+
+        tires = rnd.sample(ids, min(echantillon, len(ids)))
+        # Notes chargees une fois : seuls les calculs sont mesures
+        notes_par_etudiant = {
+            etudiant_id: charger_notes_compactes(etudiant_id) for etudiant_id in tires
+        }
+        nb_notes = db.session.query(func.count(Note.id)).scalar()
+        enseignant_id = User.query.filter_by(username="bench_prof").one().id
+
+        engine = db.engine
+        db.session.remove()
+
+    mesures = _mesurer_calculs(notes_par_etudiant)
+    with CompteurRequetes(engine) as compteur:
+        mesures.update(_mesurer_routes(app, compteur, tires[:nb_clients], repetitions))
+        mesures.update(_mesurer_routes(
+            app, compteur, tires[:nb_clients], repetitions, routes=ROUTES_ETAG, etag=True
+        ))
+        mesures.update(_mesurer_routes(
+            app, compteur, [enseignant_id], repetitions, routes=ROUTES_ENSEIGNANT
+        ))
+
+    return {
+        "etudiants": len(ids),
+        "notes": nb_notes,
+        "taux_absence": taux_absence,
+        "generation_s": generation,
+        "mesures": mesures,
+    }
+
+
+# ----------------------------
+# Comparaison avec une reference
+# ----------------------------
+def comparer(rapport, reference, tolerance=0.2):
+    """
+    Liste des regressions : temps median au-dela de la tolerance
+    (0.2 = +20%) ou nombre de requetes SQL en hausse.
+    """
+    regressions = []
+    for taille, courant in rapport["tailles"].items():
+        ancien = reference.get("tailles", {}).get(taille)
+        if ancien is None:
+            continue
+        for nom, mesure in courant["mesures"].items():
+            base = ancien["mesures"].get(nom)
+            if base is None:
+                continue
+            ratio = mesure["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "taille": taille, "mesure": nom, "critere": "median_ms",
+                    "avant": base["median_ms"], "apres": mesure["median_ms"],
+                    "ratio": ratio,
+                })
+            if mesure.get("requetes_sql", 0) > base.get("requetes_sql", 0):
+                regressions.append({
+                    "taille": taille, "mesure": nom, "critere": "requetes_sql",
+                    "avant": base.get("requetes_sql", 0), "apres": mesure["requetes_sql"],
+                })
+    return regressions
+
+
+def requetes_hors_plafond(rapport):
+    """Routes enseignant dont le nombre de requetes SQL depasse ROUTES_ENSEIGNANT."""
+    depassements = []
+    for taille, courant in rapport["tailles"].items():
+        for route, plafond in ROUTES_ENSEIGNANT.items():
+            mesure = courant["mesures"].get(f"route.{route}")
+            if mesure is not None and mesure["requetes_sql"] > plafond:
+                depassements.append({
+                    "taille": taille, "mesure": f"route.{route}", "critere": "requetes_sql",
+                    "avant": plafond, "apres": mesure["requetes_sql"],
+                })
+    return depassements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--etudiants", type=int, nargs="+", default=list(TAILLES))
+    parser.add_argument("--absences", type=float, default=0.0, help="Taux d'absence (0-1).")
+    parser.add_argument("--echantillon", type=int, default=500,
+                        help="Etudiants tires pour les calculs.")
+    parser.add_argument("--clients", type=int, default=5,
+                        help="Etudiants connectes pour les routes.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--moteur", default="python", help="RESULTATS_ENGINE a mesurer.")
+    parser.add_argument("--sortie", type=argparse.FileType("w"), default=None)
+    parser.add_argument("--reference", type=argparse.FileType("r"), default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rapport = {
+        "date": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "moteur": args.moteur,
+        "tailles": {},
+    }
+    for taille in args.etudiants:
+        resultat = mesurer_taille(
+            taille,
+            taux_absence=args.absences,
+            echantillon=args.echantillon,
+            nb_clients=args.clients,
+            repetitions=args.repetitions,
+            RESULTATS_ENGINE=args.moteur,
+        )
+        rapport["tailles"][str(taille)] = resultat
+        print(f'{taille} etudiants ({resultat["notes"]} notes, '
+              f'generation {resultat["generation_s"]:.1f} s)')
+        for nom, mesure in resultat["mesures"].items():
+            requetes = mesure.get("requetes_sql")
+            suffixe = f", {requetes} requete(s)" if requetes is not None else ""
+            print(f'  {nom:<32} {mesure["median_ms"]:9.3f} ms{suffixe}')
+
+    if args.sortie:
+        json.dump(rapport, args.sortie, indent=2)
+
+    # Plafond de requetes des routes enseignant : verifie a chaque execution
+    regressions = requetes_hors_plafond(rapport)
+    if args.reference:
+        regressions += comparer(rapport, json.load(args.reference), args.tolerance)
+    for r in regressions:
+        print(f'REGRESSION {r["taille"]} {r["mesure"]} {r["critere"]}: '
+              f'{r["avant"]:.3f} -> {r["apres"]:.3f}')
+    if regressions:
+        sys.exit(1)
+    if args.reference:
+        print("Aucune regression.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""create student_results
+
+Revision ID: 4b6e2d8f0a13
+Revises: 2c9e1f4d8b10
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4b6e2d8f0a13"
+down_revision = "2c9e1f4d8b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "student_results",
+        sa.Column("etudiant_id", sa.Integer(), nullable=False),
+        sa.Column("moyenne_generale", sa.Float(), nullable=False),
+        sa.Column("credits_valides", sa.Integer(), nullable=False),
+        sa.Column("decision", sa.String(length=20), nullable=False),
+        sa.Column("mention", sa.String(length=20), nullable=True),
+        sa.Column("nb_notes", sa.Integer(), nullable=False),
+        sa.Column("nb_absences", sa.Integer(), nullable=False),
+        sa.Column("use_coefficients", sa.Boolean(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["etudiant_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("etudiant_id"),
+    )
+    op.create_table(
+        "student_result_matieres",
+        sa.Column("etudiant_id", sa.Integer(), nullable=False),
+        sa.Column("matiere_id", sa.Integer(), nullable=False),
+        sa.Column("rang", sa.Integer(), nullable=False),
+        sa.Column("matiere_nom", sa.String(length=100), nullable=False),
+        sa.Column("moyenne", sa.Float(), nullable=False),
+        sa.Column("validee", sa.Boolean(), nullable=False),
+        sa.Column("credits", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["etudiant_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["matiere_id"], ["matieres.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("etudiant_id", "matiere_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("student_result_matieres")
+    op.drop_table("student_results")
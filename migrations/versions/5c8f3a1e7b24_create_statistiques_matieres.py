@@ -0,0 +1,46 @@
+"""create statistiques_matieres
+
+Revision ID: 5c8f3a1e7b24
+Revises: 4b6e2d8f0a13
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c8f3a1e7b24"
+down_revision = "4b6e2d8f0a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "statistiques_matieres",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("matiere_id", sa.Integer(), nullable=False),
+        sa.Column("classe_id", sa.Integer(), nullable=True),
+        sa.Column("effectif", sa.Integer(), nullable=False),
+        sa.Column("moyenne", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.Column("minimum", sa.Float(), nullable=True),
+        sa.Column("maximum", sa.Float(), nullable=True),
+        sa.Column("absences", sa.Integer(), nullable=False),
+        sa.Column("histogramme", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["matiere_id"], ["matieres.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["classe_id"], ["classes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_statistiques_matieres_portee",
+        "statistiques_matieres",
+        ["matiere_id", "classe_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_statistiques_matieres_portee", table_name="statistiques_matieres")
+    op.drop_table("statistiques_matieres")
@@ -0,0 +1,73 @@
+"""add note annee and bilans_annuels
+
+Revision ID: 6d9a4b2f8c35
+Revises: 5c8f3a1e7b24
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = "6d9a4b2f8c35"
+down_revision = "5c8f3a1e7b24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.add_column(sa.Column("annee", sa.String(length=20), nullable=True))
+
+    # Annee de la filiere de l'etudiant, sinon annee courante
+    op.execute(
+        """
+        UPDATE notes SET annee = (
+            SELECT filieres.annee FROM users
+            JOIN classes ON classes.id = users.classe_id
+            JOIN filieres ON filieres.id = classes.filiere_id
+            WHERE users.id = notes.etudiant_id
+        )
+        """
+    )
+    op.execute(
+        sa.text("UPDATE notes SET annee = :annee WHERE annee IS NULL").bindparams(
+            annee=current_app.config["DEFAULT_ANNEE"]
+        )
+    )
+
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.alter_column("annee", existing_type=sa.String(length=20), nullable=False)
+        batch_op.create_index("ix_notes_annee", ["annee"])
+
+    with op.batch_alter_table("student_results") as batch_op:
+        batch_op.add_column(sa.Column("annee", sa.String(length=20), nullable=True))
+
+    op.create_table(
+        "bilans_annuels",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("etudiant_id", sa.Integer(), nullable=False),
+        sa.Column("annee", sa.String(length=20), nullable=False),
+        sa.Column("niveau", sa.String(length=10), nullable=True),
+        sa.Column("classe_nom", sa.String(length=100), nullable=True),
+        sa.Column("moyenne_generale", sa.Float(), nullable=False),
+        sa.Column("credits_valides", sa.Integer(), nullable=False),
+        sa.Column("decision", sa.String(length=20), nullable=False),
+        sa.Column("mention", sa.String(length=20), nullable=True),
+        sa.Column("resultat", sa.JSON(), nullable=False),
+        sa.Column("cloture_le", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["etudiant_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("etudiant_id", "annee", name="uq_bilans_annuels_etudiant_annee"),
+    )
+
+
+def downgrade():
+    op.drop_table("bilans_annuels")
+    with op.batch_alter_table("student_results") as batch_op:
+        batch_op.drop_column("annee")
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.drop_index("ix_notes_annee")
+        batch_op.drop_column("annee")
@@ -0,0 +1,49 @@
+"""create jobs
+
+Revision ID: 7e1b5c9d2a46
+Revises: 6d9a4b2f8c35
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7e1b5c9d2a46"
+down_revision = "6d9a4b2f8c35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=False),
+        sa.Column("parametres", sa.JSON(), nullable=False),
+        sa.Column("statut", sa.String(length=20), nullable=False),
+        sa.Column("progression", sa.Integer(), nullable=False),
+        sa.Column("message", sa.String(length=255), nullable=True),
+        sa.Column("erreur", sa.Text(), nullable=True),
+        sa.Column("tentatives", sa.Integer(), nullable=False),
+        sa.Column("max_tentatives", sa.Integer(), nullable=False),
+        sa.Column("disponible_le", sa.DateTime(), nullable=True),
+        sa.Column("annulation_demandee", sa.Boolean(), nullable=False),
+        sa.Column("worker", sa.String(length=100), nullable=True),
+        sa.Column("fichier", sa.String(length=255), nullable=True),
+        sa.Column("nom_fichier", sa.String(length=255), nullable=True),
+        sa.Column("mimetype", sa.String(length=100), nullable=True),
+        sa.Column("demandeur_id", sa.Integer(), nullable=True),
+        sa.Column("cree_le", sa.DateTime(), nullable=True),
+        sa.Column("demarre_le", sa.DateTime(), nullable=True),
+        sa.Column("termine_le", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["demandeur_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_statut_disponible", "jobs", ["statut", "disponible_le"])
+
+
+def downgrade():
+    op.drop_index("ix_jobs_statut_disponible", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,24 @@
+"""add notes enseignant index
+
+Revision ID: 8a3d6f1c4e57
+Revises: 7e1b5c9d2a46
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8a3d6f1c4e57"
+down_revision = "7e1b5c9d2a46"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dashboard et listes de l'enseignant : notes filtrees par auteur
+    op.create_index("ix_notes_enseignant", "notes", ["enseignant_id"])
+
+
+def downgrade():
+    op.drop_index("ix_notes_enseignant", table_name="notes")
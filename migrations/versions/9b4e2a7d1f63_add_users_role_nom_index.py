@@ -0,0 +1,24 @@
+"""add users role nom index
+
+Revision ID: 9b4e2a7d1f63
+Revises: 8a3d6f1c4e57
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "9b4e2a7d1f63"
+down_revision = "8a3d6f1c4e57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Choix d'un etudiant : liste triee par nom, paginee par curseur
+    op.create_index("ix_users_role_nom", "users", ["role", "nom", "prenom"])
+
+
+def downgrade():
+    op.drop_index("ix_users_role_nom", table_name="users")
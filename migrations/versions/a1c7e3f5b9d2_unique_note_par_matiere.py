@@ -0,0 +1,69 @@
+"""unique note per etudiant, matiere and annee
+
+Revision ID: a1c7e3f5b9d2
+Revises: 9b4e2a7d1f63
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a1c7e3f5b9d2"
+down_revision = "9b4e2a7d1f63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connexion = op.get_bind()
+
+    # Anciennes notes en double : fusionnees dans la plus recente, avec la
+    # moyenne du groupe (meme moyenne de matiere qu'avant la migration)
+    groupes = connexion.execute(sa.text(
+        """
+        SELECT etudiant_id, matiere_id, annee FROM notes
+        GROUP BY etudiant_id, matiere_id, annee
+        HAVING COUNT(*) > 1
+        """
+    )).all()
+    for etudiant_id, matiere_id, annee in groupes:
+        notes = connexion.execute(sa.text(
+            """
+            SELECT id, valeur, absence, appreciation FROM notes
+            WHERE etudiant_id = :etudiant AND matiere_id = :matiere AND annee = :annee
+            ORDER BY date_ajout, id
+            """
+        ), {"etudiant": etudiant_id, "matiere": matiere_id, "annee": annee}).all()
+        gardee = notes[-1]
+        appreciations = [n.appreciation for n in notes if n.appreciation]
+        connexion.execute(sa.text(
+            """
+            UPDATE notes SET valeur = :valeur, absence = :absence, appreciation = :appreciation
+            WHERE id = :id
+            """
+        ), {
+            "id": gardee.id,
+            "valeur": round(sum(n.valeur for n in notes) / len(notes), 2),
+            "absence": all(n.absence for n in notes),
+            "appreciation": appreciations[-1] if appreciations else None,
+        })
+        connexion.execute(
+            sa.text("DELETE FROM notes WHERE id IN :ids").bindparams(
+                sa.bindparam("ids", expanding=True)
+            ),
+            {"ids": [n.id for n in notes[:-1]]}
+        )
+
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.create_index(
+            "uq_notes_etudiant_matiere_annee", ["etudiant_id", "matiere_id", "annee"],
+            unique=True
+        )
+
+
+def downgrade():
+    # Les notes fusionnees ne sont pas restaurees
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.drop_index("uq_notes_etudiant_matiere_annee")
@@ -0,0 +1,27 @@
+"""add job battement_le
+
+Revision ID: a2c8e4f6b1d7
+Revises: f1b6d3a8c2e5
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a2c8e4f6b1d7"
+down_revision = "f1b6d3a8c2e5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("jobs") as batch_op:
+        # Bail du worker : renouvele pendant l'execution
+        batch_op.add_column(sa.Column("battement_le", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("battement_le")
@@ -0,0 +1,33 @@
+"""add note version and updated_at
+
+Revision ID: b3d9f1a6c8e4
+Revises: a1c7e3f5b9d2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b3d9f1a6c8e4"
+down_revision = "a1c7e3f5b9d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        # Verrou optimiste (version_id_col) : notes existantes en version 1
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+        )
+
+    op.execute("UPDATE notes SET updated_at = date_ajout")
+
+
+def downgrade():
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.drop_column("version")
+        batch_op.drop_column("updated_at")
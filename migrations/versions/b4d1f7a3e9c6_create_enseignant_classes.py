@@ -0,0 +1,39 @@
+"""create enseignant_classes
+
+Revision ID: b4d1f7a3e9c6
+Revises: a2c8e4f6b1d7
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b4d1f7a3e9c6"
+down_revision = "a2c8e4f6b1d7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Classes ou intervient un enseignant (choix des etudiants a noter)
+    op.create_table(
+        "enseignant_classes",
+        sa.Column("enseignant_id", sa.Integer(), nullable=False),
+        sa.Column("classe_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["enseignant_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["classe_id"], ["classes.id"]),
+        sa.PrimaryKeyConstraint("enseignant_id", "classe_id"),
+    )
+    # Existant : classes ou l'enseignant a deja saisi des notes
+    op.execute(
+        "INSERT INTO enseignant_classes (enseignant_id, classe_id) "
+        "SELECT DISTINCT n.enseignant_id, u.classe_id FROM notes n "
+        "JOIN users u ON u.id = n.etudiant_id "
+        "WHERE n.enseignant_id IS NOT NULL AND u.classe_id IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.drop_table("enseignant_classes")
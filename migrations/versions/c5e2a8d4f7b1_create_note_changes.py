@@ -0,0 +1,56 @@
+"""create note_changes
+
+Revision ID: c5e2a8d4f7b1
+Revises: b3d9f1a6c8e4
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c5e2a8d4f7b1"
+down_revision = "b3d9f1a6c8e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "note_changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(length=1), nullable=False),
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("etudiant_id", sa.Integer(), nullable=True),
+        sa.Column("enseignant_id", sa.Integer(), nullable=True),
+        sa.Column("matiere_id", sa.Integer(), nullable=True),
+        sa.Column("annee", sa.String(length=20), nullable=True),
+        sa.Column("valeur", sa.Float(), nullable=True),
+        sa.Column("absence", sa.Boolean(), nullable=True),
+        sa.Column("appreciation", sa.Text(), nullable=True),
+        sa.Column("cree_le", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_note_changes_etudiant_seq", "note_changes", ["etudiant_id", "seq"])
+    op.create_index("ix_note_changes_enseignant_seq", "note_changes", ["enseignant_id", "seq"])
+
+    # Notes existantes : une insertion chacune, since=0 donne un etat complet
+    op.execute(
+        """
+        INSERT INTO note_changes (
+            operation, note_id, etudiant_id, enseignant_id, matiere_id, annee,
+            valeur, absence, appreciation, cree_le
+        )
+        SELECT 'I', id, etudiant_id, enseignant_id, matiere_id, annee,
+               valeur, absence, appreciation, COALESCE(updated_at, date_ajout)
+        FROM notes ORDER BY id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_note_changes_enseignant_seq", table_name="note_changes")
+    op.drop_index("ix_note_changes_etudiant_seq", table_name="note_changes")
+    op.drop_table("note_changes")
@@ -0,0 +1,27 @@
+"""add versions_caches.modifie_le
+
+Revision ID: c6e3a9d1f5b8
+Revises: b4d1f7a3e9c6
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c6e3a9d1f5b8"
+down_revision = "b4d1f7a3e9c6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Date de la derniere incrementation (Last-Modified des classements)
+    with op.batch_alter_table("versions_caches") as batch_op:
+        batch_op.add_column(sa.Column("modifie_le", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("versions_caches") as batch_op:
+        batch_op.drop_column("modifie_le")
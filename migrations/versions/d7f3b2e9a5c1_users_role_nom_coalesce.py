@@ -0,0 +1,30 @@
+"""users role nom index on coalesced names
+
+Revision ID: d7f3b2e9a5c1
+Revises: c5e2a8d4f7b1
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d7f3b2e9a5c1"
+down_revision = "c5e2a8d4f7b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tri (nom, prenom, id) avec NULL compte comme vide : meme expression
+    # que la requete et le curseur de pagination
+    op.drop_index("ix_users_role_nom", table_name="users")
+    op.create_index("ix_users_role_nom", "users", [
+        "role", sa.text("coalesce(nom, '')"), sa.text("coalesce(prenom, '')"), "id"
+    ])
+
+
+def downgrade():
+    op.drop_index("ix_users_role_nom", table_name="users")
+    op.create_index("ix_users_role_nom", "users", ["role", "nom", "prenom"])
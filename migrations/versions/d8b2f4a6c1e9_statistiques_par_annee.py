@@ -0,0 +1,46 @@
+"""statistiques_matieres par annee, bornes a revoir
+
+Revision ID: d8b2f4a6c1e9
+Revises: c6e3a9d1f5b8
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8b2f4a6c1e9"
+down_revision = "c6e3a9d1f5b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lignes existantes : toutes annees melangees, a reconstruire
+    # (flask statistiques reconstruire)
+    op.execute("DELETE FROM statistiques_matieres")
+    op.drop_index("ix_statistiques_matieres_portee", table_name="statistiques_matieres")
+    with op.batch_alter_table("statistiques_matieres") as batch_op:
+        batch_op.add_column(sa.Column("annee", sa.String(length=20), nullable=False))
+        batch_op.add_column(sa.Column(
+            "bornes_a_revoir", sa.Boolean(), nullable=False, server_default=sa.false()
+        ))
+    op.create_index(
+        "ix_statistiques_matieres_portee",
+        "statistiques_matieres",
+        ["matiere_id", "classe_id", "annee"],
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM statistiques_matieres")
+    op.drop_index("ix_statistiques_matieres_portee", table_name="statistiques_matieres")
+    with op.batch_alter_table("statistiques_matieres") as batch_op:
+        batch_op.drop_column("bornes_a_revoir")
+        batch_op.drop_column("annee")
+    op.create_index(
+        "ix_statistiques_matieres_portee",
+        "statistiques_matieres",
+        ["matiere_id", "classe_id"],
+    )
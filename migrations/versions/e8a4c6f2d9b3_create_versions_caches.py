@@ -0,0 +1,31 @@
+"""create versions_caches
+
+Revision ID: e8a4c6f2d9b3
+Revises: d7f3b2e9a5c1
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e8a4c6f2d9b3"
+down_revision = "d7f3b2e9a5c1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Compteurs d'ecritures (cles des caches memoire de tous les processus)
+    op.create_table(
+        "versions_caches",
+        sa.Column("portee", sa.String(length=20), nullable=False),
+        sa.Column("cle", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("portee", "cle"),
+    )
+
+
+def downgrade():
+    op.drop_table("versions_caches")
@@ -0,0 +1,35 @@
+"""index notes (etudiant_id, annee) instead of annee
+
+Revision ID: e9c4b7d2a1f6
+Revises: d8b2f4a6c1e9
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e9c4b7d2a1f6"
+down_revision = "d8b2f4a6c1e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lectures toujours par etudiant et annee (jointure de cohorte). Une base
+    # passee par une ancienne copie de 6d9a4b2f8c35 a deja le nouvel index.
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = {idx["name"] for idx in inspector.get_indexes("notes")}
+    with op.batch_alter_table("notes") as batch_op:
+        if "ix_notes_annee" in indexes:
+            batch_op.drop_index("ix_notes_annee")
+        if "ix_notes_etudiant_annee" not in indexes:
+            batch_op.create_index("ix_notes_etudiant_annee", ["etudiant_id", "annee"])
+
+
+def downgrade():
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.drop_index("ix_notes_etudiant_annee")
+        batch_op.create_index("ix_notes_annee", ["annee"])
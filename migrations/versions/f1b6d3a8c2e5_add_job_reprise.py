@@ -0,0 +1,27 @@
+"""add job reprise
+
+Revision ID: f1b6d3a8c2e5
+Revises: e8a4c6f2d9b3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f1b6d3a8c2e5"
+down_revision = "e8a4c6f2d9b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("jobs") as batch_op:
+        # Point de reprise d'une tache (valide avec ses ecritures)
+        batch_op.add_column(sa.Column("reprise", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("reprise")
@@ -0,0 +1,147 @@
+"""Fixtures communes : application sur une base SQLite temporaire, donnees de test."""
+
+import os
+import random
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.filiere import Filiere
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.seed import seed_defaults
+from app.utils import cache_resultats, classement
+from benchmarks.environnement import CompteurRequetes  # noqa: F401 (importe par les tests)
+
+# Valeurs dont l'arrondi au centieme est delicat (9.995, 12.345...)
+VALEURS_LIMITES = (0, 9.995, 10, 12.345, 14.125, 19.999, 20)
+
+
+def _vider_caches():
+    """Les caches sont globaux au processus : une base neuve par test."""
+    for cache in (
+        cache_resultats.cache_resultats, cache_resultats.cache_cartes,
+        cache_resultats.cache_enseignants, cache_resultats.cache_carnets,
+    ):
+        cache.vider()
+    classement.vider()
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ConfigTest(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        BULLETINS_CACHE_DIR = str(tmp_path / "bulletins")
+        JOBS_DIR = str(tmp_path / "jobs")
+
+    application = create_app(ConfigTest)
+    with application.app_context():
+        db.create_all()
+        seed_defaults()
+        _vider_caches()
+        yield application
+        db.session.remove()
+        _vider_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def connecter(client, user):
+    """Session Flask-Login sans passer par le formulaire."""
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+        session["_fresh"] = True
+
+
+def peupler(classes=2, par_classe=12, graine=1):
+    """
+    Une filiere, `classes` classes d'etudiants et un enseignant de toutes
+    les matieres ; chaque etudiant a des notes dans une partie des matieres.
+    Retourne l'enseignant.
+    """
+    hasard = random.Random(graine)
+    filiere = Filiere(nom="Informatique", niveau="L1", annee=annee_courante())
+    db.session.add(filiere)
+    enseignant = User(username="prof", password_hash="x", role="ENSEIGNANT", nom="Prof")
+    matieres = Matiere.query.order_by(Matiere.id).all()
+    enseignant.matieres = matieres
+    db.session.add(enseignant)
+    db.session.flush()
+
+    numero = 0
+    for c in range(classes):
+        classe = Classe(nom=f"L1-{c + 1}", filiere_id=filiere.id)
+        db.session.add(classe)
+        db.session.flush()
+        for _ in range(par_classe):
+            numero += 1
+            etudiant = User(
+                username=f"etu{numero}", password_hash="x", role="ETUDIANT",
+                nom=f"Nom{numero:03d}", prenom=f"Prenom{numero}",
+                matricule=f"M{numero:05d}", classe_id=classe.id,
+            )
+            db.session.add(etudiant)
+            db.session.flush()
+            choix = matieres[:]
+            hasard.shuffle(choix)
+            for matiere in choix[:hasard.randint(0, len(choix))]:
+                absence = hasard.random() < 0.1
+                valeur = 0 if absence else hasard.choice(
+                    VALEURS_LIMITES + (round(hasard.uniform(0, 20), hasard.choice((0, 1, 2, 3))),)
+                )
+                db.session.add(Note(
+                    valeur=valeur, absence=absence, etudiant_id=etudiant.id,
+                    matiere_id=matiere.id, enseignant_id=enseignant.id,
+                ))
+        enseignant.classes.append(classe)
+    db.session.commit()
+    return enseignant
+
+
+def autre_processus(app, code):
+    """
+    Execute `code` dans un autre processus Python, sur la meme base, dans un
+    contexte d'application (db et modeles importes) : ecritures d'un worker.
+    """
+    script = "\n".join((
+        "from app import create_app",
+        "from app.extensions import db",
+        "from app.models import *",
+        "with create_app().app_context():",
+        textwrap.indent(textwrap.dedent(code), "    "),
+    ))
+    env = dict(
+        os.environ,
+        DATABASE_URL=app.config["SQLALCHEMY_DATABASE_URI"],
+        JOBS_DIR=app.config["JOBS_DIR"],
+        BULLETINS_CACHE_DIR=app.config["BULLETINS_CACHE_DIR"],
+    )
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script], cwd=racine, env=env, check=True,
+                   capture_output=True)
+
+
+class SessionPostgres:
+    """Session factice qui note les requetes compilees pour PostgreSQL."""
+
+    def __init__(self):
+        self.requetes = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    def execute(self, requete):
+        self.requetes.append(str(requete.compile(dialect=postgresql.dialect())))
@@ -0,0 +1,41 @@
+"""Parcours : une annee passee non cloturee reste visible, calculee sur ses notes."""
+
+from app.extensions import db
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils.annees import cloturer_annee, parcours_etudiant, resultat_annee
+from app.utils.cohorte import resultats_cohorte
+
+from .conftest import connecter, peupler
+
+ANCIENNE = "2019-2020"
+
+
+def test_annee_passee_non_cloturee(app, client):
+    peupler(classes=1, par_classe=6)
+    etudiant = (
+        User.query.filter_by(role="ETUDIANT")
+        .filter(User.id.in_(db.session.query(Note.etudiant_id))).order_by(User.id).first()
+    )
+    # Notes rangees dans une annee passee (filiere d'une autre annee a la migration)
+    for note in etudiant.notes[1:]:
+        note.annee = ANCIENNE
+    db.session.commit()
+    attendu = resultats_cohorte(etudiant_ids=[etudiant.id], annee=ANCIENNE)[etudiant.id]
+
+    lignes = {ligne["annee"]: ligne for ligne in parcours_etudiant(etudiant)["annees"]}
+    assert set(lignes) == {ANCIENNE, annee_courante()}
+    assert not lignes[ANCIENNE]["cloturee"]
+    assert lignes[ANCIENNE]["moyenne_generale"] == attendu["moyenne_generale"]
+    assert resultat_annee(etudiant.id, ANCIENNE) == attendu
+    assert resultat_annee(etudiant.id, "2000-2001") is None
+
+    connecter(client, etudiant)
+    assert "Non cloturee" in client.get("/etudiant/parcours").get_data(as_text=True)
+    assert client.get(f"/etudiant/parcours/{ANCIENNE}").status_code == 200
+
+    # Une fois cloturee, l'annee est lue dans le bilan fige
+    cloturer_annee(ANCIENNE)
+    lignes = {ligne["annee"]: ligne for ligne in parcours_etudiant(etudiant)["annees"]}
+    assert lignes[ANCIENNE]["cloturee"]
+    assert resultat_annee(etudiant.id, ANCIENNE) == attendu
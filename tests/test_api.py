@@ -0,0 +1,46 @@
+"""API etudiant : ETag lu dans student_results, 304 sans calcul."""
+
+import pytest
+
+from app.api import routes as api
+from app.extensions import db
+from app.models import Note, User
+
+from .conftest import connecter, peupler
+
+
+def _etudiant_note():
+    return (
+        User.query.filter_by(role="ETUDIANT")
+        .filter(User.id.in_(db.session.query(Note.etudiant_id))).order_by(User.id).first()
+    )
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/etudiant/resultats", "/api/v1/etudiant", "/api/v1/etudiant?champs=resultat,notes",
+])
+def test_304_sans_calcul(app, client, monkeypatch, url):
+    peupler(classes=1, par_classe=6)
+    etudiant = _etudiant_note()
+    connecter(client, etudiant)
+    premiere = client.get(url)
+    assert premiere.status_code == 200
+    etag = premiere.headers["ETag"]
+
+    def interdit(*args, **kwargs):
+        raise AssertionError("calcul pendant une revalidation")
+
+    for nom in ("resultat_etudiant", "classement_etudiant", "cartes_etudiant"):
+        monkeypatch.setattr(api, nom, interdit)
+    reponse = client.get(url, headers={"If-None-Match": etag})
+    assert reponse.status_code == 304
+    assert reponse.headers["ETag"] == etag
+    monkeypatch.undo()
+
+    # Nouvelle note : nouvel ETag et corps a jour
+    note = Note.query.filter_by(etudiant_id=etudiant.id).first()
+    note.valeur = 1 if note.valeur != 1 else 2
+    db.session.commit()
+    apres = client.get(url, headers={"If-None-Match": etag})
+    assert apres.status_code == 200
+    assert apres.headers["ETag"] != etag
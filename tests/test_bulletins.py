@@ -0,0 +1,21 @@
+"""Bulletins en lot : nombre de requetes independant du nombre d'etudiants."""
+
+import pytest
+
+from app.models import Classe
+from app.utils.bulletins_lot import preparer_bulletins
+
+from .conftest import CompteurRequetes, peupler
+
+
+@pytest.mark.parametrize("par_classe", [3, 12])
+def test_requetes_constantes(app, par_classe):
+    peupler(classes=2, par_classe=par_classe)
+    filiere_id = Classe.query.first().filiere_id
+    preparer_bulletins(filiere_id=filiere_id)
+
+    # Etudiants (avec leur classe), notes, matieres, une version par classe et filiere
+    with CompteurRequetes() as compteur:
+        bulletins = preparer_bulletins(filiere_id=filiere_id)
+    assert len(bulletins) == 2 * par_classe
+    assert len(compteur) == 6
@@ -0,0 +1,76 @@
+"""Caches memoire : une ecriture d'un autre processus change leurs cles."""
+
+from app.extensions import db
+from app.models.note import Note
+from app.models.user import User
+from app.utils.cache_resultats import cache_resultats
+from app.utils.resultats import calculer_resultat, cartes_etudiant, resultat_etudiant
+
+from .conftest import CompteurRequetes, autre_processus, connecter, peupler
+
+
+def _etudiant_note():
+    return db.session.query(Note.etudiant_id).order_by(Note.id).first()[0]
+
+
+def test_resultat_suit_les_ecritures_d_un_autre_processus(app):
+    peupler()
+    etudiant_id = _etudiant_note()
+    avant = resultat_etudiant(etudiant_id)
+    assert resultat_etudiant(etudiant_id) is avant  # servi par le cache
+
+    autre_processus(app, f"""
+        note = Note.query.filter_by(etudiant_id={etudiant_id}).order_by(Note.id).first()
+        note.valeur = 0.5 if note.valeur != 0.5 else 19.5
+        db.session.commit()
+    """)
+    db.session.expire_all()
+    assert resultat_etudiant(etudiant_id) == calculer_resultat(etudiant_id)
+    assert resultat_etudiant(etudiant_id) != avant
+
+    autre_processus(app, f"""
+        for note in Note.query.filter_by(etudiant_id={etudiant_id}):
+            db.session.delete(note)
+        db.session.commit()
+    """)
+    assert resultat_etudiant(etudiant_id) == calculer_resultat(etudiant_id)
+    assert cartes_etudiant(etudiant_id)["notes"] == 0
+
+
+def test_cache_borne_sans_compteur_par_etudiant(app):
+    app.config["RESULTATS_ENGINE"] = "python"
+    peupler()
+    cache_resultats.taille_max, taille = 3, cache_resultats.taille_max
+    try:
+        for (etudiant_id,) in db.session.query(Note.etudiant_id).distinct():
+            resultat_etudiant(etudiant_id)
+        assert cache_resultats.stats()["taille"] == 3
+    finally:
+        cache_resultats.taille_max = taille
+
+
+def test_dashboard_etudiant_chaud(app, client):
+    peupler()
+    etudiant = db.session.get(User, _etudiant_note())
+    connecter(client, etudiant)
+    assert client.get("/etudiant/dashboard").status_code == 200
+
+    # Cles des cartes et des classements en une requete (l'utilisateur,
+    # charge par Flask-Login, est deja dans la session du test)
+    with CompteurRequetes() as compteur:
+        assert client.get("/etudiant/dashboard").status_code == 200
+    assert len(compteur) == 1
+    assert "student_results" in compteur.requetes[0]
+    assert compteur.requetes[0].count("JOIN versions_caches") == 2
+
+    # Note d'un camarade : classement relu, cartes toujours en cache
+    camarade = (
+        db.session.query(Note).join(User, User.id == Note.etudiant_id)
+        .filter(User.classe_id == etudiant.classe_id, Note.etudiant_id != etudiant.id).first()
+    )
+    camarade.valeur = 20 if camarade.valeur != 20 else 19
+    db.session.commit()
+    with CompteurRequetes() as compteur:
+        assert client.get("/etudiant/dashboard").status_code == 200
+    assert not any("GROUP BY" in requete for requete in compteur.requetes)
+    assert len(compteur) > 1
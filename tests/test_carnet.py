@@ -0,0 +1,122 @@
+"""Carnet de notes : egal aux notes de l'ORM, invalide par classe et entre processus."""
+
+from app.extensions import db
+from app.models import Classe, Matiere, Note, User
+from app.models.note import annee_courante
+from app.utils.carnet_notes import carnet_classe
+
+from .conftest import autre_processus, connecter, peupler
+
+
+def _attendu(classe, matieres):
+    """Carnet reconstruit depuis les objets ORM."""
+    matieres = sorted(matieres, key=lambda m: (m.nom, m.id))
+    etudiants = (
+        User.query.filter_by(classe_id=classe.id, role="ETUDIANT")
+        .order_by(User.nom, User.prenom, User.id).all()
+    )
+    lignes = []
+    for etudiant in etudiants:
+        notes = {
+            n.matiere_id: n for n in Note.query.filter_by(
+                etudiant_id=etudiant.id, annee=annee_courante()
+            )
+        }
+        lignes.append({
+            "id": etudiant.id, "matricule": etudiant.matricule,
+            "nom": etudiant.nom, "prenom": etudiant.prenom,
+            "notes": [
+                None if m.id not in notes else {
+                    "valeur": notes[m.id].valeur, "absence": bool(notes[m.id].absence),
+                    "appreciation": notes[m.id].appreciation,
+                }
+                for m in matieres
+            ],
+        })
+    return {
+        "classe": {"id": classe.id, "nom": classe.nom},
+        "annee": annee_courante(),
+        "matieres": [{"id": m.id, "nom": m.nom} for m in matieres],
+        "etudiants": lignes,
+    }
+
+
+def _classes():
+    return Classe.query.order_by(Classe.id).all()
+
+
+def test_carnet_egal_a_l_orm(app):
+    enseignant = peupler()
+    for classe in _classes():
+        assert carnet_classe(classe, enseignant.matieres) == _attendu(classe, enseignant.matieres)
+
+
+def test_note_ecrite_ne_perime_que_sa_classe(app):
+    enseignant = peupler()
+    classe_a, classe_b = _classes()
+    carnet_a = carnet_classe(classe_a, enseignant.matieres)
+    carnet_b = carnet_classe(classe_b, enseignant.matieres)
+
+    note = (
+        Note.query.join(User, User.id == Note.etudiant_id)
+        .filter(User.classe_id == classe_a.id).first()
+    )
+    note.valeur = 3 if note.valeur != 3 else 4
+    db.session.commit()
+
+    assert carnet_classe(classe_b, enseignant.matieres) is carnet_b
+    nouveau = carnet_classe(classe_a, enseignant.matieres)
+    assert nouveau is not carnet_a
+    assert nouveau == _attendu(classe_a, enseignant.matieres)
+
+
+def test_deplacement_perime_les_deux_classes(app):
+    enseignant = peupler()
+    classe_a, classe_b = _classes()
+    carnet_classe(classe_a, enseignant.matieres)
+    carnet_classe(classe_b, enseignant.matieres)
+
+    etudiant = User.query.filter_by(classe_id=classe_a.id, role="ETUDIANT").first()
+    etudiant.classe_id = classe_b.id
+    db.session.commit()
+
+    for classe in (classe_a, classe_b):
+        assert carnet_classe(classe, enseignant.matieres) == _attendu(classe, enseignant.matieres)
+
+
+def test_renommages(app):
+    enseignant = peupler()
+    classe = _classes()[0]
+    carnet_classe(classe, enseignant.matieres)
+
+    etudiant = User.query.filter_by(classe_id=classe.id, role="ETUDIANT").first()
+    etudiant.nom = "Renomme"
+    classe.nom = "L1-A"
+    Matiere.query.order_by(Matiere.id).first().nom = "Matiere renommee"
+    db.session.commit()
+
+    carnet = carnet_classe(classe, enseignant.matieres)
+    assert carnet == _attendu(classe, enseignant.matieres)
+    assert carnet["classe"]["nom"] == "L1-A"
+    assert "Matiere renommee" in [m["nom"] for m in carnet["matieres"]]
+
+
+def test_ecriture_d_un_autre_processus(app, client):
+    enseignant = peupler()
+    connecter(client, enseignant)
+    classe = _classes()[0]
+    url = f"/enseignant/classes/{classe.id}/carnet"
+    assert client.get(url).status_code == 200
+    carnet_classe(classe, enseignant.matieres)
+
+    etudiant = User.query.filter_by(classe_id=classe.id, role="ETUDIANT").first()
+    autre_processus(app, f"""
+        etudiant = db.session.get(User, {etudiant.id})
+        etudiant.prenom = "Autre"
+        db.session.commit()
+    """)
+    db.session.expire_all()
+
+    assert carnet_classe(classe, enseignant.matieres) == _attendu(classe, enseignant.matieres)
+    page = client.get(url).get_data(as_text=True)
+    assert f'href="/enseignant/etudiants/{etudiant.id}/notes">Autre ' in page
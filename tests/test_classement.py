@@ -0,0 +1,163 @@
+"""Classements : suivent les ecritures, y compris celles d'un autre processus."""
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.filiere import Filiere
+from app.models.matiere import Matiere
+from app.models.note import Note, annee_courante
+from app.models.user import User
+from app.utils import classement as module_classement
+from app.utils.classement import classement
+
+from .conftest import autre_processus, connecter, peupler
+
+
+def _positions(portee, portee_id):
+    courant = classement(portee, portee_id)
+    neuf = module_classement._charger(portee, portee_id)
+    ids = [e for (e,) in db.session.query(User.id).filter_by(role="ETUDIANT")]
+    return [courant.position(e) for e in ids], [neuf.position(e) for e in ids]
+
+
+def _verifier(classe_ids, filiere_ids):
+    db.session.expire_all()
+    for classe_id in classe_ids:
+        courant, attendu = _positions("classe", classe_id)
+        assert courant == attendu
+    for filiere_id in filiere_ids:
+        courant, attendu = _positions("filiere", filiere_id)
+        assert courant == attendu
+
+
+def test_ecritures_d_un_autre_processus(app):
+    peupler(classes=2)
+    classes = [c.id for c in Classe.query.order_by(Classe.id)]
+    filiere_id = Filiere.query.one().id
+    _verifier(classes, [filiere_id])
+
+    etudiant_id = db.session.query(Note.etudiant_id).filter(
+        User.classe_id == classes[0]
+    ).join(User, User.id == Note.etudiant_id).first()[0]
+    autre_processus(app, f"""
+        for note in Note.query.filter_by(etudiant_id={etudiant_id}):
+            note.valeur = 20
+        db.session.commit()
+    """)
+    _verifier(classes, [filiere_id])
+    assert classement("classe", classes[0]).position(etudiant_id)["rang"] == 1
+
+
+def test_changement_de_classe_et_de_filiere(app):
+    peupler(classes=3)
+    classes = Classe.query.order_by(Classe.id).all()
+    filiere_id = classes[0].filiere_id
+    _verifier([c.id for c in classes], [filiere_id])
+
+    etudiant = User.query.filter_by(classe_id=classes[0].id).first()
+    autre_processus(app, f"""
+        db.session.get(User, {etudiant.id}).classe_id = {classes[1].id}
+        db.session.commit()
+    """)
+    _verifier([c.id for c in classes], [filiere_id])
+
+    autre = Filiere(nom="Reseaux", niveau="L1", annee=annee_courante())
+    db.session.add(autre)
+    db.session.commit()
+    autre_processus(app, f"""
+        db.session.get(Classe, {classes[2].id}).filiere_id = {autre.id}
+        db.session.commit()
+    """)
+    _verifier([c.id for c in classes], [filiere_id, autre.id])
+
+
+def test_etag_resultats_suit_un_changement_de_classe(app, client):
+    peupler()
+    classe_a, classe_b = Classe.query.order_by(Classe.id).all()
+    camarade, partant = (
+        User.query.filter_by(classe_id=classe_a.id, role="ETUDIANT")
+        .filter(User.id.in_(db.session.query(Note.etudiant_id))).order_by(User.id).limit(2)
+    )
+    connecter(client, camarade)
+    etag = client.get("/etudiant/resultats").headers["ETag"]
+    assert client.get("/etudiant/resultats", headers={"If-None-Match": etag}).status_code == 304
+
+    # Meme filiere : seul le classement de la classe change pour le camarade
+    partant.classe_id = classe_b.id
+    db.session.commit()
+    reponse = client.get("/etudiant/resultats", headers={"If-None-Match": etag})
+    assert reponse.status_code == 200
+    assert reponse.headers["ETag"] != etag
+
+
+def test_etag_resultats_suit_l_enseignant(app, client):
+    enseignant = peupler()
+    etudiant = (
+        User.query.filter_by(role="ETUDIANT")
+        .filter(User.id.in_(db.session.query(Note.etudiant_id))).order_by(User.id).first()
+    )
+    connecter(client, etudiant)
+    etag = client.get("/etudiant/resultats").headers["ETag"]
+
+    # Nom et photo de l'enseignant sont affiches avec ses notes
+    for champ, valeur in (("prenom", "Renomme"), ("profile_image", "photo.png")):
+        setattr(enseignant, champ, valeur)
+        db.session.commit()
+        reponse = client.get("/etudiant/resultats", headers={"If-None-Match": etag})
+        assert reponse.status_code == 200
+        assert reponse.headers["ETag"] != etag
+        etag = reponse.headers["ETag"]
+    assert "Renomme Prof" in reponse.get_data(as_text=True)
+
+
+def test_echange_a_effectif_et_somme_d_ids_egaux(app):
+    peupler(classes=2)
+    classe_a, classe_b = (c.id for c in Classe.query.order_by(Classe.id))
+    ids = [e for (e,) in db.session.query(User.id).filter_by(role="ETUDIANT").order_by(User.id)]
+    notes = {e for (e,) in db.session.query(Note.etudiant_id)}
+    # Classes entrelacees : ids pairs en A, impairs en B
+    for etudiant in User.query.filter(User.id.in_(ids)):
+        etudiant.classe_id = classe_a if etudiant.id % 2 == 0 else classe_b
+    db.session.commit()
+    _verifier([classe_a, classe_b], [])
+
+    # a + (a + 6) == (a + 1) + (a + 5) : effectifs et sommes des ids inchanges
+    a = next(e for e in ids if e % 2 == 0 and e + 6 in ids and e in notes)
+    echanges = ((a, classe_b), (a + 6, classe_b), (a + 1, classe_a), (a + 5, classe_a))
+    autre_processus(app, f"""
+        for etudiant_id, classe_id in {echanges!r}:
+            db.session.get(User, etudiant_id).classe_id = classe_id
+        db.session.commit()
+    """)
+    _verifier([classe_a, classe_b], [])
+    assert classement("classe", classe_a).position(a) is None
+    assert classement("classe", classe_b).position(a) is not None
+
+
+def test_etudiant_sans_note_non_classe(app):
+    peupler()
+    classe_id = Classe.query.order_by(Classe.id).first().id
+    etudiants = User.query.filter_by(classe_id=classe_id, role="ETUDIANT").order_by(User.id).all()
+    notes = {e for (e,) in db.session.query(Note.etudiant_id)}
+    etudiant, camarade = [e for e in etudiants if e.id in notes][:2]
+    effectif = classement("classe", classe_id).position(camarade.id)["effectif"]
+
+    # Hors classement, au lieu d'un rang avec 0 de moyenne
+    for note in Note.query.filter_by(etudiant_id=etudiant.id):
+        db.session.delete(note)
+    db.session.commit()
+    incremental = classement("classe", classe_id)
+    for courant in (incremental, module_classement._charger("classe", classe_id)):
+        assert courant.position(etudiant.id) is None
+        assert courant.position(camarade.id)["effectif"] == effectif - 1
+
+
+def test_coefficient_modifie(app):
+    peupler()
+    classes = [c.id for c in Classe.query.order_by(Classe.id)]
+    filiere_id = Filiere.query.one().id
+    _verifier(classes, [filiere_id])
+
+    matiere = Matiere.query.order_by(Matiere.id).first()
+    matiere.coefficient = (matiere.coefficient or 1) + 3
+    db.session.commit()
+    _verifier(classes, [filiere_id])
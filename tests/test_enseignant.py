@@ -0,0 +1,100 @@
+"""Dashboard enseignant : statistiques en une requete, a jour apres un import du worker."""
+
+import pytest
+
+from app.extensions import db
+from app.models.note import Note
+from app.models.user import User
+from app.utils.cache_resultats import cache_enseignants
+from app.utils.saisie_notes import etudiants_enseignant
+from app.utils.statistiques import statistiques_enseignant
+
+from .conftest import CompteurRequetes, autre_processus, connecter, peupler
+
+
+def _attendu(enseignant_id):
+    notes = Note.query.filter_by(enseignant_id=enseignant_id).all()
+    return {
+        "etudiants": len({n.etudiant_id for n in notes}),
+        "notes": len(notes),
+        "absences": sum(1 for n in notes if n.absence),
+        "appreciations": sum(1 for n in notes if n.appreciation is not None),
+    }
+
+
+def test_statistiques_a_froid_une_requete_d_agregats(app):
+    enseignant = peupler()
+    enseignant_id = enseignant.id
+    cache_enseignants.vider()
+    db.session.expire_all()
+
+    with CompteurRequetes() as compteur:
+        stats = statistiques_enseignant(enseignant_id)
+    # Version du cache (cle primaire) puis un seul agregat sur les notes
+    assert len(compteur) == 2
+    assert "versions_caches" in compteur.requetes[0]
+    assert compteur.requetes[1].count("FROM notes") == 1
+    assert stats == _attendu(enseignant_id)
+
+    with CompteurRequetes() as compteur:
+        assert statistiques_enseignant(enseignant_id) is stats
+    assert len(compteur) == 1
+
+
+@pytest.mark.parametrize("classes, par_classe", [(1, 4), (3, 30)])
+def test_dashboard_a_froid(app, client, classes, par_classe):
+    enseignant = peupler(classes=classes, par_classe=par_classe)
+    connecter(client, enseignant)
+    cache_enseignants.vider()
+    db.session.expire_all()
+    with CompteurRequetes() as compteur:
+        assert client.get("/enseignant/dashboard").status_code == 200
+    # Utilisateur, version du cache, agregat des notes, matieres, etudiants
+    # a noter, classes : meme nombre quelle que soit la taille de la cohorte
+    assert len(compteur) == 6
+    assert sum("FROM notes" in requete for requete in compteur.requetes) == 1
+
+
+def test_statistiques_apres_un_import_du_worker(app, tmp_path):
+    enseignant = peupler(par_classe=5)
+    enseignant_id = enseignant.id
+    avant = statistiques_enseignant(enseignant_id)
+
+    # Import CSV execute par `flask worker` dans un autre processus
+    etudiant = db.session.execute(db.text(
+        "SELECT matricule FROM users WHERE role = 'ETUDIANT' AND id NOT IN "
+        "(SELECT etudiant_id FROM notes WHERE matiere_id = 1)"
+    )).first()
+    fichier = tmp_path / "notes.csv"
+    fichier.write_text(f"matricule;matiere;valeur\n{etudiant[0]};1;12.5\n", encoding="utf-8")
+    autre_processus(app, f"""
+        from app.utils.jobs import enfiler, executer, reserver
+        job = enfiler("import_notes", {{
+            "fichier": {str(fichier)!r}, "format_fichier": "csv",
+            "enseignant_id": {enseignant_id}, "nom": "notes.csv",
+        }})
+        assert executer(reserver("test")) == "TERMINE"
+    """)
+
+    apres = statistiques_enseignant(enseignant_id)
+    assert apres == _attendu(enseignant_id)
+    assert apres["notes"] == avant["notes"] + 1
+
+
+def test_choix_limite_aux_classes_de_l_enseignant(app, client):
+    enseignant = peupler()
+    classe_a, classe_b = sorted(enseignant.classes, key=lambda c: c.id)
+    enseignant.classes = [classe_a]
+    db.session.commit()
+
+    etudiants, suivant = etudiants_enseignant(enseignant, limite=1000)
+    assert suivant is None
+    assert {e.classe_id for e in etudiants} == {classe_a.id}
+    assert len(etudiants) == User.query.filter_by(classe_id=classe_a.id).count()
+    assert etudiants_enseignant(enseignant, classe_id=classe_b.id) == ([], None)
+
+    connecter(client, enseignant)
+    page = client.get("/enseignant/dashboard").get_data(as_text=True)
+    assert classe_a.nom in page and classe_b.nom not in page
+    assert client.get(f"/enseignant/classes/{classe_b.id}/carnet").status_code == 403
+    assert client.get(f"/enseignant/classes/{classe_b.id}/matieres/1/notes").status_code == 302
@@ -0,0 +1,103 @@
+"""Import de notes : un nouvel essai reprend apres le dernier lot valide."""
+
+import csv
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Job, Note, User
+from app.models.job import EN_ATTENTE, EN_COURS, TERMINE
+from app.utils import import_notes
+from app.utils.jobs import enfiler, executer, reserver
+
+from .conftest import peupler
+
+
+def test_nouvel_essai_reprend_au_dernier_lot(app, tmp_path, monkeypatch):
+    app.config["NOTES_IMPORT_LOT"] = 2
+    enseignant = peupler(classes=1, par_classe=8)
+    enseignant_id = enseignant.id
+    etudiants = User.query.filter_by(role="ETUDIANT").order_by(User.id).all()
+    # Matiere que personne n'a encore : chaque ligne valide est importee
+    Note.query.filter_by(matiere_id=1).delete()
+    db.session.commit()
+    notes_avant = Note.query.count()
+
+    lignes = ["matricule;matiere;valeur"]
+    for etudiant in etudiants[:6]:
+        lignes.append(f"{etudiant.matricule};1;12")
+    lignes.insert(2, "INCONNU;1;10")
+    lignes.append("INCONNU;1;10")
+    fichier = tmp_path / "notes.csv"
+    fichier.write_text("\n".join(lignes) + "\n", encoding="utf-8")
+
+    # Premier essai : echec au troisieme lot (deux lots deja valides)
+    ecrire_notes = import_notes.ecrire_notes
+    appels = []
+
+    def ecrire_puis_echouer(notes):
+        appels.append(len(notes))
+        if len(appels) == 3:
+            raise RuntimeError("worker interrompu")
+        return ecrire_notes(notes)
+
+    monkeypatch.setattr(import_notes, "ecrire_notes", ecrire_puis_echouer)
+    job = enfiler("import_notes", {
+        "fichier": str(fichier), "format_fichier": "csv",
+        "enseignant_id": enseignant_id, "nom": "notes.csv",
+    })
+    job_id = job.id
+    assert executer(reserver("test")) == EN_ATTENTE
+    assert Note.query.count() == notes_avant + 4
+
+    # Nouvel essai sans attendre le delai
+    monkeypatch.setattr(import_notes, "ecrire_notes", ecrire_notes)
+    db.session.get(Job, job_id).disponible_le = datetime.utcnow()
+    db.session.commit()
+    assert executer(reserver("test")) == TERMINE
+
+    job = db.session.get(Job, job_id)
+    assert Note.query.count() == notes_avant + 6
+    assert job.message == "6 note(s) importee(s), 2 ligne(s) rejetee(s) sur 8"
+    with open(job.fichier, encoding="utf-8") as rapport:
+        rejets = list(csv.reader(rapport, delimiter=";"))
+    assert rejets[0][0] == "ligne"
+    assert [(r[0], r[-1]) for r in rejets[1:]] == [
+        ("3", "Matricule inconnu"), ("9", "Matricule inconnu")
+    ]
+
+
+def test_lot_annule_si_le_job_a_ete_repris(app, tmp_path, monkeypatch):
+    app.config["NOTES_IMPORT_LOT"] = 2
+    enseignant = peupler(classes=1, par_classe=6)
+    Note.query.filter_by(matiere_id=1).delete()
+    db.session.commit()
+    notes_avant = Note.query.count()
+    etudiants = User.query.filter_by(role="ETUDIANT").order_by(User.id).all()
+    fichier = tmp_path / "notes.csv"
+    fichier.write_text("matricule;matiere;valeur\n" + "".join(
+        f"{e.matricule};1;12\n" for e in etudiants
+    ), encoding="utf-8")
+
+    # Deuxieme lot : le job est repris par un autre worker avant le commit
+    ecrire_notes = import_notes.ecrire_notes
+    appels = []
+
+    def ecrire_puis_perdre_le_bail(notes):
+        appels.append(len(notes))
+        if len(appels) == 2:
+            with db.engine.begin() as connexion:
+                connexion.execute(update(Job).where(Job.id == job_id).values(worker="vivant"))
+        return ecrire_notes(notes)
+
+    monkeypatch.setattr(import_notes, "ecrire_notes", ecrire_puis_perdre_le_bail)
+    job_id = enfiler("import_notes", {
+        "fichier": str(fichier), "format_fichier": "csv",
+        "enseignant_id": enseignant.id, "nom": "notes.csv",
+    }).id
+    assert executer(reserver("mort")) == EN_COURS
+
+    # Seul le premier lot est valide ; le point de reprise le dit au repreneur
+    assert Note.query.count() == notes_avant + 2
+    assert db.session.get(Job, job_id).reprise["importees"] == 2
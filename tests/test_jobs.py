@@ -0,0 +1,99 @@
+"""File de taches : bail des jobs en cours, repris quand le worker disparait."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Job
+from app.models.job import ANNULE, EN_ATTENTE, EN_COURS, ECHEC, TERMINE
+from app.utils import jobs
+
+
+def _pause(progression, secondes):
+    time.sleep(secondes)
+
+
+def _job_abandonne(monkeypatch, **colonnes):
+    """Job reserve par un worker qui s'est arrete sans rien ecrire."""
+    monkeypatch.setitem(jobs._taches, "pause", _pause)
+    job = jobs.enfiler("pause", {"secondes": 0})
+    assert jobs.reserver("mort").id == job.id
+    job.battement_le = datetime.utcnow() - timedelta(seconds=jobs.duree_bail() + 1)
+    for colonne, valeur in colonnes.items():
+        setattr(job, colonne, valeur)
+    db.session.commit()
+    return job
+
+
+def test_job_abandonne_repris_par_un_autre_worker(app, monkeypatch):
+    job = _job_abandonne(monkeypatch)
+    job_id = job.id
+    assert jobs.abandonne(job)
+
+    repris = jobs.reserver("vivant")
+    assert repris.id == job_id
+    assert (repris.statut, repris.worker, repris.tentatives) == (EN_COURS, "vivant", 2)
+    assert jobs.executer(repris) == TERMINE
+
+
+def test_job_abandonne_sans_essai_restant(app, monkeypatch):
+    job = _job_abandonne(monkeypatch, max_tentatives=1)
+    assert jobs.liberer_abandonnes() == 1
+    db.session.refresh(job)
+    assert job.statut == ECHEC and job.termine_le is not None
+
+
+def test_job_abandonne_annule_ou_relance(app, monkeypatch):
+    job = _job_abandonne(monkeypatch)
+    jobs.annuler(job)
+    assert job.statut == ANNULE
+
+    job = _job_abandonne(monkeypatch)
+    assert jobs.relancer(job)
+    assert (job.statut, job.tentatives) == (EN_ATTENTE, 0)
+
+
+def test_bail_renouvele_pendant_l_execution(app, monkeypatch):
+    app.config["JOBS_BAIL"] = 0.4
+    monkeypatch.setitem(jobs._taches, "pause", _pause)
+    job = jobs.enfiler("pause", {"secondes": 0.6})
+    job_id = job.id
+    job = jobs.reserver("test")
+
+    # Longue tache sans appel a avancer() : jamais reprise par un autre worker
+    assert jobs.executer(job) == TERMINE
+    job = db.session.get(Job, job_id)
+    assert job.tentatives == 1
+    assert job.battement_le > job.demarre_le + timedelta(seconds=0.3)
+
+
+def _reprise_par_un_autre(job_id):
+    """Ce que fait liberer_abandonnes puis reserver chez un autre worker."""
+    with db.engine.begin() as connexion:
+        connexion.execute(
+            update(Job).where(Job.id == job_id)
+            .values(worker="vivant", tentatives=Job.tentatives + 1)
+        )
+
+
+def _volee(progression, avancer):
+    _reprise_par_un_autre(progression.job_id)
+    if avancer:
+        progression.avancer(50)
+    return "sortie.txt", "sortie.txt", "text/plain"
+
+
+@pytest.mark.parametrize("avancer", [False, True])
+def test_issue_ignoree_si_le_job_a_ete_repris(app, monkeypatch, avancer):
+    monkeypatch.setitem(jobs._taches, "volee", _volee)
+    job = jobs.enfiler("volee", {"avancer": avancer})
+    job_id = job.id
+
+    # L'issue du premier worker n'ecrase pas l'etat du second
+    assert jobs.executer(jobs.reserver("mort")) == EN_COURS
+    job = db.session.get(Job, job_id)
+    assert (job.statut, job.worker, job.tentatives) == (EN_COURS, "vivant", 2)
+    assert job.fichier is None and job.termine_le is None
@@ -0,0 +1,44 @@
+"""Journal des notes : curseur sur seq, moteurs ou seq suit l'ordre des commits."""
+
+import pytest
+
+from app.extensions import db
+from app.models import Note
+from app.utils import ecritures, journal_notes
+from app.utils.journal_notes import lire_changements, verifier_moteur
+
+from .conftest import SessionPostgres, peupler
+
+
+def test_curseur_reprend_apres_le_dernier_seq(app):
+    peupler(classes=1, par_classe=4)
+    changements, curseur, fini = lire_changements(0, limite=100000)
+    assert fini and len(changements) == Note.query.count()
+
+    note = Note.query.first()
+    note.valeur = 5 if note.valeur != 5 else 6
+    db.session.commit()
+    suite, suivant, fini = lire_changements(curseur)
+    assert [(c.note_id, c.valeur) for c in suite] == [(note.id, note.valeur)]
+    assert suivant > curseur and fini
+
+
+@pytest.mark.parametrize("uri", ["sqlite:///notes.db", "postgresql+psycopg://u@h/notes"])
+def test_moteurs_acceptes(uri):
+    verifier_moteur(uri)
+
+
+def test_autre_moteur_refuse():
+    with pytest.raises(RuntimeError, match="note_changes"):
+        verifier_moteur("mysql+pymysql://u@h/notes")
+
+
+
+def test_verrou_global_postgresql_pris_en_dernier(app):
+    session = SessionPostgres()
+    journal_notes._serialiser(session)
+    assert len(session.requetes) == 1
+    assert "pg_advisory_xact_lock(" in session.requetes[0]
+
+    # Ecrivains de notes serialises : verrou tenu du journal au commit seulement
+    assert ecritures._abonnes_avant_commit[-1] is journal_notes._journaliser
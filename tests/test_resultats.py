@@ -0,0 +1,120 @@
+"""Les moteurs de resultats (Python, SQL, table, cohorte) donnent le meme bilan."""
+
+import pytest
+
+from app.extensions import db
+from app.models.note import Note, annee_courante
+from app.models.resultat import StudentResult
+from app.models.user import User
+from app.utils.calculs import resultat_final
+from app.utils.calculs_sql import resultat_final_sql
+from app.utils.cohorte import (
+    calculer_resultats, charger_cohorte, charger_matieres, resultats_cohorte
+)
+from app.utils.resultats import calculer_resultat, resultat_python
+from app.utils.resultats_materialises import reconstruire, resultat_materialise
+
+from .conftest import CompteurRequetes, peupler
+
+
+def _etudiants():
+    return [e for (e,) in db.session.query(User.id).filter_by(role="ETUDIANT").order_by(User.id)]
+
+
+def _reference(etudiant_id, use_coefficients):
+    """resultat_final sur les notes ORM de l'annee, dans l'ordre de saisie."""
+    notes = (
+        Note.query.filter_by(etudiant_id=etudiant_id, annee=annee_courante())
+        .order_by(Note.id).all()
+    )
+    return resultat_final(notes, use_coefficients=use_coefficients)
+
+
+@pytest.mark.parametrize("use_coefficients", [True, False])
+def test_moteurs_python_et_sql_identiques(app, use_coefficients):
+    peupler()
+    for etudiant_id in _etudiants():
+        attendu = resultat_python(etudiant_id, use_coefficients=use_coefficients)
+        assert resultat_final_sql(etudiant_id, use_coefficients=use_coefficients) == attendu
+        assert _reference(etudiant_id, use_coefficients) == attendu
+
+
+@pytest.mark.parametrize("moteur", ["python", "sql", "table"])
+def test_moteur_choisi_par_la_configuration(app, moteur):
+    peupler()
+    # Note d'une autre annee : ignoree par les trois moteurs
+    note = Note.query.order_by(Note.id).first()
+    note.annee = "2019-2020"
+    db.session.commit()
+    list(reconstruire())
+
+    app.config["RESULTATS_ENGINE"] = moteur
+    for etudiant_id in _etudiants():
+        with CompteurRequetes() as compteur:
+            resultat = calculer_resultat(etudiant_id)
+        assert resultat == resultat_python(etudiant_id)
+        if moteur == "sql":
+            # Un seul aller-retour (GROUP BY cote base)
+            assert len(compteur) == 1
+
+
+def test_moteur_inconnu_refuse(app):
+    app.config["RESULTATS_ENGINE"] = "numpy"
+    with pytest.raises(ValueError, match="RESULTATS_ENGINE invalide"):
+        calculer_resultat(1)
+
+
+@pytest.mark.parametrize("use_coefficients", [True, False])
+def test_cohorte_identique_a_resultat_final(app, use_coefficients):
+    peupler(classes=3)
+    etudiants = _etudiants()
+    resultats = resultats_cohorte(etudiant_ids=etudiants, use_coefficients=use_coefficients)
+    # Tous les etudiants, y compris sans note ; egalite exacte (memes arrondis)
+    assert set(resultats) == set(etudiants)
+    for etudiant_id in etudiants:
+        assert resultats[etudiant_id] == _reference(etudiant_id, use_coefficients)
+
+
+def test_table_materialisee_identique(app):
+    peupler()
+    list(reconstruire())
+    app.config["RESULTATS_ENGINE"] = "table"
+    for etudiant_id in _etudiants():
+        attendu = resultat_python(etudiant_id)
+        assert resultat_materialise(etudiant_id) in (None, attendu)
+        assert calculer_resultat(etudiant_id) == attendu
+
+
+def test_table_suit_les_ecritures(app):
+    peupler()
+    list(reconstruire())
+    note = Note.query.order_by(Note.id).first()
+    version = db.session.get(StudentResult, note.etudiant_id).version
+    note.valeur = 3.5 if note.valeur != 3.5 else 17.25
+    with CompteurRequetes() as compteur:
+        db.session.commit()
+    attendu = resultat_python(note.etudiant_id)
+    assert resultat_materialise(note.etudiant_id) == attendu
+
+    # Ligne mise a jour en place (upsert), sans lecture prealable de la version
+    lignes = [requete for requete in compteur.requetes if "student_results" in requete]
+    assert len(lignes) == 1 and "ON CONFLICT (etudiant_id) DO UPDATE" in lignes[0]
+    db.session.expire_all()
+    assert db.session.get(StudentResult, note.etudiant_id).version == version + 1
+
+
+def test_matiere_absente_du_referentiel(app):
+    peupler()
+    cohorte = charger_cohorte()
+    matieres = charger_matieres()
+    # Matiere du milieu : searchsorted tomberait sur sa voisine
+    absente = sorted(matieres)[len(matieres) // 2]
+    referentiel = {m: infos for m, infos in matieres.items() if m != absente}
+
+    sans_ses_notes = dict(cohorte)
+    gardees = cohorte["matiere"] != absente
+    for champ in ("etudiant", "matiere", "valeur", "absence"):
+        sans_ses_notes[champ] = cohorte[champ][gardees]
+    assert calculer_resultats(cohorte, referentiel) == calculer_resultats(
+        sans_ses_notes, referentiel
+    )
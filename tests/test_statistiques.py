@@ -0,0 +1,123 @@
+"""Statistiques par matiere : la mise a jour incrementale egale une reconstruction."""
+
+from app.extensions import db
+from app.models.classe import Classe
+from app.models.note import Note
+from app.models.statistique import StatistiqueMatiere
+from app.models.user import User
+from app.utils import statistiques
+
+from .conftest import SessionPostgres, peupler
+
+
+
+def _etat():
+    db.session.expire_all()
+    lignes = {
+        (ligne.matiere_id, ligne.classe_id, ligne.annee): (
+            ligne.effectif, round(ligne.moyenne, 6), round(ligne.m2, 4),
+            ligne.absences, tuple(ligne.histogramme),
+        )
+        for ligne in StatistiqueMatiere.query if ligne.effectif
+    }
+    # Min/max tels que lus par la page (relus si une valeur extreme est partie)
+    bornes = {
+        (classe_id, stats["matiere"]): (stats["minimum"], stats["maximum"])
+        for classe_id in [None] + [c.id for c in Classe.query]
+        for stats in statistiques.statistiques_par_matiere(classe_id)
+    }
+    return lignes, bornes
+
+
+def _verifier():
+    incrementales = _etat()
+    statistiques.reconstruire()
+    assert incrementales == _etat()
+
+
+def _etudiant_note(classe):
+    return next(e for e in User.query.filter_by(classe_id=classe.id) if len(e.notes) > 1)
+
+
+def test_note_supprimee_apres_changement_de_classe(app):
+    peupler(classes=3)
+    statistiques.reconstruire()
+    classes = Classe.query.order_by(Classe.id).all()
+
+    etudiant = _etudiant_note(classes[0])
+    etudiant.classe_id = classes[1].id
+    db.session.commit()
+    _verifier()
+
+    db.session.delete(etudiant.notes[0])
+    db.session.commit()
+    _verifier()
+    for ligne in StatistiqueMatiere.query:
+        assert ligne.effectif == 0 or 0 <= ligne.moyenne <= 20
+
+
+def test_changement_de_classe_et_notes_dans_la_meme_transaction(app):
+    peupler(classes=3)
+    statistiques.reconstruire()
+    classes = Classe.query.order_by(Classe.id).all()
+
+    etudiant = _etudiant_note(classes[2])
+    db.session.commit()  # attributs expires : l'ancienne classe doit etre relue
+    etudiant.classe_id = classes[0].id
+    etudiant.notes[0].valeur = 19.5
+    db.session.delete(etudiant.notes[1])
+    db.session.commit()
+    _verifier()
+
+
+def test_etudiant_supprime_ou_sans_classe(app):
+    peupler(classes=2)
+    statistiques.reconstruire()
+    classes = Classe.query.order_by(Classe.id).all()
+
+    db.session.delete(_etudiant_note(classes[0]))
+    db.session.commit()
+    _verifier()
+
+    _etudiant_note(classes[1]).classe_id = None
+    db.session.commit()
+    _verifier()
+
+
+def test_maximum_retire_relu_a_la_lecture(app):
+    peupler(classes=2)
+    statistiques.reconstruire()
+    note = Note.query.order_by(Note.valeur.desc(), Note.id).first()
+    matiere_id = note.matiere_id
+
+    # Pas de parcours des notes a l'ecriture : bornes marquees a revoir
+    db.session.delete(note)
+    db.session.commit()
+    ligne = StatistiqueMatiere.query.filter_by(matiere_id=matiere_id, classe_id=None).one()
+    assert ligne.bornes_a_revoir
+    _verifier()
+
+
+def test_notes_d_une_autre_annee_a_part(app):
+    enseignant = peupler(classes=2)
+    statistiques.reconstruire()
+    avant = statistiques.statistiques_par_matiere()
+    etudiant = _etudiant_note(Classe.query.order_by(Classe.id).first())
+
+    note = etudiant.notes[0]
+    db.session.add(Note(
+        valeur=20 - note.valeur, absence=False, etudiant_id=etudiant.id, annee="2019-2020",
+        matiere_id=note.matiere_id, enseignant_id=enseignant.id,
+    ))
+    db.session.commit()
+    _verifier()
+    assert statistiques.statistiques_par_matiere() == avant
+    assert [s["effectif"] for s in statistiques.statistiques_par_matiere(annee="2019-2020")] == [1]
+
+
+def test_ecrivains_serialises_par_matiere(app):
+    session = SessionPostgres()
+    statistiques._verrouiller(session, {2, 1})
+    assert len(session.requetes) == 1
+    assert "ORDER BY matieres.id" in session.requetes[0]
+    assert session.requetes[0].endswith("FOR NO KEY UPDATE")